@@ -0,0 +1,107 @@
+"""
+Connect storm benchmark
+
+Sets up the crypto context for many consoles at once (as happens when
+the REST server reconnects its consoles after a network outage) and
+measures how responsive the event loop stays meanwhile.
+
+A ticker task sleeps for `--tick` milliseconds in a loop and records how
+late it wakes up. Compared are:
+
+* sync:  `Crypto()` on the loop thread, key generated on demand
+* pool:  `Crypto()` on the loop thread, key taken from a warm `KeyPool`
+* async: `Crypto.create_async()`, key exchange in the default executor
+
+Usage:
+    python benchmarks/connect_storm.py --consoles 200
+"""
+import time
+import asyncio
+import argparse
+import statistics
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from xbox.sg.crypto import Crypto, KeyPool, KEY_POOLS
+
+CURVES = [ec.SECP256R1, ec.SECP384R1, ec.SECP521R1]
+
+
+async def ticker(interval: float, lags: list, stop: asyncio.Event) -> None:
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lags.append(loop.time() - start - interval)
+
+
+async def storm(mode: str, keys: list, tick: float) -> dict:
+    lags = []
+    stop = asyncio.Event()
+    ticker_task = asyncio.create_task(ticker(tick, lags, stop))
+    # Let the ticker settle
+    await asyncio.sleep(tick * 2)
+
+    async def connect(key):
+        if mode == 'async':
+            return await Crypto.create_async(key)
+        ctx = Crypto(key)
+        # Yield to the loop like a connect would while awaiting the response
+        await asyncio.sleep(0)
+        return ctx
+
+    start = time.perf_counter()
+    await asyncio.gather(*[connect(k) for k in keys])
+    duration = time.perf_counter() - start
+
+    stop.set()
+    await ticker_task
+
+    return dict(
+        mode=mode,
+        duration=duration,
+        max_lag=max(lags) * 1000,
+        mean_lag=statistics.mean(lags) * 1000,
+        ticks=len(lags)
+    )
+
+
+def prepare_pools(count: int, enabled: bool) -> None:
+    for curve in CURVES:
+        size = count if enabled else 0
+        KEY_POOLS[curve] = KeyPool(curve, size=size)
+        if enabled:
+            KEY_POOLS[curve].refill(wait=True)
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    backend = default_backend()
+    keys = [
+        ec.generate_private_key(CURVES[i % len(CURVES)](), backend).public_key()
+        for i in range(args.consoles)
+    ]
+
+    print(f'Connect storm: {args.consoles} consoles, tick {args.tick} ms')
+    print('{0:<8}{1:>12}{2:>14}{3:>15}{4:>8}'.format(
+        'mode', 'duration s', 'max lag ms', 'mean lag ms', 'ticks'))
+
+    for mode in ('sync', 'pool', 'async'):
+        prepare_pools(args.consoles, enabled=(mode != 'sync'))
+        result = await storm(mode, keys, args.tick / 1000)
+        print('{mode:<8}{duration:>12.3f}{max_lag:>14.2f}'
+              '{mean_lag:>15.2f}{ticks:>8}'.format(**result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Connect storm benchmark')
+    parser.add_argument('--consoles', '-c', type=int, default=200,
+                        help='Number of consoles to connect to')
+    parser.add_argument('--tick', '-t', type=float, default=5,
+                        help='Ticker interval in milliseconds')
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == '__main__':
+    main()
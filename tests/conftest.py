@@ -2,17 +2,26 @@ import os
 import pytest
 import uuid
 import json
+import datetime
+import functools
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
 from binascii import unhexlify
 from construct import Container
+from cryptography import x509
+from cryptography.x509.oid import NameOID
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.serialization import Encoding
 
 from xbox.sg import enum, packer, packet
 
 from xbox.sg.console import Console
 from xbox.sg.crypto import Crypto
 from xbox.sg.manager import MediaManager, TextManager, InputManager
+from xbox.sg.utils.adapters import CertificateInfo
 
 from xbox.auxiliary.crypto import AuxiliaryStreamCrypto
 
@@ -122,6 +131,36 @@ def pcap_filepath():
     return os.path.join(os.path.dirname(__file__), 'data', 'sg_capture.pcap')
 
 
+@pytest.fixture(scope='session')
+def discovery_response_factory():
+    @functools.lru_cache(maxsize=None)
+    def _build(liveid, name='XboxOne'):
+        key = ec.generate_private_key(ec.SECP256R1(), default_backend())
+        subject = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, liveid)])
+        now = datetime.datetime.utcnow()
+        cert = x509.CertificateBuilder().subject_name(subject) \
+            .issuer_name(subject) \
+            .public_key(key.public_key()) \
+            .serial_number(1) \
+            .not_valid_before(now) \
+            .not_valid_after(now + datetime.timedelta(days=1)) \
+            .sign(key, hashes.SHA256(), default_backend())
+
+        msg = packet.simple.struct(
+            header=packet.simple.header(pkt_type=enum.PacketType.DiscoveryResponse),
+            unprotected_payload=packet.simple.discovery_response(
+                flags=enum.PrimaryDeviceFlag.AllowAnonymousUsers,
+                type=enum.ClientType.XboxOne,
+                name=name,
+                uuid=uuid.uuid4(),
+                last_error=0,
+                cert=CertificateInfo(cert.public_bytes(Encoding.DER))
+            )
+        )
+        return packer.pack(msg)
+    return _build
+
+
 @pytest.fixture(scope='session')
 def certificate_data():
     filepath = os.path.join(os.path.dirname(__file__), 'data', 'selfsigned_cert.bin')
@@ -152,3 +152,16 @@ def test_certificateinfo(certificate_data):
 
     assert certinfo.dump() == certificate_data
     assert certinfo.liveid == 'FFFFFFFFFFF'
+
+
+def test_certificateinfo_cache(certificate_data):
+    import struct
+    prefixed_data = struct.pack('>H', len(certificate_data)) + certificate_data
+    adapter = adapters.CertificateAdapter()
+
+    first = adapter.parse(prefixed_data)
+    second = adapter.parse(prefixed_data)
+
+    assert first is second
+    assert adapters.CertificateInfo.load(certificate_data) is first
+    assert adapters.CertificateInfo(certificate_data) is not first
@@ -8,7 +8,7 @@ def test_manager_messagehandling(console, decrypted_packets):
     manager = TitleManager(console)
 
     def handle_msg(msg):
-        manager._pre_on_message(msg, ServiceChannel.Title)
+        console._handle_message(msg, ServiceChannel.Title)
 
     assert manager.active_surface is None
     assert manager.connection_info is None
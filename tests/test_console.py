@@ -15,7 +15,9 @@ def test_init(public_key, uuid_dummy):
     assert c.uuid == uuid_dummy
     assert c.liveid == 'FFFFFFFFFFF'
     assert c._public_key is not None
-    assert c._crypto is not None
+    assert c._crypto is None
+    assert c.crypto is not None
+    assert c.crypto.foreign_pubkey == c.public_key
     assert c.device_status == enum.DeviceStatus.Unavailable
     assert c.connection_state == enum.ConnectionState.Disconnected
     assert c.pairing_state == enum.PairedIdentityState.NotPaired
@@ -40,7 +42,7 @@ def test_init_from_message(packets, crypto, uuid_dummy):
     assert c.uuid == uuid_dummy
     assert c.liveid == 'FFFFFFFFFFF'
     assert c._public_key is not None
-    assert c._crypto is not None
+    assert c._crypto is None
     assert c.device_status == enum.DeviceStatus.Available
     assert c.connection_state == enum.ConnectionState.Disconnected
     assert c.pairing_state == enum.PairedIdentityState.NotPaired
@@ -52,3 +54,64 @@ def test_init_from_message(packets, crypto, uuid_dummy):
     assert c.anonymous_connection_allowed is False
     assert c.console_users_allowed is False
     assert c.is_certificate_pending is False
+
+
+def test_from_dict_legacy(uuid_dummy):
+    c = console.Console.from_dict({
+        'address': '10.0.0.23',
+        'name': 'XboxOne',
+        'uuid': str(uuid_dummy),
+        'liveid': 'FFFFFFFFFFF'
+    })
+
+    assert c.liveid == 'FFFFFFFFFFF'
+    assert c.flags == enum.PrimaryDeviceFlag.Null
+    assert c.public_key is None
+    assert c.crypto is None
+    assert c.last_seen is None
+    assert c.to_dict()['public_key'] is None
+
+
+def test_to_dict_roundtrip(console):
+    c = console.from_dict(console.to_dict())
+
+    assert c.to_dict() == console.to_dict()
+    assert c.crypto is not None
+
+
+def test_message_dispatch(public_key, uuid_dummy, decrypted_packets):
+    c = console.Console(
+        '10.0.0.23', 'XboxOne', uuid_dummy, 'FFFFFFFFFFF',
+        enum.PrimaryDeviceFlag.AllowConsoleUsers, 0, public_key
+    )
+    status = decrypted_packets['console_status']
+    surface = decrypted_packets['active_surface_change']
+    by_channel = []
+    by_type = []
+    other_channel = []
+    legacy = []
+
+    def on_type(msg, channel):
+        by_type.append(msg)
+
+    c.subscribe(lambda msg, channel: by_channel.append(msg),
+                enum.ServiceChannel.Core)
+    c.subscribe(on_type, enum.ServiceChannel.Core,
+                enum.MessageType.ConsoleStatus)
+    c.subscribe(lambda msg, channel: other_channel.append(msg),
+                enum.ServiceChannel.SystemMedia)
+    c.on_message += lambda msg, channel: legacy.append(msg)
+
+    c._handle_message(status, enum.ServiceChannel.Core)
+    c._handle_message(surface, enum.ServiceChannel.Core)
+
+    assert by_channel == [status, surface]
+    assert by_type == [status]
+    assert other_channel == []
+    assert legacy == [status, surface]
+
+    c.unsubscribe(on_type, enum.ServiceChannel.Core,
+                  enum.MessageType.ConsoleStatus)
+    c._handle_message(status, enum.ServiceChannel.Core)
+    assert by_type == [status]
+    assert len(by_channel) == 3
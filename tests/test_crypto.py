@@ -1,5 +1,7 @@
 import pytest
 from binascii import unhexlify
+from cryptography.hazmat.primitives.asymmetric import ec
+from xbox.sg.crypto import Crypto, KeyPool
 from xbox.sg.enum import PublicKeyType
 
 
@@ -50,7 +52,6 @@ def test_hash(crypto):
 
 
 def test_from_bytes(public_key_bytes, public_key):
-    from xbox.sg.crypto import Crypto
     c1 = Crypto.from_bytes(public_key_bytes)
     c2 = Crypto.from_bytes(public_key_bytes, PublicKeyType.EC_DH_P256)
 
@@ -69,7 +70,6 @@ def test_from_bytes(public_key_bytes, public_key):
 
 
 def test_from_shared_secret(shared_secret_bytes):
-    from xbox.sg.crypto import Crypto
     c = Crypto.from_shared_secret(shared_secret_bytes)
 
     # invalid length
@@ -85,3 +85,25 @@ def test_from_shared_secret(shared_secret_bytes):
     assert c._hash_key == unhexlify(
         b'30ed8e3da7015a09fe0f08e9bef3853c0506327eb77c9951769d923d863a2f5e'
     )
+
+
+def test_keypool():
+    pool = KeyPool(ec.SECP256R1, size=4)
+    assert len(pool) == 0
+
+    pool.refill(wait=True)
+    assert len(pool) == 4
+
+    keys = [pool.get() for _ in range(6)]
+    assert all(isinstance(k.curve, ec.SECP256R1) for k in keys)
+    # Every key is handed out once
+    assert len({k.private_numbers().private_value for k in keys}) == 6
+
+
+@pytest.mark.asyncio
+async def test_create_async(public_key):
+    ctx = await Crypto.create_async(public_key)
+
+    assert ctx.foreign_pubkey == public_key
+    assert ctx.pubkey_type == PublicKeyType.EC_DH_P256
+    assert len(ctx.shared_secret) == 64
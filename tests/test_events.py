@@ -0,0 +1,88 @@
+import asyncio
+import pytest
+
+from xbox.sg.utils.events import Event
+
+
+@pytest.mark.asyncio
+async def test_event_sync():
+    event = Event()
+    calls = []
+    event += lambda *args: calls.append(args)
+    event(1, 2)
+
+    assert calls == [(1, 2)]
+
+
+@pytest.mark.asyncio
+async def test_event_async_errors():
+    errors = []
+    event = Event(asynchronous=True,
+                  on_error=lambda e, handler: errors.append(e))
+    results = []
+
+    async def handler(value):
+        await asyncio.sleep(0)
+        if value == 2:
+            raise ValueError(value)
+        results.append(value)
+
+    event += handler
+    for i in range(4):
+        event(i)
+
+    assert event.pending == 4
+    await event.drain()
+    assert event.pending == 0
+    assert sorted(results) == [0, 1, 3]
+    assert len(errors) == 1 and isinstance(errors[0], ValueError)
+
+
+@pytest.mark.asyncio
+async def test_event_bounded_ordered():
+    running = 0
+    max_running = 0
+    order = []
+
+    async def handler(value):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01 * (5 - value))
+        order.append(value)
+        running -= 1
+
+    bounded = Event(asynchronous=True, max_concurrency=2)
+    bounded += handler
+    for i in range(5):
+        bounded(i)
+    # Not more workers than allowed
+    assert len(bounded._tasks) == 2
+    await bounded.drain()
+    assert max_running == 2
+    assert sorted(order) == list(range(5))
+
+    order.clear()
+    ordered = Event(asynchronous=True, ordered=True)
+    ordered += handler
+    for i in range(5):
+        ordered(i)
+    await ordered.drain()
+    assert order == list(range(5))
+
+
+@pytest.mark.asyncio
+async def test_event_drain_timeout():
+    event = Event(asynchronous=True)
+    finished = []
+
+    async def handler():
+        await asyncio.sleep(10)
+        finished.append(True)
+
+    event += handler
+    event()
+    await event.drain(timeout=0.01)
+
+    assert event.pending == 0
+    assert finished == []
@@ -0,0 +1,102 @@
+import pytest
+
+from xbox.sg import packer
+from xbox.sg.console import Console
+from xbox.sg.enum import PacketType
+from xbox.sg.fleet import Fleet
+from xbox.sg.protocol import SmartglassProtocol, BROADCAST
+
+
+@pytest.fixture
+def fleet_console(discovery_response_factory):
+    """
+    Console class with its own registry and a fake global protocol,
+    consoles respond to discovery once they were powered on.
+    """
+    consoles = {
+        'FD0000000023': '10.0.0.23',
+        'FD0000000024': '10.0.0.24'
+    }
+    protocol = SmartglassProtocol()
+    powered_on = set()
+    sent = []
+
+    async def _send(data, target):
+        host, _ = target
+        sent.append(host)
+        msg = packer.unpack(data)
+        if msg.header.pkt_type == PacketType.PowerOnRequest:
+            powered_on.add(msg.unprotected_payload.liveid)
+            return
+
+        for liveid in powered_on:
+            address = consoles[liveid]
+            if host in (address, BROADCAST):
+                protocol.datagram_received(
+                    discovery_response_factory(liveid), (address, 5050)
+                )
+
+    protocol._send = _send
+
+    class FleetConsole(Console):
+        __protocol__ = protocol
+        __registry__ = None
+
+    FleetConsole.powered_on = powered_on
+    FleetConsole.sent = sent
+    return FleetConsole
+
+
+@pytest.mark.asyncio
+async def test_power_on(fleet_console, discovery_response_factory):
+    registry = fleet_console.get_registry()
+    known = registry.update(
+        '10.0.0.23', packer.unpack(discovery_response_factory('FD0000000023'))
+    )
+    fleet = Fleet(['FD0000000023', '10.0.0.24', 'FD0000000023'],
+                  console_cls=fleet_console)
+
+    results = await fleet.power_on(tries=1)
+
+    assert [r.target for r in results] == ['FD0000000023', '10.0.0.24']
+    assert results[0].success is True
+    assert results[0].address == known.address
+    # Unknown address, Live ID can't be resolved
+    assert results[1].success is False
+    assert results[1].error == 'Unknown Live ID'
+    assert fleet_console.powered_on == {'FD0000000023'}
+    assert '10.0.0.23' in fleet_console.sent
+
+
+@pytest.mark.asyncio
+async def test_power_on_verify(fleet_console, discovery_response_factory):
+    registry = fleet_console.get_registry()
+    for liveid, address in (('FD0000000023', '10.0.0.23'),
+                            ('FD0000000024', '10.0.0.24')):
+        registry.update(
+            address, packer.unpack(discovery_response_factory(liveid))
+        )
+
+    fleet = Fleet(['FD0000000023', 'FD0000000024'], concurrency=1,
+                  console_cls=fleet_console)
+    results = await fleet.power_on(tries=1, verify=True, timeout=2)
+
+    assert all(r.success for r in results)
+    assert [r.address for r in results] == ['10.0.0.23', '10.0.0.24']
+
+    results = await Fleet(['FD0000000042', '10.0.0.23'],
+                          console_cls=fleet_console).verify(timeout=1)
+    assert results[0].success is False
+    assert results[0].error == 'No response'
+    assert results[1].success is True
+    assert results[1].liveid == 'FD0000000023'
+
+
+@pytest.mark.asyncio
+async def test_power_off_unknown(fleet_console):
+    results = await Fleet(['FD0000000042'],
+                          console_cls=fleet_console).power_off()
+
+    assert len(results) == 1
+    assert results[0].success is False
+    assert results[0].error == 'Console unknown, discover it first'
@@ -0,0 +1,66 @@
+import asyncio
+import pytest
+
+from xbox.sg.enum import GamePadButton, MessageType, ServiceChannel
+from xbox.sg.gamepad import GamepadSession, GamepadState, button_bits
+
+
+class FakeConsole(object):
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, msg, channel):
+        assert msg.header.flags.msg_type == MessageType.Gamepad
+        assert channel == ServiceChannel.SystemInput
+        self.sent.append(dict(msg.protected_payload.container))
+
+
+def test_button_bits():
+    assert button_bits(GamePadButton.PadA) == 0x10
+    assert button_bits(0x30) == 0x30
+
+
+@pytest.mark.asyncio
+async def test_gamepad_coalescing():
+    console = FakeConsole()
+    pad = GamepadSession(console)
+
+    assert await pad.flush() is True
+    # Unchanged state is not sent again
+    assert await pad.flush() is False
+
+    pad.press(GamePadButton.PadA)
+    pad.press(GamePadButton.PadB)
+    pad.update(l_thumb_x=0.25)
+    pad.update(l_thumb_x=0.5)
+    assert await pad.flush() is True
+
+    assert len(console.sent) == 2
+    assert console.sent[-1]['buttons'] == 0x30
+    assert console.sent[-1]['left_thumbstick_x'] == 0.5
+    assert pad.last_sent == GamepadState(buttons=0x30, l_thumb_x=0.5)
+
+    pad.release(GamePadButton.PadA)
+    assert pad.state.buttons == 0x20
+
+
+@pytest.mark.asyncio
+async def test_gamepad_session_tick():
+    console = FakeConsole()
+    frames = []
+    async with GamepadSession(console, rate=100) as pad:
+        pad.on_frame += lambda ts, state: frames.append(state)
+        for i in range(20):
+            pad.update(l_trigger=i / 20)
+        await asyncio.sleep(0.05)
+        pad.press(GamePadButton.Menu)
+        await asyncio.sleep(0.05)
+
+    # Intermediate states were coalesced, reset is sent on exit
+    assert [f.l_trigger for f in frames] == [0.95, 0.95, 0.0]
+    assert frames[1].buttons == GamePadButton.Menu.value
+    assert console.sent[-1]['buttons'] == 0
+    assert pad.running is False
+
+    with pytest.raises(ValueError):
+        GamepadSession(console, rate=0)
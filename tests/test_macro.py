@@ -0,0 +1,146 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+
+from xbox.sg.enum import AckStatus, MediaControlCommand, MessageType, \
+    ServiceChannel
+from xbox.sg.macro import Macro, MacroPlayer, MacroStep, MacroError
+from xbox.sg.manager import MediaManager, TextManager
+
+MACRO = '''
+# Navigate and start playback
+0      press   PadA
+0.02   release PadA
++0.02  tap     DPadDown+PadB 0.01
++0.02  axis    l_thumb_x=0.5 r_trigger=1
++0.01  clear
+0.1    media   PlayPauseToggle
++0.01  seek    600000000
+'''
+
+
+class FakeConsole(object):
+    def __init__(self):
+        self.managers = {}
+        self.sent = []
+
+    async def send_message(self, msg, channel, blocking=True):
+        assert blocking is False
+        self.sent.append((channel, msg.header.flags.msg_type,
+                          dict(msg.protected_payload.container)))
+
+
+def test_macro_parse():
+    macro = Macro.parse(MACRO)
+
+    assert len(macro) == 8
+    assert macro.steps[2] == MacroStep(0.04, 'press', ('DPadDown+PadB',))
+    assert macro.steps[3] == MacroStep(0.05, 'release', ('DPadDown+PadB',))
+    assert macro.duration == 0.11
+
+    assert Macro.parse(macro.dumps()).steps == macro.steps
+    assert Macro.parse('0 text  hello world').steps[0].args == ('hello world',)
+
+    with pytest.raises(MacroError):
+        Macro.parse('0 jump')
+    with pytest.raises(MacroError):
+        Macro.parse('soon press PadA')
+
+
+@pytest.mark.asyncio
+async def test_macro_player():
+    console = FakeConsole()
+    player = MacroPlayer(console, Macro.parse(MACRO), title_id=0x1234)
+    timings = await player.run()
+
+    assert [t.step.action for t in timings] == \
+        ['press', 'release', 'press', 'release', 'axis', 'clear', 'media',
+         'seek']
+    assert all(t.error is None for t in timings)
+    assert all(t.deviation >= 0 for t in timings)
+    # Scheduled against start, errors don't accumulate
+    assert timings[-1].deviation < 0.05
+
+    gamepad = [p for c, t, p in console.sent if t == MessageType.Gamepad]
+    assert [p['buttons'] for p in gamepad] == \
+        [0x10, 0, 0x220, 0, 0, 0]
+    assert gamepad[4]['left_thumbstick_x'] == 0.5
+    assert gamepad[4]['right_trigger'] == 1
+
+    channel, msg_type, payload = console.sent[-1]
+    assert channel == ServiceChannel.SystemMedia
+    assert payload['command'] == MediaControlCommand.Seek
+    assert payload['seek_position'] == 600000000
+    assert payload['title_id'] == 0x1234
+    assert console.sent[-2][2]['request_id'] == 1
+
+
+def test_macro_player_invalid():
+    player = MacroPlayer(FakeConsole(), Macro.parse('0 press Turbo'))
+    with pytest.raises(MacroError):
+        player.prepare()
+
+    # Media commands need a title
+    player = MacroPlayer(FakeConsole(), Macro.parse('0 media Play'))
+    with pytest.raises(MacroError):
+        player.prepare()
+
+
+def test_macro_player_shares_media_request_ids():
+    class MediaConsole(FakeConsole):
+        def subscribe(self, handler, channel, msg_type=None):
+            pass
+
+        subscribe_json = subscribe
+
+    console = MediaConsole()
+    media = MediaManager(console)
+    console.managers['media'] = console.media = media
+
+    media.next_media_request_id()
+    player = MacroPlayer(console, Macro.parse(MACRO), title_id=0x1234)
+    player.prepare()
+    request_ids = [msg.protected_payload.request_id
+                   for step, msg in player._prepared if step.action in ('media', 'seek')]
+    assert request_ids == [2, 3]
+    assert media.next_media_request_id() == 4
+
+
+@pytest.mark.asyncio
+async def test_macro_player_text_in_order():
+    class TextConsole(object):
+        def __init__(self):
+            self.managers = {}
+            self.sent = []
+
+        def subscribe(self, handler, channel, msg_type=None):
+            pass
+
+        subscribe_json = subscribe
+
+        async def send_message(self, msg, channel, blocking=True):
+            msg_type = msg.header.flags.msg_type
+            payload = msg.protected_payload
+            self.sent.append((msg_type, dict(payload.container)))
+            if msg_type == MessageType.SystemTextInput:
+                # Slow SystemTextAck
+                await asyncio.sleep(0.03)
+                self.text.current_text_version = payload.submitted_version
+            return AckStatus.Processed
+
+    console = TextConsole()
+    console.text = TextManager(console)
+    console.text.session_config = SimpleNamespace(text_session_id=7)
+
+    macro = Macro.parse('0 text abc\n0.01 text abcd\n0.02 press PadA\n0.04 done')
+    timings = await MacroPlayer(console, macro).run()
+
+    assert all(t.error is None for t in timings)
+    # Gamepad step was not held up by the text acks
+    assert timings[2].deviation < 0.02
+    texts = [p for t, p in console.sent if t == MessageType.SystemTextInput]
+    assert [(p['text_chunk'], p['submitted_version']) for p in texts] == \
+        [('abc', 1), ('abcd', 2)]
+    msg_type, done = console.sent[-1]
+    assert msg_type == MessageType.SystemTextDone
+    assert done['text_version'] == 2
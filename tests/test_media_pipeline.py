@@ -0,0 +1,131 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+
+from xbox.sg import manager
+from xbox.sg.enum import MessageType, MediaControlCommand
+from xbox.sg.manager import MediaManager, MediaManagerError
+
+
+class FakeConsole(object):
+    def __init__(self):
+        self.sent = []
+
+    def subscribe(self, handler, channel, msg_type=None):
+        pass
+
+    subscribe_json = subscribe
+
+    async def send_message(self, msg, channel, blocking=True):
+        payload = msg.protected_payload
+        self.sent.append((
+            payload.request_id, payload.title_id, payload.command,
+            payload.container.get('seek_position')
+        ))
+
+
+def command_result(media, request_id, result=0):
+    msg = SimpleNamespace(
+        header=SimpleNamespace(
+            flags=SimpleNamespace(msg_type=MessageType.MediaCommandResult)
+        ),
+        protected_payload=SimpleNamespace(request_id=request_id, result=result)
+    )
+    media._on_message(msg, None)
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_pipeline_one_in_flight():
+    console = FakeConsole()
+    media = MediaManager(console)
+
+    first = media.queue_media_command(MediaControlCommand.Play, 0x1234)
+    second = media.queue_media_command(MediaControlCommand.Pause, 0x1234)
+    other = media.queue_media_command(MediaControlCommand.Play, 0x5678)
+    await settle()
+
+    # One command per title in flight, request ids incrementing
+    assert [s[:3] for s in console.sent] == [
+        (1, 0x1234, MediaControlCommand.Play),
+        (2, 0x5678, MediaControlCommand.Play)
+    ]
+
+    command_result(media, 1)
+    assert await first == 0
+    await settle()
+    assert console.sent[-1][:3] == (3, 0x1234, MediaControlCommand.Pause)
+
+    command_result(media, 3, 5)
+    command_result(media, 2)
+    assert await second == 5
+    assert await other == 0
+    await settle()
+    assert not media._command_workers
+    assert not media._command_results
+
+
+@pytest.mark.asyncio
+async def test_pipeline_coalesce_seek():
+    console = FakeConsole()
+    media = MediaManager(console)
+
+    seeks = []
+    for pos in range(100, 600, 100):
+        seeks.append(media.queue_media_command(MediaControlCommand.Seek, 1, pos))
+        await settle()
+    # First seek went out, the rest got merged into one
+    assert console.sent == [(1, 1, MediaControlCommand.Seek, 100)]
+
+    command_result(media, 1)
+    await settle()
+    assert console.sent[-1] == (2, 1, MediaControlCommand.Seek, 500)
+    assert len(console.sent) == 2
+
+    command_result(media, 2, 1)
+    assert await asyncio.gather(*seeks) == [0, 1, 1, 1, 1]
+
+
+@pytest.mark.asyncio
+async def test_pipeline_timeout(monkeypatch):
+    monkeypatch.setattr(manager, 'MEDIA_COMMAND_TIMEOUT', 0.01)
+    console = FakeConsole()
+    media = MediaManager(console)
+
+    with pytest.raises(MediaManagerError):
+        await media.send_media_command(MediaControlCommand.Play, 1)
+
+    # Late result is ignored, pipeline continues
+    command_result(media, 1)
+    future = media.queue_media_command(MediaControlCommand.Pause, 1)
+    await settle()
+    command_result(media, 2)
+    assert await future == 0
+
+
+@pytest.mark.asyncio
+async def test_pipeline_worker_cancelled():
+    console = FakeConsole()
+    media = MediaManager(console)
+
+    first = media.queue_media_command(MediaControlCommand.Play, 0x1234)
+    second = media.queue_media_command(MediaControlCommand.Pause, 0x1234)
+    await settle()
+
+    media._command_workers[0x1234].cancel()
+    await settle()
+    for future in (first, second):
+        with pytest.raises(MediaManagerError):
+            await future
+    assert not media._command_workers
+    assert not media._command_queues
+
+    # A new worker gets started for later commands
+    third = media.queue_media_command(MediaControlCommand.Play, 0x1234)
+    await settle()
+    command_result(media, console.sent[-1][0])
+    assert await third == 0
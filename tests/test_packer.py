@@ -425,3 +425,22 @@ def test_repack_all(packets, crypto):
         assert repacked == packets[f], \
             '%s was not repacked correctly:\n(repacked)%s\n!=\n(original)%s'\
             % (f, hexlify(repacked), hexlify(packets[f]))
+
+
+def test_unpack_memoized(packets, crypto):
+    memo = packer.DecodeMemo()
+    for name in ('console_status', 'media_state', 'gamepad',
+                 'fragment_media_state_0'):
+        expected = packer.unpack(packets[name], crypto)
+        msg = packer.unpack(packets[name], crypto, memo)
+        assert msg.container == expected.container
+
+    assert memo.misses == 2
+    status = packer.unpack(packets['console_status'], crypto, memo)
+    again = packer.unpack(packets['console_status'], crypto, memo)
+    assert again.protected_payload is status.protected_payload
+    assert memo.hits == 2
+
+    memo.clear()
+    again = packer.unpack(packets['console_status'], crypto, memo)
+    assert again.protected_payload is not status.protected_payload
@@ -1,4 +1,7 @@
+import asyncio
 import pytest
+from xbox.sg.protocol import SmartglassProtocol, BROADCAST, _iter_hosts
+from xbox.sg import packer
 from xbox.sg.protocol import _fragment_connect_request, FragmentError
 from xbox.sg.protocol import ChannelManager, ChannelError
 from xbox.sg.protocol import SequenceManager
@@ -284,3 +287,116 @@ def test_fragment_manager_fragment_messages(packets, crypto):
     assert msg.aum_id == 'Microsoft.BlurayPlayer_8wekyb3d8bbwe!Xbox.BlurayPlayer.Application'
     assert msg.max_seek == 50460000
     assert len(msg.asset_id) == 2184
+
+
+def _discovery_protocol(responses):
+    protocol = SmartglassProtocol()
+    sent = []
+
+    async def _send(data, target):
+        host, _ = target
+        sent.append(host)
+        for responder, response in responses.items():
+            if host in (responder, BROADCAST):
+                protocol.datagram_received(response, (responder, 5050))
+
+    protocol._send = _send
+    protocol.sent = sent
+    return protocol
+
+
+@pytest.fixture
+def two_consoles(discovery_response_factory):
+    return {
+        '10.0.0.23': discovery_response_factory('FD0000000023'),
+        '10.0.0.24': discovery_response_factory('FD0000000024')
+    }
+
+
+@pytest.mark.asyncio
+async def test_discover_iter(two_consoles):
+    protocol = _discovery_protocol(two_consoles)
+
+    found = [host async for host, _ in protocol.discover_iter(tries=2)]
+
+    assert found == ['10.0.0.23', '10.0.0.24']
+    assert protocol.on_discover.handlers == []
+
+
+@pytest.mark.asyncio
+async def test_discover_iter_early_exit(two_consoles):
+    loop = asyncio.get_running_loop()
+    protocol = _discovery_protocol(two_consoles)
+
+    start = loop.time()
+    found = [host async for host, _ in protocol.discover_iter(max_consoles=1)]
+    assert found == ['10.0.0.23']
+
+    found = [host async for host, _ in protocol.discover_iter(until_addr='10.0.0.24')]
+    assert found == ['10.0.0.23', '10.0.0.24']
+
+    found = [host async for host, _ in protocol.discover_iter(until_liveid='FD0000000023')]
+    assert found == ['10.0.0.23']
+
+    assert loop.time() - start < 0.5
+
+
+@pytest.mark.asyncio
+async def test_discover_quiet_period(two_consoles):
+    loop = asyncio.get_running_loop()
+    protocol = _discovery_protocol(two_consoles)
+
+    start = loop.time()
+    discovered = await protocol.discover(tries=10, quiet_period=0.1)
+
+    assert list(discovered.keys()) == ['10.0.0.23', '10.0.0.24']
+    assert loop.time() - start < 1.0
+
+
+@pytest.mark.asyncio
+async def test_discover_sweep(packets, discovery_response_factory):
+    protocol = _discovery_protocol({
+        '10.0.1.5': discovery_response_factory('FD0000000105'),
+        # Same console, reachable via two addresses
+        '10.0.2.5': packets['discovery_response'],
+        '10.0.2.6': packets['discovery_response']
+    })
+
+    discovered = await protocol.discover(
+        networks=['10.0.1.0/24', '10.0.2.4/30'],
+        tries=1, rate=10000, concurrency=128
+    )
+
+    assert list(discovered.keys()) == ['10.0.1.5', '10.0.2.5']
+    assert BROADCAST not in protocol.sent
+    assert len(protocol.sent) == 254 + 2
+
+
+def test_iter_hosts():
+    hosts = list(_iter_hosts(['192.168.0.0/30', '10.0.0.1', '10.1.0.0/22']))
+
+    assert hosts[:3] == ['192.168.0.1', '192.168.0.2', '10.0.0.1']
+    assert len(hosts) == 2 + 1 + 1022
+
+
+def test_discovery_response_not_reparsed(monkeypatch, two_consoles):
+    protocol = SmartglassProtocol()
+    unpack = packer.unpack
+    calls = []
+
+    def _unpack(*args, **kwargs):
+        calls.append(args[0])
+        return unpack(*args, **kwargs)
+
+    monkeypatch.setattr(packer, 'unpack', _unpack)
+    discovered = []
+    protocol.on_discover += lambda host, msg: discovered.append((host, msg))
+
+    for _ in range(5):
+        for host, data in two_consoles.items():
+            protocol.datagram_received(data, (host, 5050))
+
+    assert len(calls) == 2
+    assert len(discovered) == 10
+    assert discovered[0][1] is discovered[2][1]
+    assert set(protocol._discovered.keys()) == {'10.0.0.23', '10.0.0.24'}
@@ -0,0 +1,192 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+
+from xbox.sg import factory
+from xbox.sg.enum import AckStatus, GamePadButton, MediaControlCommand, \
+    MessageType, ServiceChannel
+from xbox.sg.gamepad import GamepadState
+from xbox.sg.manager import TextManager
+from xbox.sg.recording import Recording, InputRecorder, RecordingPlayer, \
+    RecordingError
+from xbox.sg.utils.events import Event
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeConsole(object):
+    def __init__(self):
+        self.on_send = Event()
+        self.sent = []
+
+    async def send_message(self, msg, channel, blocking=True):
+        self.on_send(msg, channel)
+        self.sent.append(dict(msg.protected_payload.container))
+
+
+def _recording():
+    recording = Recording()
+    recording.append(0.0, GamepadState(buttons=0x10, l_thumb_x=0.05))
+    recording.append(0.5, GamepadState(l_thumb_x=0.55, r_thumb_y=-1.0))
+    recording.add_event(0.25, 'text', text='hello')
+    return recording
+
+
+def test_recorder():
+    console = FakeConsole()
+    clock = FakeClock()
+    recorder = InputRecorder(console, clock)
+    recorder.start()
+
+    clock.now = 1.0
+    console.on_send(factory.gamepad(0, GamePadButton.PadA, 0, 0, 0.5, 0, 0, 0),
+                    ServiceChannel.SystemInput)
+    clock.now = 1.5
+    console.on_send(factory.media_command(
+        1, 0x1234, MediaControlCommand.Seek, 100
+    ), ServiceChannel.SystemMedia)
+
+    recording = recorder.stop()
+    assert recording.timestamps.tolist() == [1.0]
+    assert recording.frame(0) == GamepadState(buttons=0x10, l_thumb_x=0.5)
+    assert recording.events == [(1.5, 'media', dict(
+        title_id=0x1234, command=MediaControlCommand.Seek.value,
+        seek_position=100
+    ))]
+    assert recording.duration == 1.5
+
+    # Not recording anymore
+    console.on_send(factory.gamepad(0, 0, 0, 0, 0, 0, 0, 0),
+                    ServiceChannel.SystemInput)
+    assert len(recording) == 1
+
+
+def test_recording_save_load(tmpdir):
+    filepath = str(tmpdir.join('session.xsgrec'))
+    recording = _recording()
+    recording.save(filepath)
+
+    loaded = Recording.load(filepath)
+    assert loaded.timestamps == recording.timestamps
+    assert loaded.buttons == recording.buttons
+    assert loaded.axes == recording.axes
+    assert loaded.events == [(0.25, 'text', {'text': 'hello'})]
+
+    with open(filepath, 'r+b') as fh:
+        fh.write(b'NOPE')
+    with pytest.raises(RecordingError):
+        Recording.load(filepath)
+
+
+def test_recording_transforms():
+    recording = _recording()
+
+    resampled = recording.resample(10)
+    assert len(resampled) == 6
+    assert resampled.buttons.tolist() == [0x10] * 5 + [0]
+
+    deadzone = recording.deadzone(0.1)
+    assert deadzone.axes['l_thumb_x'].tolist() == [0.0, pytest.approx(0.5)]
+    assert deadzone.axes['r_thumb_y'].tolist() == [0.0, -1.0]
+    # Source is unchanged
+    assert recording.axes['l_thumb_x'][0] == pytest.approx(0.05)
+
+    curved = recording.curve(2)
+    assert curved.axes['r_thumb_y'].tolist() == [0.0, -1.0]
+    assert curved.axes['l_thumb_x'][1] == pytest.approx(0.3025)
+
+
+@pytest.mark.asyncio
+async def test_recording_player():
+    console = FakeConsole()
+    recording = _recording()
+    recording.events.clear()
+
+    player = RecordingPlayer(console, recording, speed=10)
+    await player.run()
+
+    assert [p['buttons'] for p in console.sent] == [0x10, 0, 0]
+    assert console.sent[1]['right_thumbstick_y'] == -1.0
+    assert player.max_lateness < 0.05
+
+
+@pytest.mark.asyncio
+async def test_recording_player_events():
+    class EventConsole(FakeConsole):
+        def __init__(self):
+            super().__init__()
+            self.managers = {}
+            self.ack = asyncio.get_running_loop().create_future()
+            self.text = SimpleNamespace(send_systemtext_input=self.send_text)
+
+        async def send_text(self, text):
+            self.sent.append({'text': text})
+            await self.ack
+
+    console = EventConsole()
+    recording = _recording()
+    recording.add_event(0.3, 'media', title_id=0x1234,
+                        command=MediaControlCommand.Play.value)
+
+    player = RecordingPlayer(console, recording, speed=10)
+    task = asyncio.create_task(player.run())
+    await asyncio.sleep(0.1)
+
+    # Unacked text doesn't hold up following frames
+    assert [p.get('text', p.get('command')) for p in console.sent[1:3]] == \
+        ['hello', MediaControlCommand.Play]
+    assert console.sent[3]['right_thumbstick_y'] == -1.0
+    assert player.max_lateness < 0.05
+    assert not task.done()
+
+    console.ack.set_result(None)
+    await task
+
+
+@pytest.mark.asyncio
+async def test_recording_player_text_in_order():
+    class TextConsole(FakeConsole):
+        def __init__(self):
+            super().__init__()
+            self.managers = {}
+
+        def subscribe(self, handler, channel, msg_type=None):
+            pass
+
+        subscribe_json = subscribe
+
+        async def send_message(self, msg, channel, blocking=True):
+            await super().send_message(msg, channel, blocking)
+            payload = msg.protected_payload
+            if msg.header.flags.msg_type == MessageType.SystemTextInput:
+                # Slow SystemTextAck
+                await asyncio.sleep(0.03)
+                self.text.current_text_version = payload.submitted_version
+            return AckStatus.Processed
+
+    console = TextConsole()
+    console.text = TextManager(console)
+    console.text.session_config = SimpleNamespace(text_session_id=7)
+
+    recording = Recording()
+    recording.append(0.0, GamepadState())
+    recording.append(0.02, GamepadState(buttons=0x10))
+    recording.add_event(0.0, 'text', text='a')
+    recording.add_event(0.01, 'text', text='ab')
+
+    player = RecordingPlayer(console, recording)
+    await player.run()
+
+    texts = [p for p in console.sent if 'text_chunk' in p]
+    assert [(p['text_chunk'], p['submitted_version']) for p in texts] == \
+        [('a', 1), ('ab', 2)]
+    # Gamepad frame went out before the text acks
+    assert console.sent.index(texts[1]) > \
+        [p.get('buttons') for p in console.sent].index(0x10)
+    assert player.max_lateness < 0.02
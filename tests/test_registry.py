@@ -0,0 +1,144 @@
+import pytest
+
+from xbox.sg import packer, enum
+from xbox.sg.console import Console
+from xbox.sg.registry import ConsoleRegistry
+from xbox.sg.utils.events import Event
+
+
+@pytest.fixture
+def registry():
+    return ConsoleRegistry(Console, ttl=60)
+
+
+@pytest.fixture
+def discovery_message(discovery_response_factory):
+    def _message(liveid):
+        return packer.unpack(discovery_response_factory(liveid))
+    return _message
+
+
+def test_update_adds_console(registry, discovery_message):
+    added = []
+    registry.on_added += added.append
+
+    console = registry.update('10.0.0.23', discovery_message('FD0000000023'))
+
+    assert added == [console]
+    assert len(registry) == 1
+    assert 'FD0000000023' in registry
+    assert registry.get('FD0000000023') is console
+    assert registry.by_address('10.0.0.23') == [console]
+    assert console.device_status == enum.DeviceStatus.Available
+    assert console.last_seen is not None
+
+
+def test_update_in_place(registry, discovery_message):
+    msg = discovery_message('FD0000000023')
+    updated = []
+    registry.on_updated += updated.append
+
+    console = registry.update('10.0.0.23', msg)
+    last_seen = console.last_seen
+    assert registry.update('10.0.0.23', msg) is console
+    assert console.last_seen >= last_seen
+    # Nothing changed
+    assert updated == []
+
+    console.device_status = enum.DeviceStatus.Unavailable
+    assert registry.update('10.0.0.42', msg) is console
+    assert console.address == '10.0.0.42'
+    assert console.device_status == enum.DeviceStatus.Available
+    assert updated == [console]
+    assert len(registry) == 1
+
+
+def test_add_existing(registry, discovery_message, console):
+    msg = discovery_message(console.liveid)
+
+    assert registry.add(console) is console
+    assert console.last_seen is not None
+    assert registry.update('10.0.0.23', msg) is console
+    # Public key is taken from the discovery response
+    assert console.public_key is msg.unprotected_payload.cert.pubkey
+
+
+def test_mark_unavailable_and_expire(registry, discovery_message):
+    removed = []
+    registry.on_removed += removed.append
+
+    first = registry.update('10.0.0.23', discovery_message('FD0000000023'))
+    second = registry.update('10.0.0.24', discovery_message('FD0000000024'))
+    first.last_seen -= 30
+
+    assert registry.mark_unavailable(second.last_seen - 10) == [first]
+    assert first.device_status == enum.DeviceStatus.Unavailable
+    assert 'FD0000000023' in registry
+
+    second.last_seen -= 90
+    assert registry.expire() == [second]
+    assert removed == [second]
+    assert second.device_status == enum.DeviceStatus.Unavailable
+    assert list(registry) == [first]
+
+    assert registry.remove('FD0000000023') is first
+    assert len(registry) == 0
+
+
+def test_save_load(tmpdir, registry, discovery_message):
+    filepath = str(tmpdir.join('consoles.json'))
+    msg = discovery_message('FD0000000023')
+    console = registry.update('10.0.0.23', msg)
+
+    registry.save(filepath)
+
+    other = ConsoleRegistry(Console)
+    other.save(filepath, [])
+    loaded = other.load(filepath)
+
+    assert len(loaded) == 1
+    assert loaded[0].liveid == console.liveid
+    assert loaded[0].address == console.address
+    assert loaded[0].flags == console.flags
+    assert loaded[0].last_seen == console.last_seen
+    assert loaded[0].device_status == enum.DeviceStatus.Unavailable
+    assert loaded[0].to_dict() == console.to_dict()
+
+    # Loaded console is updated in place once it responds
+    assert other.update('10.0.0.23', msg) is loaded[0]
+    assert loaded[0].device_status == enum.DeviceStatus.Available
+
+
+def test_load_missing(tmpdir, registry):
+    assert registry.load(str(tmpdir.join('missing.json'))) == []
+
+
+@pytest.mark.asyncio
+async def test_discover_updates_registry_once(discovery_message):
+    msg = discovery_message('FD0000000023')
+
+    class DiscoverProtocol(object):
+        def __init__(self):
+            self.on_discover = Event()
+            self.discovered = {}
+
+        async def discover(self, *args, **kwargs):
+            self.discovered['10.0.0.23'] = msg
+            self.on_discover('10.0.0.23', msg)
+            return dict(self.discovered)
+
+    class DiscoverConsole(Console):
+        __protocol__ = DiscoverProtocol()
+        __registry__ = None
+
+    registry = DiscoverConsole.get_registry()
+    updates = []
+    update = registry.update
+    registry.update = lambda a, m: updates.append(a) or update(a, m)
+    DiscoverConsole.__protocol__.on_discover += registry.update
+
+    consoles = await DiscoverConsole.discover()
+    assert consoles == [registry.get('FD0000000023')]
+    assert updates == ['10.0.0.23']
+    assert DiscoverConsole.discovered() == consoles
+    assert updates == ['10.0.0.23']
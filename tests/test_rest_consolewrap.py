@@ -1,7 +1,13 @@
+import time
+import asyncio
 import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
 
+from xbox.rest import singletons
 from xbox.rest.consolewrap import ConsoleWrap
-from xbox.sg import enum
+from xbox.rest.routes import device
+from xbox.sg import enum, manager
 
 
 def test_consolewrap_init(console):
@@ -198,3 +204,74 @@ async def test_connect(console):
     # blocks forever
     # state = ConsoleWrap(console).connect()
     # assert state == enum.ConnectionState.Disconnected
+
+
+def test_device_overview_expiry(console, monkeypatch):
+    async def discover(*args, **kwargs):
+        return []
+
+    monkeypatch.setattr(ConsoleWrap, 'discover', discover)
+    monkeypatch.setattr(singletons, 'console_cache', {})
+    registry = ConsoleWrap.get_registry()
+    registry.clear()
+    registry.add(console)
+
+    app = FastAPI()
+    app.include_router(device.router, prefix='/device')
+    client = TestClient(app)
+
+    try:
+        console.last_seen = time.time()
+        response = client.get('/device/')
+        assert [c['liveid'] for c in response.json()] == [console.liveid]
+
+        # Expired from the overview, wrapper stays addressable
+        console.last_seen = time.time() - registry.ttl - 1
+        response = client.get('/device/')
+        assert response.json() == []
+        assert console.liveid not in registry
+        assert singletons.console_cache[console.liveid].console is console
+    finally:
+        registry.clear()
+
+
+@pytest.mark.asyncio
+async def test_send_media_command(console, monkeypatch):
+    sent = []
+
+    async def media_command(title_id, command, request_id=0, seek_position=None):
+        sent.append((title_id, command))
+
+    monkeypatch.setattr(console.media, 'media_command', media_command)
+    monkeypatch.setattr(manager, 'MEDIA_COMMAND_TIMEOUT', 0.01)
+    wrap = ConsoleWrap(console)
+
+    # Fire and forget, no waiting for the MediaCommandResult
+    assert await wrap.send_media_command(enum.MediaControlCommand.Play) is True
+    await asyncio.sleep(0.05)
+    assert sent == [(0, enum.MediaControlCommand.Play)]
+
+    assert await wrap.send_media_command(enum.MediaControlCommand.Pause, wait=True) is False
+
+
+@pytest.mark.asyncio
+async def test_console_status_handler_once(console, console_status):
+    received = []
+
+    def on_status(wrap, status):
+        received.append((wrap, status))
+
+    ConsoleWrap.on_console_status += on_status
+    try:
+        handlers = len(console.on_console_status.handlers)
+        ConsoleWrap(console)
+        ConsoleWrap(console)
+        wrap = ConsoleWrap(console)
+        assert len(console.on_console_status.handlers) <= handlers + 1
+
+        # Forwarded once, with the latest wrapper
+        console.on_console_status(console_status)
+        await ConsoleWrap.on_console_status.drain()
+        assert received == [(wrap, console_status)]
+    finally:
+        ConsoleWrap.on_console_status -= on_status
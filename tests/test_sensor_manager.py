@@ -0,0 +1,101 @@
+import asyncio
+import pytest
+
+from xbox.sg import packer
+from xbox.sg.enum import MessageType, ServiceChannel, TouchAction
+from xbox.sg.manager import SensorManager, SensorManagerError
+
+
+class FakeConsole(object):
+    def __init__(self, crypto):
+        self.crypto = crypto
+        self.sent = []
+
+    def subscribe(self, handler, channel, msg_type=None):
+        pass
+
+    subscribe_json = subscribe
+
+    async def send_message(self, msg, channel, blocking=True):
+        assert blocking is False
+        # Prebuilt messages need to stay packable
+        packer.pack(msg, self.crypto)
+        self.sent.append((
+            channel, msg.header.flags.msg_type,
+            dict(msg.protected_payload.container)
+        ))
+
+
+@pytest.mark.asyncio
+async def test_sensor_coalescing(crypto):
+    console = FakeConsole(crypto)
+    sensor = SensorManager(console)
+
+    sensor.set_accelerometer(0.1, 0.2, 0.3)
+    sensor.set_accelerometer(1.0, 2.0, 3.0)
+    sensor.set_compass(90.0, 92.5)
+    assert await sensor.flush_sensors() == 2
+    assert sensor.samples_dropped == 1
+
+    channel, msg_type, payload = console.sent[0]
+    assert channel == ServiceChannel.Title
+    assert msg_type == MessageType.Accelerometer
+    assert payload['acceleration_z'] == 3.0
+    assert console.sent[1][2]['true_north'] == 92.5
+
+    # Nothing pending
+    assert await sensor.flush_sensors() == 0
+
+    # Stale samples are dropped
+    sensor.set_gyrometer(1, 1, 1)
+    sensor._samples[MessageType.Gyrometer] = (0, (1, 1, 1))
+    assert await sensor.flush_sensors() == 0
+
+
+@pytest.mark.asyncio
+async def test_touch_batching(crypto):
+    console = FakeConsole(crypto)
+    sensor = SensorManager(console)
+
+    sensor.touch(1, TouchAction.Down, 10, 10)
+    sensor.touch(1, TouchAction.Move, 11, 11)
+    sensor.touch(1, TouchAction.Move, 12, 12)
+    sensor.touch(2, TouchAction.Down, 50, 50)
+    sensor.touch(1, TouchAction.Move, 13, 13)
+    sensor.touch(1, TouchAction.Up, 13, 13)
+    sensor.touch(1, TouchAction.Down, 5, 5, system=True)
+    assert await sensor.flush_sensors() == 2
+
+    channel, msg_type, payload = console.sent[0]
+    assert msg_type == MessageType.TitleTouch
+    points = [(p.touchpoint_id, p.touchpoint_action, p.touchpoint_x)
+              for p in payload['touchpoints']]
+    assert points == [
+        (1, TouchAction.Down, 10),
+        (1, TouchAction.Move, 13),
+        (2, TouchAction.Down, 50),
+        (1, TouchAction.Up, 13)
+    ]
+    assert console.sent[1][:2] == \
+        (ServiceChannel.SystemInput, MessageType.SystemTouch)
+
+
+@pytest.mark.asyncio
+async def test_sensor_stream(crypto):
+    console = FakeConsole(crypto)
+    sensor = SensorManager(console, rate=100)
+    sensor.start_sensor_stream()
+
+    for i in range(5):
+        sensor.set_inclinometer(i, 0, 0)
+        await asyncio.sleep(0.02)
+    sensor.touch(1, TouchAction.Up, 0, 0)
+    await sensor.stop_sensor_stream()
+
+    pitches = [p['pitch'] for c, t, p in console.sent
+               if t == MessageType.Inclinometer]
+    assert pitches == [0, 1, 2, 3, 4]
+    assert console.sent[-1][1] == MessageType.TitleTouch
+
+    with pytest.raises(SensorManagerError):
+        SensorManager(console, rate=0)
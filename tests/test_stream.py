@@ -0,0 +1,88 @@
+import asyncio
+import pytest
+
+from xbox.sg.enum import ServiceChannel, MessageType
+from xbox.sg.utils.stream import MessageStream, StreamHub, OverflowPolicy, \
+    StreamOverflowError
+
+
+async def _collect(stream):
+    return [item async for item in stream]
+
+
+@pytest.mark.asyncio
+async def test_stream_wakeup():
+    stream = MessageStream()
+    consumer = asyncio.ensure_future(_collect(stream))
+    await asyncio.sleep(0)
+
+    stream.put(1)
+    stream.put(2)
+    await asyncio.sleep(0)
+    stream.close()
+    # Items after close are ignored
+    stream.put(3)
+
+    assert await consumer == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_stream_overflow():
+    oldest = MessageStream(maxsize=2)
+    newest = MessageStream(maxsize=2, overflow=OverflowPolicy.DropNewest)
+    error = MessageStream(maxsize=2, overflow=OverflowPolicy.Raise)
+    for stream in (oldest, newest, error):
+        for i in range(4):
+            stream.put(i)
+
+    oldest.close()
+    newest.close()
+    assert await _collect(oldest) == [2, 3]
+    assert await _collect(newest) == [0, 1]
+    assert oldest.dropped == newest.dropped == 2
+
+    assert error.closed is True
+    with pytest.raises(StreamOverflowError):
+        await _collect(error)
+
+
+@pytest.mark.asyncio
+async def test_hub_replay():
+    hub = StreamHub(history=2)
+    hub.publish('a')
+    hub.publish('b', 'c')
+    hub.publish('d')
+
+    async with hub.stream(replay=5) as stream:
+        assert len(hub) == 1
+        hub.publish('e')
+        assert [await stream.__anext__() for _ in range(3)] == \
+            [('b', 'c'), 'd', 'e']
+    assert len(hub) == 0
+
+
+@pytest.mark.asyncio
+async def test_console_messages(console, decrypted_packets):
+    status = decrypted_packets['console_status']
+    surface = decrypted_packets['active_surface_change']
+    media_state = decrypted_packets['media_state']
+
+    console._handle_message(status, ServiceChannel.Core)
+    replayed = console.messages(
+        ServiceChannel.Core, [MessageType.ConsoleStatus], replay=1
+    )
+    everything = console.messages()
+    media_states = console.media_states()
+
+    console._handle_message(surface, ServiceChannel.Core)
+    console._handle_message(media_state, ServiceChannel.SystemMedia)
+    for stream in (replayed, everything, media_states):
+        stream.close()
+
+    assert await _collect(replayed) == [status]
+    assert await _collect(everything) == [surface, media_state]
+    assert await _collect(media_states) == [media_state.protected_payload]
+
+    # Closed streams are unsubscribed
+    assert console._message_dispatcher.handlers.get(
+        (ServiceChannel.Core, MessageType.ConsoleStatus)) is None
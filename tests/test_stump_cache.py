@@ -0,0 +1,153 @@
+import asyncio
+import pytest
+
+from xbox.stump.cache import StumpCache
+from xbox.stump.enum import Message, Notification
+from xbox.stump.manager import StumpManager, StumpException
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class FakeConsole(object):
+    def subscribe(self, handler, channel, msg_type=None):
+        pass
+
+    subscribe_json = subscribe
+
+
+@pytest.mark.asyncio
+async def test_cache_ttl():
+    clock = FakeClock()
+    cache = StumpCache({Message.CONFIGURATION: 60}, clock)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return len(calls)
+
+    assert await cache.get(Message.CONFIGURATION, None, fetch) == 1
+    assert await cache.get(Message.CONFIGURATION, None, fetch) == 1
+    assert cache.get_cached(Message.CONFIGURATION) == 1
+    clock.now = 61
+    assert cache.get_cached(Message.CONFIGURATION) is None
+    assert await cache.get(Message.CONFIGURATION, None, fetch) == 2
+    assert await cache.get(Message.CONFIGURATION, None, fetch, refresh=True) == 3
+    assert (cache.hits, cache.misses) == (1, 3)
+
+    # Not cacheable, params are part of the key
+    assert await cache.get(Message.SEND_KEY, None, fetch) == 4
+    assert await cache.get(Message.SEND_KEY, None, fetch) == 5
+    assert len(cache) == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_single_flight():
+    cache = StumpCache()
+    release = asyncio.get_running_loop().create_future()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await release
+        return 'lineups'
+
+    waiters = [
+        asyncio.create_task(cache.get(Message.TUNER_LINEUPS, None, fetch))
+        for _ in range(5)
+    ]
+    await asyncio.sleep(0)
+    # Cancelled caller doesn't abort the shared request
+    waiters[0].cancel()
+    release.set_result(None)
+    results = await asyncio.gather(*waiters[1:])
+    assert results == ['lineups'] * 4
+    assert len(calls) == 1
+
+    # Failures are not cached
+    async def fail():
+        raise TimeoutError()
+
+    cache.invalidate()
+    with pytest.raises(TimeoutError):
+        await cache.get(Message.HEADEND_INFO, None, fail)
+    assert cache.get_cached(Message.HEADEND_INFO) is None
+
+
+@pytest.mark.asyncio
+async def test_cache_invalidation():
+    stump = StumpManager(FakeConsole())
+    calls = []
+
+    async def send(name, params=None, msgid=None, timeout=3):
+        calls.append(name)
+        return len(calls)
+
+    stump._send_stump_message = send
+
+    assert await stump.request_stump_configuration() == 1
+    assert await stump.request_live_tv_info() == 2
+    assert await stump.request_stump_configuration() == 1
+
+    stump._on_notification(Notification.CHANNEL_CHANGED, None)
+    assert await stump.request_stump_configuration() == 1
+    assert await stump.request_live_tv_info() == 3
+
+    stump._on_notification('ConfigurationChanged', None)
+    assert await stump.request_stump_configuration() == 4
+
+    # Response arriving after invalidation is not stored
+    release = asyncio.get_running_loop().create_future()
+
+    async def slow_send(name, params=None, msgid=None, timeout=3):
+        await release
+        return 'stale'
+
+    stump._send_stump_message = slow_send
+    task = asyncio.create_task(stump.request_headend_info())
+    await asyncio.sleep(0)
+    stump.invalidate_stump_cache(Message.HEADEND_INFO)
+    release.set_result(None)
+    assert await task == 'stale'
+    assert stump.cache.get_cached(Message.HEADEND_INFO) is None
+
+
+@pytest.mark.asyncio
+async def test_cache_error_reply():
+    class JsonConsole(FakeConsole):
+        def __init__(self):
+            self.sent = []
+
+        async def json(self, data, channel):
+            self.sent.append(data)
+
+    console = JsonConsole()
+    stump = StumpManager(console)
+
+    task = asyncio.create_task(stump.request_stump_configuration())
+    await settle()
+    stump._on_json({'error': 'not ready', 'msgid': console.sent[0]['msgid']}, None)
+    with pytest.raises(StumpException):
+        await task
+    assert stump.cache.get_cached(Message.CONFIGURATION) is None
+
+    # Error reply was not cached, next request goes to the console
+    task = asyncio.create_task(stump.request_stump_configuration())
+    await settle()
+    assert len(console.sent) == 2
+    stump._on_json({
+        'response': Message.CONFIGURATION.value,
+        'msgid': console.sent[1]['msgid'],
+        'params': {}
+    }, None)
+    assert (await task).msgid == console.sent[1]['msgid']
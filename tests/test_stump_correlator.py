@@ -0,0 +1,117 @@
+import asyncio
+import pytest
+
+from xbox.stump.correlator import RequestCorrelator, RequestTimeoutError
+from xbox.stump.enum import Message
+from xbox.stump.manager import StumpManager, StumpException
+
+
+class FakeConsole(object):
+    def __init__(self):
+        self.sent = []
+
+    def subscribe(self, handler, channel, msg_type=None):
+        pass
+
+    subscribe_json = subscribe
+
+    async def json(self, data, channel):
+        self.sent.append(data)
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def respond(stump, request, params=True):
+    stump._on_json({
+        'response': request['request'],
+        'msgid': request['msgid'],
+        'params': params
+    }, None)
+
+
+@pytest.mark.asyncio
+async def test_correlator():
+    requests = RequestCorrelator()
+
+    future = requests.register('a.1', timeout=1)
+    assert 'a.1' in requests
+    with pytest.raises(ValueError):
+        requests.register('a.1', timeout=1)
+    assert requests.resolve('a.1', 'result')
+    assert await future == 'result'
+    assert len(requests) == 0
+
+    # Late response
+    assert not requests.resolve('a.1', 'result')
+    assert requests.late_responses == 1
+
+    # Deadline
+    future = requests.register('a.2', timeout=0.01)
+    with pytest.raises(RequestTimeoutError):
+        await future
+    assert len(requests) == 0
+
+    # Abandoned
+    future = requests.register('a.3', timeout=1)
+    future.cancel()
+    await asyncio.sleep(0)
+    assert len(requests) == 0
+    assert not requests.resolve('a.3', 'result')
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests():
+    console = FakeConsole()
+    stump = StumpManager(console)
+
+    tasks = [
+        asyncio.create_task(stump.send_stump_key(button))
+        for button in ('btn.1', 'btn.2', 'btn.3')
+    ]
+    await asyncio.sleep(0)
+    # All in flight at once
+    assert len(console.sent) == 3
+    assert len(stump._requests) == 3
+
+    # Responses out of order
+    for request in reversed(console.sent):
+        respond(stump, request)
+    results = await asyncio.gather(*tasks)
+    assert [r.msgid for r in results] == [r['msgid'] for r in console.sent]
+    assert len(stump._requests) == 0
+
+
+@pytest.mark.asyncio
+async def test_request_timeout():
+    stump = StumpManager(FakeConsole())
+    with pytest.raises(StumpException):
+        await stump._send_stump_message(Message.SEND_KEY, timeout=0.01)
+    assert len(stump._requests) == 0
+
+
+@pytest.mark.asyncio
+async def test_request_batch():
+    console = FakeConsole()
+    stump = StumpManager(console)
+
+    batch = asyncio.create_task(stump.request_stump_batch(
+        [(Message.SEND_KEY, {'button_id': 'btn.%d' % i}) for i in range(4)],
+        timeout=0.05, max_concurrency=2
+    ))
+    await settle()
+    assert len(console.sent) == 2
+
+    respond(stump, console.sent[0])
+    await settle()
+    assert len(console.sent) == 3
+    for request in console.sent[1:]:
+        respond(stump, request)
+    await settle()
+    # Last one never gets a response
+    results = await batch
+    assert [r.msgid for r in results[:3]] == \
+        [r['msgid'] for r in console.sent[:3]]
+    assert isinstance(results[3], StumpException)
@@ -0,0 +1,143 @@
+import pytest
+from types import SimpleNamespace
+
+from xbox.stump import json_model
+from xbox.stump.enum import Message
+from xbox.stump.epg import Epg, EpgStore, parse_schedule
+from xbox.stump.manager import StumpException
+
+
+def schedule(channel, start, count, length=1800):
+    return [
+        {'programId': f'{channel}.{i}', 'title': f'{channel} show {i}',
+         'startTime': start + i * length,
+         'endTime': start + (i + 1) * length}
+        for i in range(count)
+    ]
+
+
+class FakeStump(object):
+    def __init__(self, lineups):
+        self.lineups = lineups
+        self.requests = []
+        self.failing = set()
+
+    async def request_app_channel_lineups(self, refresh=False):
+        if self.lineups is None:
+            return json_model.StumpError.parse_obj({'msgid': '1', 'error': 'not ready'})
+        return json_model.AppChannelLineups.parse_obj({
+            'msgid': '1', 'response': 'GetAppChannelLineups',
+            'params': self.lineups
+        })
+
+    async def request_stump_batch(self, batch, max_concurrency=None, **kwargs):
+        assert max_concurrency == 4
+        results = []
+        for message, params in batch:
+            self.requests.append((message, params))
+            if message == Message.APPCHANNEL_DATA:
+                if params['channelId'] in self.failing:
+                    results.append(Exception('timeout'))
+                else:
+                    results.append(SimpleNamespace(
+                        params={'programs': schedule(params['channelId'], 0, 4)}
+                    ))
+            else:
+                results.append(SimpleNamespace(params={'description': params['programId']}))
+        return results
+
+
+def provider(provider_id, *channels):
+    return {
+        'id': provider_id, 'providerName': provider_id, 'titleId': '0',
+        'primaryColor': '0', 'secondaryColor': '0',
+        'channels': [{'id': c, 'name': c.upper()} for c in channels]
+    }
+
+
+def test_parse_schedule():
+    assert parse_schedule(None) == []
+    programmes = parse_schedule([
+        {'id': 1, 'name': 'a', 'start': '2020-01-01T00:00:00Z', 'duration': 60},
+        {'id': 2, 'start': 100, 'end': 50},
+        {'id': 3, 'startTime': 1577836800000, 'endTime': 1577836860000},
+        {'title': 'no start'}
+    ])
+    assert programmes == [{
+        'start': 1577836800.0, 'end': 1577836860.0,
+        'programme_id': '1', 'title': 'a'
+    }, {
+        'start': 1577836800.0, 'end': 1577836860.0,
+        'programme_id': '3', 'title': None
+    }]
+
+
+def test_store_queries():
+    store = EpgStore()
+    store.set_channels('p', [('c1', 'One'), ('c2', 'Two')])
+    store.store_schedule('p', 'c1', parse_schedule(schedule('c1', 0, 3)), 0)
+
+    assert store.now('p', 'c1', 0).title == 'c1 show 0'
+    assert store.now('p', 'c1', 1799).programme_id == 'c1.0'
+    assert store.now('p', 'c1', 1800).programme_id == 'c1.1'
+    assert store.now('p', 'c1', 5400) is None
+    assert store.next('p', 'c1', 100).programme_id == 'c1.1'
+    assert store.now('p', 'c2', 0) is None
+
+    guide = store.now_next(2000)
+    assert guide[('p', 'c1')][0].programme_id == 'c1.1'
+    assert guide[('p', 'c1')][1].programme_id == 'c1.2'
+    assert guide[('p', 'c2')] == (None, None)
+
+    assert [p.programme_id for p in store.schedule('p', 'c1', 1000, 4000)] == \
+        ['c1.0', 'c1.1', 'c1.2']
+
+    # Newer schedule replaces overlapping programmes
+    store.store_schedule('p', 'c1', parse_schedule(schedule('new', 1800, 1, 900)), 1)
+    assert store.now('p', 'c1', 2000).programme_id == 'new.0'
+    assert store.now('p', 'c1', 3000) is None
+    assert store.now('p', 'c1', 0).programme_id == 'c1.0'
+
+    assert store.stale_channels(10, 5) == [('p', 'c2')]
+    store.set_channels('p', [('c2', 'Two')])
+    assert store.now('p', 'c1', 0) is None
+    assert store.prune(10000) == 0
+
+
+@pytest.mark.asyncio
+async def test_epg_refresh():
+    clock = SimpleNamespace(now=100.0)
+    stump = FakeStump([provider('p1', 'a', 'b'), provider('p2', 'c')])
+    stump.failing.add('b')
+    epg = Epg(stump, clock=lambda: clock.now, max_age=3600)
+
+    assert await epg.refresh() == 2
+    assert len(stump.requests) == 3
+    assert epg.now('p1', 'a').programme_id == 'a.0'
+    assert epg.next('p2', 'c').programme_id == 'c.1'
+    assert epg.now('p1', 'b') is None
+
+    # Only stale channels are fetched again
+    stump.requests.clear()
+    assert await epg.refresh() == 0
+    assert stump.requests == [(
+        Message.APPCHANNEL_DATA, {'providerId': 'p1', 'channelId': 'b', 'id': 'b'}
+    )]
+
+    # Lineup changes, details
+    stump.lineups = [provider('p1', 'a')]
+    stump.requests.clear()
+    assert await epg.refresh(details=True) == 0
+    assert ('p2', 'c', 'C') not in epg.store.channels()
+    assert set(epg.now_next()) == {('p1', 'a')}
+    assert epg.now('p1', 'a').details == {'description': 'a.0'}
+    assert {r[1]['programId'] for r in stump.requests} == {'a.0', 'a.1', 'a.2'}
+
+
+@pytest.mark.asyncio
+async def test_epg_refresh_lineup_error():
+    stump = FakeStump(None)
+    epg = Epg(stump)
+    with pytest.raises(StumpException):
+        await epg.refresh()
+    assert stump.requests == []
@@ -129,3 +129,55 @@ def test_send_key(stump_json):
     msg = json_model.deserialize_stump_message(data)
 
     assert msg.params is True
+
+
+def test_lazy_message(stump_json):
+    data = stump_json['response_tuner_lineups']
+    msg = json_model.deserialize_stump_message(data, lazy=True)
+
+    assert isinstance(msg, json_model.LazyStumpMessage)
+    assert msg.kind == 'response'
+    assert msg.name == Message.TUNER_LINEUPS.value
+    assert msg.raw is data
+    assert not msg.is_error
+    assert not msg.validated
+
+    # Typed access validates once
+    assert len(msg.params.providers[0].foundChannels) == 19
+    assert msg.validated
+    assert isinstance(msg.model, json_model.TunerLineups)
+    assert msg.model is msg.model
+
+
+def test_trusted_message():
+    data = {'msgid': 'abc.1', 'request': 'SendKey', 'params': {'button_id': 'btn.up'}}
+    msg = json_model.StumpRequest.construct(**data)
+    assert msg.params == {'button_id': 'btn.up'}
+
+    data = {'response': 'SendKey', 'msgid': 'abc.1', 'params': True}
+    msg = json_model.deserialize_stump_message(data, trusted=True)
+    assert isinstance(msg, json_model.SendKey)
+    assert msg.params is True
+
+
+def test_notification_and_error():
+    msg = json_model.deserialize_stump_message({'notification': 'ChannelChanged'})
+    assert isinstance(msg, json_model.StumpNotification)
+    assert msg.notification == 'ChannelChanged'
+
+    msg = json_model.deserialize_stump_message(
+        {'error': 'Failed', 'msgid': 'abc.2'}, lazy=True
+    )
+    assert json_model.is_error(msg)
+    assert msg.msgid == 'abc.2'
+
+    with pytest.raises(json_model.StumpJsonError):
+        json_model.deserialize_stump_message({'msgid': 'abc.3'})
+
+
+def test_unknown_response():
+    msg = json_model.deserialize_stump_message(
+        {'response': 'SomethingNew', 'msgid': 'abc.4', 'params': {'a': 1}}
+    )
+    assert isinstance(msg, json_model.GenericResponse)
+    assert msg.params == {'a': 1}
@@ -0,0 +1,83 @@
+import asyncio
+import pytest
+
+from xbox.stump.manager import StumpManager, StumpException
+
+
+class FakeConsole(object):
+    def __init__(self):
+        self.sent = []
+        self.stump = None
+
+    def subscribe(self, handler, channel, msg_type=None):
+        pass
+
+    subscribe_json = subscribe
+
+    async def json(self, data, channel):
+        self.sent.append(data)
+
+
+def respond(stump, request, error=False):
+    if error:
+        data = {'error': 'Unknown button', 'msgid': request['msgid']}
+    else:
+        data = {
+            'response': request['request'],
+            'msgid': request['msgid'],
+            'params': True
+        }
+    stump._on_json(data, None)
+
+
+@pytest.mark.asyncio
+async def test_key_sequence_pipelined():
+    console = FakeConsole()
+    stump = StumpManager(console)
+
+    task = asyncio.create_task(stump.send_stump_key_sequence(
+        [('btn.vol_up', 3), 'btn.vol_mute'], device_id='1', gap=0.01
+    ))
+    await asyncio.sleep(0.05)
+    # All keys sent without waiting for responses
+    assert [r['params']['button_id'] for r in console.sent] == \
+        ['btn.vol_up'] * 3 + ['btn.vol_mute']
+    assert all(r['params']['device_id'] == '1' for r in console.sent)
+
+    for request in reversed(console.sent):
+        respond(stump, request)
+    results = await task
+    assert [r.button for r in results] == ['btn.vol_up'] * 3 + ['btn.vol_mute']
+    assert all(r.ok for r in results)
+    assert [r.response.msgid for r in results] == \
+        [r['msgid'] for r in console.sent]
+    assert all(r.latency >= 0 for r in results)
+
+
+@pytest.mark.asyncio
+async def test_key_sequence_errors():
+    console = FakeConsole()
+    stump = StumpManager(console)
+
+    task = asyncio.create_task(stump.send_stump_digits(
+        '12', enter=True, gap=0
+    ))
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert [r['params']['button_id'] for r in console.sent] == \
+        ['btn.digit_1', 'btn.digit_2', 'btn.ch_enter']
+
+    respond(stump, console.sent[0])
+    respond(stump, console.sent[1], error=True)
+    # No response for the last key
+    stump._requests._expire(console.sent[2]['msgid'], 0)
+    results = await task
+
+    assert results[0].ok
+    assert isinstance(results[1].error, StumpException)
+    assert results[1].response is None
+    assert isinstance(results[2].error, StumpException)
+    assert len(stump._requests) == 0
+
+    with pytest.raises(StumpException):
+        await stump.send_stump_digits('12a')
@@ -0,0 +1,120 @@
+import copy
+import pytest
+
+from xbox.stump import json_model
+from xbox.stump.lineup import ChannelIndex, normalize_name
+from xbox.stump.manager import StumpManager
+
+LINEUP_ID = '0A7FB88A-960B-C2E3-9975-7C86C5FA6C49'
+
+
+@pytest.fixture
+def lineups(stump_json):
+    data = copy.deepcopy(stump_json['response_tuner_lineups'])
+    for number, channel in enumerate(data['params']['providers'][0]['foundChannels'], 1):
+        channel['channelNumber'] = str(number)
+    return data
+
+
+def test_normalize_name():
+    assert normalize_name('BR FS Süd HD (Internet)') == 'br fs sud hd internet'
+    assert normalize_name('  Sky  Sport & News+ ') == 'sky sport and news plus'
+
+
+def test_channel_index(lineups):
+    index = ChannelIndex()
+    assert index.update(json_model.deserialize_stump_message(lineups)) == (19, 0)
+    assert len(index) == 19
+
+    channel = index.resolve('1')
+    assert channel.name == 'Das Erste HD'
+    assert channel.lineup_id == LINEUP_ID
+    assert index.resolve('channel 19').name == 'NDR FS NDS HD'
+    assert index.resolve('000021146A00040C').name == 'Test-R'
+
+    # Normalized name, alias without quality token
+    assert index.resolve('das erste hd').channel_id == '000021146A000301'
+    assert index.resolve('Das Erste').channel_id == '000021146A000301'
+    assert index.resolve('BR FS SUD HD (internet)').number == 5
+    assert index.resolve('wdr 2').name == 'WDR 2 (Internet)'
+
+    assert [c.name for c in index.prefix('wdr hd')] == \
+        ['WDR HD Aachen', 'WDR HD Bonn']
+    assert len(index.prefix('wdr')) == 9
+    assert index.resolve('wdr kosmo').name == 'WDRcosmo (Internet)'
+    assert index.resolve('something else') is None
+    assert index.search('') == []
+
+
+def test_channel_index_incremental(lineups):
+    index = ChannelIndex()
+    index.update(json_model.deserialize_stump_message(lineups))
+
+    channels = lineups['params']['providers'][0]['foundChannels']
+    channels[0]['displayName'] = 'Das Erste'
+    del channels[1]
+    assert index.update(json_model.deserialize_stump_message(lineups)) == (1, 2)
+    assert index.by_id('000021146A000401') is None
+    assert index.by_number(2) == []
+    assert index.prefix('wdr hd a') == []
+    assert index.resolve('das erste').name == 'Das Erste'
+    assert index.by_name('das erste hd') == []
+
+    lineups['params']['providers'] = []
+    index.update(json_model.deserialize_stump_message(lineups))
+    assert len(index) == 0
+    assert index.prefix('w') == []
+
+
+@pytest.mark.asyncio
+async def test_set_channel_resolved(lineups):
+    class FakeConsole(object):
+        def subscribe(self, handler, channel, msg_type=None):
+            pass
+
+        subscribe_json = subscribe
+
+    stump = StumpManager(FakeConsole())
+    sent = []
+
+    async def send(name, params=None, msgid=None, timeout=3):
+        sent.append((name, params))
+        if name.value == 'GetTunerLineups':
+            msg = json_model.deserialize_stump_message(lineups)
+            stump._on_response(name, msg)
+            return msg
+        return True
+
+    stump._send_stump_message = send
+
+    await stump.set_stump_channel_by_name('ard alpha')
+    await stump.set_stump_channel('3')
+    await stump.set_stump_channel_by_name('unknown')
+    assert [params for _, params in sent[1:]] == [
+        {'channelId': '000021146A000623', 'lineupInstanceId': LINEUP_ID},
+        {'channelId': '000021146A00040A', 'lineupInstanceId': LINEUP_ID},
+        {'channel_name': 'unknown'}
+    ]
+    # Lineups were only requested once
+    assert len(sent) == 4
+
+
+def test_on_json_raw_lineups(lineups):
+    class FakeConsole(object):
+        def subscribe(self, handler, channel, msg_type=None):
+            pass
+
+        subscribe_json = subscribe
+
+    stump = StumpManager(FakeConsole())
+    stump._on_json(lineups, 0)
+
+    # Indexed from the raw message, without validating it
+    assert not stump._stump_tuner_lineups.validated
+    assert len(stump.channels) == 19
+    assert stump.channels.by_number(3)[0].lineup_id == LINEUP_ID
+
+    # Validated message gives the same index
+    index = ChannelIndex()
+    index.update(json_model.deserialize_stump_message(lineups))
+    assert sorted(index) == sorted(stump.channels)
@@ -0,0 +1,183 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+
+from xbox.sg import packer
+from xbox.sg.enum import AckStatus, MessageType, TextResult
+from xbox.sg.manager import TextManager
+from xbox.sg.textinput import TextSessionError
+
+
+class FakeConsole(object):
+    def __init__(self, crypto):
+        self.crypto = crypto
+        self.sent = []
+        self.ack = None
+
+    def subscribe(self, handler, channel, msg_type=None):
+        pass
+
+    subscribe_json = subscribe
+
+    async def send_message(self, msg, channel, blocking=True):
+        packer.pack(msg, self.crypto)
+        self.sent.append((msg.header.flags.msg_type, msg.protected_payload))
+        if self.ack:
+            await self.ack
+        return AckStatus.Processed
+
+
+def text_manager(crypto, max_text_length=0):
+    console = FakeConsole(crypto)
+    text = TextManager(console)
+    text.session_config = SimpleNamespace(
+        text_session_id=7, max_text_length=max_text_length
+    )
+    return console, text
+
+
+@pytest.mark.asyncio
+async def test_text_session_deltas(crypto):
+    console, text = text_manager(crypto)
+    session = text.text_session(rate=1000, deltas=True)
+
+    session.type('hal')
+    await session.wait_sent()
+    session.type('o')
+    await session.wait_sent()
+    session.backspace(2)
+    session.type('é')
+    await session.wait_sent()
+
+    payloads = [p for _, p in console.sent]
+    assert [(p.base_version, p.submitted_version) for p in payloads] == \
+        [(0, 1), (1, 2), (2, 3)]
+    assert [(p.text_chunk_byte_start, p.text_chunk) for p in payloads] == \
+        [(0, 'hal'), (3, 'o'), (2, 'é')]
+    assert payloads[-1].total_text_byte_len == 4
+    assert text.current_session_input is payloads[-1]
+
+    # Full text without deltas
+    session.deltas = False
+    session.type('!')
+    await session.wait_sent()
+    assert console.sent[-1][1].text_chunk == 'haé!'
+
+
+@pytest.mark.asyncio
+async def test_text_session_coalescing(crypto):
+    console, text = text_manager(crypto, max_text_length=10)
+    session = text.text_session(rate=1000, deltas=True)
+
+    # Hold acks, keystrokes pile up while the first message is in flight
+    console.ack = asyncio.get_running_loop().create_future()
+    for char in 'search query':
+        session.type(char)
+        await asyncio.sleep(0)
+    assert len(console.sent) == 1
+
+    console.ack.set_result(None)
+    console.ack = None
+    await session.done()
+
+    types = [t for t, _ in console.sent]
+    assert types == [MessageType.SystemTextInput] * 2 + \
+        [MessageType.SystemTextDone]
+    assert session.text == 'search que'
+    assert console.sent[1][1].text_chunk_byte_start == 1
+    assert console.sent[1][1].text_chunk == 'earch que'
+    assert console.sent[2][1].text_version == 2
+    assert console.sent[2][1].result == TextResult.Accept
+    assert session.updates == 12
+
+
+@pytest.mark.asyncio
+async def test_text_session_versions(crypto):
+    console, text = text_manager(crypto)
+    session = text.text_session(rate=1000, deltas=True)
+
+    # Console acked a newer version than we know of
+    text.current_text_version = 5
+    session.type('a')
+    await session.wait_sent()
+    assert console.sent[-1][1].base_version == 5
+    assert session.version == 6
+
+    # Console side edit becomes the new base
+    session.start()
+    text.on_systemtext_input(SimpleNamespace(
+        text_chunk_byte_start=0, text_chunk='abc', submitted_version=8
+    ))
+    assert session.text == 'abc'
+    assert not session.pending
+    session.type('d')
+    await session.wait_sent()
+    assert console.sent[-1][1].base_version == 8
+    assert console.sent[-1][1].text_chunk == 'd'
+
+    # New text session starts from scratch
+    text.session_config = SimpleNamespace(text_session_id=8, max_text_length=0)
+    session.type('e')
+    await session.wait_sent()
+    assert console.sent[-1][1].text_session_id == 8
+    assert console.sent[-1][1].text_chunk == 'abcde'
+
+    text.session_config = None
+    with pytest.raises(TextSessionError):
+        await session.flush()
+
+
+@pytest.mark.asyncio
+async def test_text_session_full_text_default(crypto):
+    console, text = text_manager(crypto)
+    session = text.text_session(rate=1000)
+
+    session.type('hal')
+    await session.wait_sent()
+    session.type('o')
+    await session.wait_sent()
+
+    payloads = [p for _, p in console.sent]
+    assert [(p.text_chunk_byte_start, p.text_chunk) for p in payloads] == \
+        [(0, 'hal'), (0, 'halo')]
+    assert payloads[-1].total_text_byte_len == 4
+
+
+@pytest.mark.asyncio
+async def test_text_session_console_edits(crypto):
+    console, text = text_manager(crypto)
+    session = text.text_session(rate=1000)
+    session.start()
+
+    session.type('ab')
+    await session.wait_sent()
+    assert session.version == 1
+
+    # Hold acks, 'cd' stays unsent while 'c' is in flight
+    console.ack = asyncio.get_running_loop().create_future()
+    session.type('c')
+    await asyncio.sleep(0.01)
+    session.type('d')
+    assert (session.text, session.sent_text, session.version) == \
+        ('abcd', 'abc', 2)
+
+    # Stale echo of an older version is ignored
+    text.on_systemtext_input(SimpleNamespace(
+        text_chunk_byte_start=0, text_chunk='ab', submitted_version=1
+    ))
+    assert (session.text, session.sent_text, session.version) == \
+        ('abcd', 'abc', 2)
+
+    # Newer console edit becomes the base, unsent 'd' is kept
+    text.on_systemtext_input(SimpleNamespace(
+        text_chunk_byte_start=0, text_chunk='xyz', submitted_version=5
+    ))
+    assert (session.text, session.sent_text, session.version) == \
+        ('xyzd', 'xyz', 5)
+
+    console.ack.set_result(None)
+    console.ack = None
+    await session.wait_sent()
+    assert console.sent[-1][1].text_chunk == 'xyzd'
+    assert console.sent[-1][1].base_version == 5
+    await session.stop()
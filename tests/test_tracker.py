@@ -0,0 +1,186 @@
+import uuid
+import asyncio
+import pytest
+from construct import Container
+
+from xbox.sg import packet
+from xbox.sg.console import Console
+from xbox.sg.enum import MediaPlaybackStatus, ActiveTitleLocation
+from xbox.sg.registry import ConsoleRegistry
+from xbox.sg.tracker import MediaStateTracker, TitleTracker, \
+    TitleEventType, diff_media_state, TICKS_PER_SECOND
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _state(media_state, **kwargs):
+    fields = dict(media_state.container)
+    fields.update(kwargs)
+    return packet.message.media_state(**fields)
+
+
+def test_diff_media_state(media_state):
+    assert diff_media_state(media_state, _state(media_state)) == frozenset()
+    assert diff_media_state(
+        media_state, _state(media_state, position=10, rate=2.0)
+    ) == {'position', 'rate'}
+    assert diff_media_state(media_state, _state(
+        media_state, metadata=[Container(name='title', value='Other')]
+    )) == {'metadata'}
+    assert 'title_id' in diff_media_state(None, media_state)
+
+
+def test_media_tracker_events(media_state):
+    clock = FakeClock()
+    tracker = MediaStateTracker(clock=clock)
+    events = []
+    tracker.on_change += lambda s, changed: events.append(('change', changed))
+    tracker.on_track_change += lambda s: events.append(('track', s.aum_id))
+    tracker.on_playback_status += lambda o, n: events.append(('status', o, n))
+    tracker.on_metadata_change += lambda m: events.append(('metadata', m))
+    tracker.on_seek += lambda o, n: events.append(('seek', n))
+
+    tracker.update(media_state)
+    assert ('track', media_state.aum_id) in events
+    assert ('status', None, MediaPlaybackStatus.Playing) in events
+    events.clear()
+
+    # Position advanced as expected, nothing to report
+    clock.now += 1
+    tracker.update(_state(media_state, position=TICKS_PER_SECOND))
+    clock.now += 1
+    tracker.update(_state(media_state, position=2 * TICKS_PER_SECOND))
+    assert events == []
+
+    clock.now += 1
+    assert tracker.position == 3 * TICKS_PER_SECOND
+    tracker.update(_state(media_state, position=60 * TICKS_PER_SECOND))
+    assert ('seek', 60 * TICKS_PER_SECOND) in events
+    events.clear()
+
+    tracker.update(_state(
+        media_state, position=60 * TICKS_PER_SECOND,
+        playback_status=MediaPlaybackStatus.Paused,
+        metadata=[Container(name='title', value='Other')]
+    ))
+    assert ('status', MediaPlaybackStatus.Playing,
+            MediaPlaybackStatus.Paused) in events
+    assert ('metadata', {'title': 'Other'}) in events
+    # Paused, no interpolation
+    clock.now += 10
+    assert tracker.position == 60 * TICKS_PER_SECOND
+
+    tracker.clear()
+    assert tracker.state is None
+    assert tracker.position is None
+
+
+@pytest.mark.asyncio
+async def test_media_tracker_throttle(media_state):
+    tracker = MediaStateTracker()
+    calls = []
+    subscription = tracker.subscribe(
+        lambda state, position: calls.append(state), interval=0.05
+    )
+
+    tracker.update(media_state)
+    for i in range(10):
+        tracker.update(_state(media_state, position=0, sound_level=i % 2))
+    assert len(calls) == 1
+
+    await asyncio.sleep(0.1)
+    # Coalesced into a single trailing call with the latest state
+    assert len(calls) == 2
+    assert calls[-1] is tracker.state
+
+    subscription.cancel()
+    tracker.clear()
+    assert len(calls) == 2
+
+
+def _title(title_id, aum, has_focus=False,
+           location=ActiveTitleLocation.Full):
+    return packet.message._active_title(
+        title_id=title_id,
+        product_id=uuid.UUID(int=0),
+        sandbox_id=uuid.UUID(int=0),
+        aum=aum,
+        disposition=Container(has_focus=has_focus, title_location=location)
+    )
+
+
+def _status(console_status, *titles):
+    fields = dict(console_status.container)
+    fields['active_titles'] = list(titles)
+    return packet.message.console_status(**fields)
+
+
+def test_title_tracker(console_status):
+    clock = FakeClock()
+    tracker = TitleTracker(history=4, clock=clock)
+    events = []
+    tracker.on_title_launched += lambda t: events.append(('launched', t.aum))
+    tracker.on_title_closed += lambda t: events.append(('closed', t.aum))
+    tracker.on_focus_changed += lambda o, n: events.append(
+        ('focus', n.aum if n else None)
+    )
+
+    home = _title(1, 'Home', has_focus=True,
+                  location=ActiveTitleLocation.StartView)
+    tracker.update(_status(console_status, home))
+    assert events == [('launched', 'Home'), ('focus', 'Home')]
+    assert tracker.since(1) == 100.0
+
+    # Repeated status, nothing changes
+    events.clear()
+    clock.now += 10
+    assert tracker.update(_status(console_status, home)) == []
+    assert events == []
+
+    # Game launched in front of home
+    home_bg = _title(1, 'Home', location=ActiveTitleLocation.StartView)
+    game = _title(2, 'Game', has_focus=True)
+    result = tracker.update(_status(console_status, home_bg, game))
+    assert [e.event_type for e in result] == \
+        [TitleEventType.Launched, TitleEventType.FocusChanged]
+    assert events == [('launched', 'Game'), ('focus', 'Game')]
+    assert tracker.focused.title_id == 2
+    assert tracker.focused.focus_since == 110.0
+    assert tracker.since(1) == 100.0
+    assert [t.title_id for t in tracker.running] == [1, 2]
+    assert 2 in tracker
+
+    # Same title at another location is tracked separately
+    snapped = _title(2, 'Game', location=ActiveTitleLocation.Snapped)
+    tracker.update(_status(console_status, home_bg, game, snapped))
+    assert len(tracker) == 3
+    assert tracker.get(2, ActiveTitleLocation.Snapped).since == 110.0
+
+    events.clear()
+    tracker.clear()
+    assert ('closed', 'Game') in events
+    assert events[-1] == ('focus', None)
+    assert len(tracker) == 0
+    # History ring buffer keeps the most recent events only
+    assert len(tracker.history) == 4
+    assert tracker.history[-1].event_type == TitleEventType.Closed
+
+
+def test_console_title_tracker(console, console_status):
+    console.console_status = console_status
+    title = console.title_tracker.get(714681658)
+    assert title.has_focus is True
+    assert title.location == ActiveTitleLocation.StartView
+
+    registry = ConsoleRegistry(Console)
+    registry.add(console)
+    assert registry.running(714681658) == [(console, title)]
+
+    console.console_status = None
+    assert registry.running(714681658) == []
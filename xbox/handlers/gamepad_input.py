@@ -69,16 +69,19 @@ def get_getch_func():
 
 async def input_loop(console):
     getch = get_getch_func()
-    while True:
-        ch = getch()
-        print(ch)
-        if ord(ch) == 3:  # CTRL-C
-            sys.exit(1)
+    async with console.gamepad_session() as pad:
+        while True:
+            ch = getch()
+            print(ch)
+            if ord(ch) == 3:  # CTRL-C
+                sys.exit(1)
 
-        elif ch not in input_map:
-            continue
+            elif ch not in input_map:
+                continue
 
-        button = input_map[ch]
-        await console.gamepad_input(button)
-        await console.wait(0.1)
-        await console.gamepad_input(GamePadButton.Clear)
+            button = input_map[ch]
+            pad.press(button)
+            await console.wait(0.1)
+            pad.release(button)
+            # getch() blocks the loop, send the release before waiting for the next key
+            await pad.flush()
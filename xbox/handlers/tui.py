@@ -4,7 +4,7 @@ Terminal UI Smartglass Client
 Supported functions: Poweron/off, launch title, gamepad input and entering text.
 Additional shows console status (active titles, OS version, locale) and media state.
 """
-import json
+import time
 import urwid
 import logging
 import asyncio
@@ -13,7 +13,7 @@ from binascii import hexlify
 
 from ..scripts import ExitCodes
 from ..sg.console import Console
-from ..sg.enum import DeviceStatus, GamePadButton, MediaPlaybackStatus
+from ..sg.enum import GamePadButton, MediaPlaybackStatus
 from ..sg.manager import InputManager, TextManager, MediaManager
 
 from xbox.webapi.authentication.manager import AuthenticationManager
@@ -91,12 +91,14 @@ class MediaProgressbar(urwid.ProgressBar):
     def get_text(self):
         return self._current_text
 
-    def update_from_state(self, state):
+    def update_from_state(self, state, position=None):
         if not state or state.playback_status in (MediaPlaybackStatus.Stopped, MediaPlaybackStatus.Closed):
             self._current_text = 'No media playing'
             self.set_completion(0.0)
         else:
-            pos_seconds = state.position / 10000000
+            if position is None:
+                position = state.position
+            pos_seconds = position / 10000000
             total_seconds = state.media_end / 10000000
             self._current_text = '{pmin:02d}:{psec:02d} / {tmin:02d}:{tsec:02d}'.format(
                 pmin=int(pos_seconds // 60),
@@ -106,7 +108,7 @@ class MediaProgressbar(urwid.ProgressBar):
             )
             if state.media_end > 0:
                 self.done = state.media_end
-            self.set_completion(state.position)
+            self.set_completion(position)
 
 
 class ConsoleView(urwid.Frame):
@@ -130,7 +132,10 @@ class ConsoleView(urwid.Frame):
         self.console.on_connection_state += lambda _: self.update_device_info()
         self.console.on_active_surface += lambda _: self.update_device_info()
         self.console.on_console_status += self.on_console_status
-        self.console.media.on_media_state += self.on_media_state
+        self.console.media.tracker.on_change += lambda state, _: self.on_media_state(state)
+        self.console.media.tracker.subscribe(
+            self.media_progress.update_from_state, interval=1.0, periodic=True
+        )
         self.console.text.on_systemtext_configuration += lambda _: self.app.view_text_input_overlay(self.console)
         self.console.text.on_systemtext_input += lambda _: None  # Update text overlay with input text
         self.console.text.on_systemtext_done += lambda _: self.app.return_to_details_menu()
@@ -145,7 +150,7 @@ class ConsoleView(urwid.Frame):
         text += 'Pairing State: {:<15}\n'.format(self.console.pairing_state.name)
         # text += 'Active Surface: {}\n'.format(ActiveSurfaceType[self.console.active_surface.surface_type])
         text += 'Shared secret: {hex_secret}'.format(
-            hex_secret=hexlify(self.console._crypto.shared_secret).decode('utf-8')
+            hex_secret=hexlify(self.console.crypto.shared_secret).decode('utf-8')
         )
         self.device_info.original_widget.set_text(text)
 
@@ -170,7 +175,6 @@ class ConsoleView(urwid.Frame):
     def on_media_state(self, state):
         if not state:
             self.media_text.set_text('Not available')
-            self.media_progress.update_from_state(state)
             return
 
         text = \
@@ -186,7 +190,6 @@ class ConsoleView(urwid.Frame):
             self.media_text.set_text('Not available')
         else:
             self.media_text.set_text(text)
-        self.media_progress.update_from_state(state)
 
     def keypress(self, size, key):
         if key in ('c', 'C'):
@@ -290,34 +293,37 @@ class ConsoleList(urwid.Frame):
 
         self.walker = walker
         self.app = app
-        self.consoles = consoles
+        self.registry = Console.get_registry()
+        self.registry.on_updated += self._on_updated
+        self.consoles = [self.registry.add(c) for c in consoles]
+        self.buttons = {c.liveid: ConsoleButton(self.app, c) for c in self.consoles}
         super(ConsoleList, self).__init__(view, header=header, footer=footer)
-        self.walker[:] = [ConsoleButton(self.app, c) for c in self.consoles]
+        self.walker[:] = list(self.buttons.values())
+
+    def _on_updated(self, console):
+        button = self.buttons.get(console.liveid)
+        if button:
+            button.refresh()
 
     async def refresh(self):
         await self._refresh()
 
     async def _refresh(self):
-        discovered = await Console.discover(blocking=True)
-
-        liveids = [d.liveid for d in discovered]
-        for i, c in enumerate(self.consoles):
-            if c.liveid in liveids:
-                # Refresh existing entries
-                idx = liveids.index(c.liveid)
-                if c.device_status != discovered[idx].device_status:
-                    self.consoles[i] = discovered[idx]
-                del discovered[idx]
-                del liveids[idx]
-            elif c.liveid not in liveids:
-                # Set unresponsive consoles to Unavailable
-                self.consoles[i].device_status = DeviceStatus.Unavailable
+        started = time.time()
+        await Console.discover(blocking=True, quiet_period=1.0)
+
+        # Set unresponsive consoles to Unavailable, known consoles
+        # which responded got updated in place by the registry
+        self.registry.mark_unavailable(started)
 
         # Add newly discovered consoles
-        self.consoles.extend(discovered)
+        for console in self.registry:
+            if console.liveid not in self.buttons:
+                self.consoles.append(console)
+                self.buttons[console.liveid] = ConsoleButton(self.app, console)
 
         # Update the consolelist view
-        self.walker[:] = [ConsoleButton(self.app, c) for c in self.consoles]
+        self.walker[:] = list(self.buttons.values())
 
     def keypress(self, size, key):
         if key in ('r', 'R'):
@@ -616,7 +622,9 @@ class SGDisplay(object):
 
         self.loop.start()
         self.running = True
-        await self.consoles.refresh()
+        # Known consoles outside the broadcast domain are reached via
+        # their last known address
+        await asyncio.gather(Console.revalidate(), self.consoles.refresh())
 
         while self.running:
             await asyncio.sleep(1000)
@@ -628,18 +636,11 @@ class SGDisplay(object):
             self.view_log()
 
 def load_consoles(filepath: str) -> List[Console]:
-    try:
-        with open(filepath, 'r') as fh:
-            consoles = json.load(fh)
-        return [Console.from_dict(c) for c in consoles]
-    except FileNotFoundError:
-        return []
+    return Console.get_registry().load(filepath)
 
 
 def save_consoles(filepath: str, consoles: List[Console]) -> None:
-    consoles = [c.to_dict() for c in consoles]
-    with open(filepath, 'w') as fh:
-        json.dump(consoles, fh, indent=2)
+    Console.get_registry().save(filepath, consoles)
 
 
 async def run_tui(
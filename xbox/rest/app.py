@@ -1,9 +1,14 @@
+import asyncio
 from fastapi import FastAPI
 import uvicorn
 import aiohttp
 
 from . import singletons
 from .api import api_router
+from .consolewrap import ConsoleWrap
+from .routes.device import prefetch_title_info
+
+from xbox.scripts import CONSOLES_FILE
 
 app = FastAPI(title='SmartGlass REST server')
 
@@ -11,11 +16,22 @@ app = FastAPI(title='SmartGlass REST server')
 @app.on_event("startup")
 async def startup_event():
     singletons.http_session = aiohttp.ClientSession()
+    ConsoleWrap.on_console_status += prefetch_title_info
+
+    # Warm start: known consoles are available right away,
+    # their status gets revalidated in the background
+    for console in ConsoleWrap.get_registry().load(CONSOLES_FILE):
+        singletons.console_cache[console.liveid] = ConsoleWrap(console)
+    singletons.revalidate_task = asyncio.create_task(ConsoleWrap.revalidate())
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    singletons.revalidate_task.cancel()
+    ConsoleWrap.on_console_status -= prefetch_title_info
+    await ConsoleWrap.on_console_status.drain(timeout=5)
     await singletons.http_session.close()
+    ConsoleWrap.get_registry().save(CONSOLES_FILE)
 
 
 app.include_router(api_router)
@@ -1,11 +1,16 @@
 from typing import Dict, Optional
+import weakref
+import functools
 import logging
 
 from xbox.sg import enum
 from xbox.sg.console import Console
-from xbox.sg.manager import InputManager, TextManager, MediaManager
+from xbox.sg.registry import ConsoleRegistry
+from xbox.sg.manager import InputManager, TextManager, MediaManager, \
+    MediaManagerError
 from xbox.stump.manager import StumpManager
 from xbox.stump import json_model as stump_schemas
+from xbox.sg.utils.events import Event
 
 from . import schemas
 
@@ -13,8 +18,20 @@ log = logging.getLogger()
 
 
 class ConsoleWrap(object):
+    # Fired with (ConsoleWrap, console_status) for every console,
+    # handlers doing I/O run as tasks with bounded concurrency
+    on_console_status = Event(asynchronous=True, max_concurrency=4)
+    # Console -> its latest wrapper (weak), the status handler is added
+    # once per console and forwards with that wrapper
+    _wrappers = weakref.WeakKeyDictionary()
+
     def __init__(self, console: Console):
         self.console = console
+        if console not in ConsoleWrap._wrappers:
+            console.on_console_status += functools.partial(
+                ConsoleWrap._forward_console_status, weakref.ref(console)
+            )
+        ConsoleWrap._wrappers[console] = weakref.ref(self)
 
         if 'input' not in self.console.managers:
             self.console.add_manager(InputManager)
@@ -25,10 +42,25 @@ class ConsoleWrap(object):
         if 'stump' not in self.console.managers:
             self.console.add_manager(StumpManager)
 
+    @staticmethod
+    def _forward_console_status(console_ref, status) -> None:
+        wrapper_ref = ConsoleWrap._wrappers.get(console_ref())
+        wrapper = wrapper_ref() if wrapper_ref else None
+        if wrapper:
+            ConsoleWrap.on_console_status(wrapper, status)
+
     @staticmethod
     async def discover(*args, **kwargs):
         return await Console.discover(*args, **kwargs)
 
+    @staticmethod
+    def get_registry() -> ConsoleRegistry:
+        return Console.get_registry()
+
+    @staticmethod
+    async def revalidate(*args, **kwargs):
+        return await Console.revalidate(*args, **kwargs)
+
     @staticmethod
     async def power_on(
         liveid: str, addr: str = None, iterations: int = 3, tries: int = 10
@@ -154,6 +186,9 @@ class ConsoleWrap(object):
 
         active_titles = []
         for at in status.active_titles:
+            running = self.console.title_tracker.get(
+                at.title_id, at.disposition.title_location
+            )
             title = {
                 'title_id': at.title_id,
                 'aum': at.aum,
@@ -163,7 +198,8 @@ class ConsoleWrap(object):
                 'has_focus': at.disposition.has_focus,
                 'title_location': at.disposition.title_location.name,
                 'product_id': str(at.product_id),
-                'sandbox_id': str(at.sandbox_id)
+                'sandbox_id': str(at.sandbox_id),
+                'running_since': running.since if running else None
             }
             active_titles.append(title)
 
@@ -230,19 +266,19 @@ class ConsoleWrap(object):
 
     async def get_stump_config(self) -> stump_schemas.Configuration:
         if self.usable:
-            return await self.console.stump.request_stump_configuration()
+            return (await self.console.stump.request_stump_configuration()).model
 
     async def get_headend_info(self) -> stump_schemas.HeadendInfo:
         if self.usable:
-            return await self.console.stump.request_headend_info()
+            return (await self.console.stump.request_headend_info()).model
 
     async def get_livetv_info(self) -> stump_schemas.LiveTvInfo:
         if self.usable:
-            return await self.console.stump.request_live_tv_info()
+            return (await self.console.stump.request_live_tv_info()).model
 
     async def get_tuner_lineups(self) -> stump_schemas.TunerLineups:
         if self.usable:
-            return await self.console.stump.request_tuner_lineups()
+            return (await self.console.stump.request_tuner_lineups()).model
 
     async def connect(
         self,
@@ -261,7 +297,7 @@ class ConsoleWrap(object):
 
         if state == enum.ConnectionState.Connected:
             await self.console.wait(0.5)
-            await self.console.stump.request_stump_configuration()
+            await self.console.stump.request_stump_configuration(refresh=True)
 
         return state
 
@@ -281,12 +317,31 @@ class ConsoleWrap(object):
         print(result)
         return True
 
-    async def send_media_command(self, command: enum.MediaControlCommand, seek_position: Optional[int] = None) -> bool:
-        title_id = 0
-        request_id = 0
-        await self.console.media_command(title_id, command, request_id, seek_position)
+    async def send_media_command(
+        self,
+        command: enum.MediaControlCommand,
+        seek_position: Optional[int] = None,
+        wait: bool = False
+    ) -> bool:
+        future = self.console.media.queue_media_command(
+            command, title_id=0, seek_position=seek_position
+        )
+        if not wait:
+            future.add_done_callback(self._log_media_command_failure)
+            return True
+
+        try:
+            await future
+        except MediaManagerError as e:
+            log.warning('Media command failed: %s', e)
+            return False
         return True
 
+    @staticmethod
+    def _log_media_command_failure(future) -> None:
+        if not future.cancelled() and future.exception():
+            log.warning('Media command failed: %s', future.exception())
+
     async def send_gamepad_button(self, btn: enum.GamePadButton) -> bool:
         await self.console.gamepad_input(btn)
         # Its important to clear button-press afterwards
@@ -1,3 +1,4 @@
+import time
 import logging
 from typing import Optional, List
 
@@ -19,35 +20,36 @@ router = APIRouter()
 
 @router.get('/', response_model=List[schemas.DeviceStatusResponse])
 async def device_overview(addr: Optional[str] = None):
-    discovered = await ConsoleWrap.discover(addr=addr)
-    discovered = discovered.copy()
-
-    liveids = [d.liveid for d in discovered]
-    for i, c in enumerate(singletons.console_cache.values()):
-        if c.liveid in liveids:
-            # Refresh existing entries
-            index = liveids.index(c.liveid)
-
-            if c.device_status != discovered[index].device_status:
-                singletons.console_cache[c.liveid] = ConsoleWrap(discovered[index])
-            del discovered[index]
-            del liveids[index]
-        elif c.liveid not in liveids:
-            # Set unresponsive consoles to Unavailable
-            singletons.console_cache[c.liveid].console.device_status = enum.DeviceStatus.Unavailable
-
-    # Extend by new entries
-    for d in discovered:
-        singletons.console_cache.update({d.liveid: ConsoleWrap(d)})
+    started = time.time()
+    await ConsoleWrap.discover(addr=addr, until_addr=addr, quiet_period=1.0)
+
+    registry = ConsoleWrap.get_registry()
+    if not addr:
+        # Set unresponsive consoles to Unavailable
+        registry.mark_unavailable(started)
+        # Expired consoles leave the overview. Their wrappers stay cached,
+        # stored consoles can still be powered on by Live ID
+        registry.expire()
+
+    # Extend by new entries, known consoles got updated in place.
+    # A console discovered again after expiry is a new instance
+    for console in registry:
+        cached = singletons.console_cache.get(console.liveid)
+        if not cached or cached.console is not console:
+            singletons.console_cache[console.liveid] = ConsoleWrap(console)
 
     # Filter for specific console when ip address query is supplied (if available)
-    consoles = [console.status for console in singletons.console_cache.values()
-            if (addr and console.status.ip_address == addr) or not addr]
+    consoles = [singletons.console_cache[console.liveid].status for console in registry
+                if (addr and console.address == addr) or not addr]
     return consoles
 
 
 @router.get('/{liveid}/poweron', response_model=schemas.GeneralResponse)
 async def poweron(liveid: str, addr: Optional[str] = None):
+    cached = singletons.console_cache.get(liveid)
+    if not addr and cached:
+        # Last known address, also for consoles expired from the registry
+        addr = cached.console.address
     await ConsoleWrap.power_on(liveid, addr=addr)
     return schemas.GeneralResponse(success=True)
 
@@ -119,12 +121,8 @@ async def console_status(
     if xbl_client and status:
         for t in status.active_titles:
             try:
-                title_id = t.title_id
-                resp = singletons.title_cache.get(title_id)
-                if not resp:
-                    resp = await xbl_client.titlehub.get_title_info(title_id, [TitleFields.IMAGE])
+                resp = await get_title_info(xbl_client, t.title_id)
                 if resp.titles[0]:
-                    singletons.title_cache[title_id] = resp
                     t.name = resp.titles[0].name
                     t.image = resp.titles[0].display_image
                     t.type = resp.titles[0].type
@@ -133,6 +131,28 @@ async def console_status(
     return status
 
 
+async def get_title_info(xbl_client: XboxLiveClient, title_id: int):
+    resp = singletons.title_cache.get(title_id)
+    if not resp:
+        resp = await xbl_client.titlehub.get_title_info(title_id, [TitleFields.IMAGE])
+        if resp.titles:
+            singletons.title_cache[title_id] = resp
+    return resp
+
+
+async def prefetch_title_info(console: ConsoleWrap, status) -> None:
+    """
+    Warm the title cache as soon as a console reports new active titles,
+    handler for `ConsoleWrap.on_console_status`.
+    """
+    if not singletons.xbl_client:
+        return
+
+    for t in status.active_titles:
+        if t.title_id not in singletons.title_cache:
+            await get_title_info(singletons.xbl_client, t.title_id)
+
+
 @router.get('/{liveid}/launch/{app_id}', response_model=schemas.GeneralResponse, deprecated=True)
 async def launch_title(
     console: ConsoleWrap = Depends(console_connected),
@@ -232,7 +252,8 @@ async def media_command(
     console: ConsoleWrap = Depends(console_connected),
     *,
     command: str,
-    seek_position: Optional[int] = None
+    seek_position: Optional[int] = None,
+    wait: bool = False
 ):
     cmd = console.media_commands.get(command)
     if not cmd:
@@ -240,8 +261,8 @@ async def media_command(
     elif cmd == enum.MediaControlCommand.Seek and seek_position is None:
         raise HTTPException(status_code=400, detail=f'Seek command requires seek_position argument')
 
-    await console.send_media_command(cmd, seek_position=seek_position)
-    return schemas.GeneralResponse(success=True)
+    success = await console.send_media_command(cmd, seek_position=seek_position, wait=wait)
+    return schemas.GeneralResponse(success=success)
 
 
 @router.get('/{liveid}/input', response_model=schemas.InputResponse)
@@ -23,6 +23,7 @@ class ActiveTitle(BaseModel):
     title_location: str
     product_id: str
     sandbox_id: str
+    running_since: Optional[float]
 
 class ConsoleStatusResponse(BaseModel):
     live_tv_provider: str
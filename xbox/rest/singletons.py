@@ -1,3 +1,4 @@
+import asyncio
 import aiohttp
 from typing import Dict, Optional
 
@@ -16,4 +17,5 @@ xbl_client: Optional[XboxLiveClient] = None
 auth_session_configs: Dict[str, AuthSessionConfig] = dict()
 
 console_cache: Dict[str, ConsoleWrap] = dict()
+revalidate_task: Optional[asyncio.Task] = None
 title_cache: Dict[str, TitleHubResponse] = dict()
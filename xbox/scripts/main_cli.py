@@ -30,6 +30,7 @@ from xbox.webapi.common.exceptions import AuthenticationException
 
 from xbox.sg import manager
 from xbox.sg.console import Console
+from xbox.sg.fleet import Fleet
 from xbox.sg.enum import ConnectionState
 
 
@@ -115,6 +116,10 @@ def parse_arguments(args: List[str] = None):
     connection_arg.add_argument(
         '--liveid', '-l',
         help='LiveID to poweron')
+    connection_arg.add_argument(
+        '--subnet', '-s', action='append', default=None,
+        help='Subnet (CIDR) to sweep with unicast discovery, can be passed '
+             'multiple times')
 
     """Common argument for interactively choosing console to handle"""
     interactive_arg = argparse.ArgumentParser(add_help=False)
@@ -315,8 +320,18 @@ async def cli_discover_consoles(args: argparse.Namespace) -> List[Console]:
     """
     Discover consoles
     """
-    LOGGER.info(f'Sending discovery packets to IP: {args.address}')
-    discovered = await Console.discover(addr=args.address, timeout=1)
+    if args.subnet:
+        LOGGER.info(f'Sweeping subnets: {", ".join(args.subnet)}')
+        discovered = await Console.discover(
+            networks=args.subnet, tries=2, timeout=5,
+            until_liveid=args.liveid, until_addr=args.address
+        )
+    else:
+        LOGGER.info(f'Sending discovery packets to IP: {args.address}')
+        discovered = await Console.discover(
+            addr=args.address, timeout=1,
+            until_liveid=args.liveid, until_addr=args.address
+        )
 
     if not len(discovered):
         LOGGER.error('No consoles discovered')
@@ -416,16 +431,27 @@ async def main_async(loop: asyncio.AbstractEventLoop, command: Commands = None)
             LOGGER.error('No LiveID (--liveid) provided for power on!')
             sys.exit(ExitCodes.ArgParsingError)
 
+        # Consoles known from previous runs
+        registry = Console.get_registry()
+        registry.load(CONSOLES_FILE)
+
+        address = args.address
+        known = registry.get(args.liveid)
+        if not address and known:
+            LOGGER.debug('Using last known address of {0}'.format(known))
+            address = known.address
+
         LOGGER.info('Sending poweron packet for LiveId: {0} to {1}'
                     .format(args.liveid,
-                            'IP: ' + args.address if args.address else 'MULTICAST'))
-        await Console.power_on(args.liveid, args.address, tries=10)
+                            'IP: ' + address if address else 'MULTICAST'))
+        await Console.power_on(args.liveid, address, tries=10)
         sys.exit(0)
 
     """
     Discovery
     """
     discovered = await cli_discover_consoles(args)
+    Console.get_registry().save(CONSOLES_FILE, discovered)
 
     if command == Commands.Discover:
         """
@@ -441,9 +467,18 @@ async def main_async(loop: asyncio.AbstractEventLoop, command: Commands = None)
         Early call for poweroff --all
         """
         """Powering off all discovered consoles"""
-        for c in discovered:
-            print('Powering off console {0}'.format(c))
-            await c.power_off()
+        userhash = ''
+        xsts_token = ''
+        if auth_manager:
+            userhash = auth_manager.xsts_token.userhash
+            xsts_token = auth_manager.xsts_token.token
+
+        print('Powering off consoles: {0}'.format(
+            ', '.join([str(c) for c in discovered])))
+        fleet = Fleet([c.liveid for c in discovered])
+        for result in await fleet.power_off(userhash, xsts_token):
+            print('  {0.liveid} ({0.address}): {1}'.format(
+                result, 'OK' if result.success else result.error))
         sys.exit(ExitCodes.OK)
 
     """
@@ -35,16 +35,23 @@ import asyncio
 import socket
 import logging
 from uuid import UUID
-from typing import Optional, List, Union, Dict, Type
+from collections import deque
+from binascii import hexlify, unhexlify
+from typing import Optional, List, Union, Dict, Type, AsyncIterator, \
+    Iterable
 
 from cryptography.hazmat.primitives.asymmetric.ec import EllipticCurvePublicKey
+from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
 from xbox.sg.crypto import Crypto
 from xbox.sg.manager import Manager
 from xbox.sg.enum import PairedIdentityState, DeviceStatus, ConnectionState, \
     MessageType, PrimaryDeviceFlag, ActiveTitleLocation, AckStatus, \
     ServiceChannel, MediaControlCommand, GamePadButton
 from xbox.sg.protocol import SmartglassProtocol, ProtocolError
-from xbox.sg.utils.events import Event
+from xbox.sg.registry import ConsoleRegistry
+from xbox.sg.tracker import TitleTracker
+from xbox.sg.utils.events import Event, MessageDispatcher
+from xbox.sg.utils.stream import MessageStream, OverflowPolicy
 from xbox.sg.utils.struct import XStruct
 from xbox.stump.manager import StumpManager
 
@@ -53,6 +60,10 @@ LOGGER = logging.getLogger(__name__)
 
 class Console(object):
     __protocol__: SmartglassProtocol = None
+    __registry__: ConsoleRegistry = None
+    MESSAGE_HISTORY = 32
+    # Reuse parsed payloads of repeated status messages
+    DECODE_MEMO = True
 
     def __init__(
         self,
@@ -81,11 +92,12 @@ class Console(object):
         self.liveid = liveid
         self.flags = flags
         self.last_error = last_error
+        self.last_seen: Optional[float] = None
         self._public_key = None
         self._crypto = None
 
         if public_key:
-            # This sets up the crypto context
+            # Crypto context is set up lazily, see `crypto`
             self.public_key = public_key
 
         self._device_status = DeviceStatus.Unavailable
@@ -93,6 +105,7 @@ class Console(object):
         self._pairing_state = PairedIdentityState.NotPaired
         self._console_status = None
         self._active_surface = None
+        self.title_tracker = TitleTracker()
 
         self.on_device_status = Event()
         self.on_connection_state = Event()
@@ -106,6 +119,11 @@ class Console(object):
 
         self.on_message = Event()
         self.on_json = Event()
+        # Fired with (msg, channel) for every message sent
+        self.on_send = Event()
+        self._message_dispatcher = MessageDispatcher()
+        self._json_dispatcher = MessageDispatcher()
+        self._message_history = deque(maxlen=self.MESSAGE_HISTORY)
 
         self.power_on = self._power_on  # Dirty hack
 
@@ -143,9 +161,15 @@ class Console(object):
             None
         """
         if not self.protocol:
+            if not self._crypto and self._public_key:
+                # Key exchange is CPU bound, keep it off the event loop
+                self._crypto = await Crypto.create_async(self._public_key)
+
             loop = asyncio.get_running_loop()
             _, self.protocol = await loop.create_datagram_endpoint(
-                lambda: SmartglassProtocol(self.address, self._crypto),
+                lambda: SmartglassProtocol(
+                    self.address, self.crypto, self.DECODE_MEMO
+                ),
                 family=socket.AF_INET,
                 remote_addr=(self.address, 5050),
                 allow_broadcast=True
@@ -167,6 +191,49 @@ class Console(object):
                 family=socket.AF_INET,
                 allow_broadcast=True
             )
+            cls.__protocol__.on_discover += cls.get_registry().update
+
+    def _close_protocol(self) -> None:
+        """
+        Close the console specific protocol instance, if any.
+
+        A new one is created on next use, e.g. after the address changed.
+
+        Returns: None
+        """
+        if self.protocol:
+            if self.protocol._transport:
+                self.protocol._transport.close()
+            self.protocol = None
+
+    @classmethod
+    def get_registry(cls) -> ConsoleRegistry:
+        """
+        Registry of known consoles, shared by all discovery methods.
+
+        Returns: Console registry
+        """
+        if not cls.__registry__:
+            cls.__registry__ = ConsoleRegistry(cls)
+        return cls.__registry__
+
+    @classmethod
+    def _registered(cls, address: str, msg: XStruct):
+        """
+        Registered console for a discovery response.
+
+        Responses are processed by the registry via `on_discover` already,
+        it is only updated here for responses it did not see.
+
+        Args:
+            address: IP address of the console
+            msg: Discovery Response struct
+
+        Returns: Registered console instance
+        """
+        registry = cls.get_registry()
+        console = registry.get(msg.unprotected_payload.cert.liveid)
+        return console or registry.update(address, msg)
 
     @classmethod
     def from_message(cls, address: str, msg: XStruct):
@@ -190,14 +257,38 @@ class Console(object):
 
     @classmethod
     def from_dict(cls, d: dict):
-        return cls(d['address'], d['name'], UUID(d['uuid']), d['liveid'])
+        """
+        Initialize the class from a dict, as created by :meth:`to_dict`.
+
+        Args:
+            d: Console dict
+
+        Returns: Console instance
+        """
+        public_key = d.get('public_key')
+        console = cls(
+            d['address'], d['name'], UUID(d['uuid']), d['liveid'],
+            PrimaryDeviceFlag(d.get('flags', 0)),
+            public_key=unhexlify(public_key) if public_key else None
+        )
+        console.last_seen = d.get('last_seen')
+        return console
 
     def to_dict(self) -> dict:
+        public_key = None
+        if self.public_key:
+            public_key = hexlify(self.public_key.public_bytes(
+                Encoding.X962, PublicFormat.UncompressedPoint
+            )).decode('utf-8')
+
         return dict(
             address=self.address,
             name=self.name,
             uuid=str(self.uuid),
-            liveid=self.liveid
+            liveid=self.liveid,
+            flags=self.flags.value,
+            public_key=public_key,
+            last_seen=self.last_seen
         )
 
     def add_manager(self, manager: Type[Manager], *args, **kwargs):
@@ -232,6 +323,138 @@ class Console(object):
 
             self._functions[item] = getattr(manager_inst, item)
 
+    def subscribe(
+        self,
+        handler,
+        channel: ServiceChannel,
+        msg_type: Optional[MessageType] = None
+    ) -> None:
+        """
+        Subscribe to messages of a service channel, optionally only
+        to a specific message type.
+
+        Unlike `on_message`, the handler is only called for matching
+        messages.
+
+        Args:
+            handler: Callable, receiving (msg, channel)
+            channel: Service channel
+            msg_type: Message type, `None` for all messages of the channel
+
+        Returns: None
+        """
+        self._message_dispatcher.subscribe(handler, channel, msg_type)
+
+    def unsubscribe(
+        self,
+        handler,
+        channel: ServiceChannel,
+        msg_type: Optional[MessageType] = None
+    ) -> None:
+        """
+        Remove a handler added via :meth:`subscribe`.
+
+        Args:
+            handler: Callable
+            channel: Service channel
+            msg_type: Message type
+
+        Returns: None
+        """
+        self._message_dispatcher.unsubscribe(handler, channel, msg_type)
+
+    def subscribe_json(self, handler, channel: ServiceChannel) -> None:
+        """
+        Subscribe to JSON messages of a service channel.
+
+        Args:
+            handler: Callable, receiving (data, channel)
+            channel: Service channel
+
+        Returns: None
+        """
+        self._json_dispatcher.subscribe(handler, channel)
+
+    def unsubscribe_json(self, handler, channel: ServiceChannel) -> None:
+        """
+        Remove a handler added via :meth:`subscribe_json`.
+
+        Args:
+            handler: Callable
+            channel: Service channel
+
+        Returns: None
+        """
+        self._json_dispatcher.unsubscribe(handler, channel)
+
+    def messages(
+        self,
+        channel: Optional[ServiceChannel] = None,
+        types: Optional[Iterable[MessageType]] = None,
+        maxsize: int = MessageStream.DEFAULT_MAXSIZE,
+        overflow: OverflowPolicy = OverflowPolicy.DropOldest,
+        replay: int = 0
+    ) -> MessageStream:
+        """
+        Stream of incoming messages, to be consumed with `async for`.
+
+        Messages are buffered per stream, a slow consumer never blocks
+        message handling. Close the stream (or use it as async context
+        manager) to unsubscribe.
+
+        Example:
+            Wait for console status updates::
+
+                async with console.messages(
+                    ServiceChannel.Core, [MessageType.ConsoleStatus]
+                ) as stream:
+                    async for msg in stream:
+                        print(msg.protected_payload)
+
+        Args:
+            channel: Service channel, `None` for all channels
+            types: Message types, `None` for all types
+            maxsize: Max. buffered messages
+            overflow: What to do when the buffer is full
+            replay: Start with up to this many recent matching messages
+                    (max. `MESSAGE_HISTORY`)
+
+        Returns: Message stream
+        """
+        types = tuple(types) if types else None
+
+        def matches(msg: XStruct, msg_channel: ServiceChannel) -> bool:
+            if channel is not None and msg_channel != channel:
+                return False
+            return not types or msg.header.flags.msg_type in types
+
+        def handler(msg: XStruct, msg_channel: ServiceChannel) -> None:
+            stream.put(msg)
+
+        def filtered_handler(msg: XStruct, msg_channel: ServiceChannel) -> None:
+            if matches(msg, msg_channel):
+                stream.put(msg)
+
+        def on_close(_) -> None:
+            if channel is None:
+                self.on_message -= filtered_handler
+            else:
+                for msg_type in types or (None,):
+                    self.unsubscribe(handler, channel, msg_type)
+
+        stream = MessageStream(maxsize, overflow, on_close)
+        if replay:
+            history = [m for m, c in self._message_history if matches(m, c)]
+            for msg in history[-replay:]:
+                stream.put(msg)
+
+        if channel is None:
+            self.on_message += filtered_handler
+        else:
+            for msg_type in types or (None,):
+                self.subscribe(handler, channel, msg_type)
+        return stream
+
     def __getattr__(self, k: str):
         """
         Accessor to manager functions
@@ -256,13 +479,65 @@ class Console(object):
             *args:
             **kwargs:
 
+        Consoles are taken from the registry (see :meth:`get_registry`),
+        repeated discoveries return the same instances.
+
         Returns:
             list: List of discovered consoles.
 
         """
         await cls._ensure_global_protocol_started()
         discovered = await cls.__protocol__.discover(*args, **kwargs)
-        return [cls.from_message(a, m) for a, m in discovered.items()]
+        return [cls._registered(a, m) for a, m in discovered.items()]
+
+    @classmethod
+    async def discover_iter(cls, *args, **kwargs) -> AsyncIterator:
+        """
+        Discover consoles on the network, yielding each console as soon as
+        it responds.
+
+        See :meth:`SmartglassProtocol.discover_iter` for arguments.
+
+        Example:
+            Stop as soon as a specific console was found::
+
+                async for console in Console.discover_iter(until_liveid=liveid):
+                    print(console)
+
+        Args:
+            *args:
+            **kwargs:
+
+        Returns:
+            Async iterator of discovered consoles.
+        """
+        await cls._ensure_global_protocol_started()
+        async for a, m in cls.__protocol__.discover_iter(*args, **kwargs):
+            yield cls._registered(a, m)
+
+    @classmethod
+    async def revalidate(cls, tries: int = 2, timeout: int = 2) -> List:
+        """
+        Send unicast discovery requests to the last known address of every
+        registered console, e.g. after loading them from disk.
+
+        Consoles which respond are updated in place by the registry.
+
+        Args:
+            tries: Discover attempts
+            timeout: Timeout in seconds
+
+        Returns:
+            list: List of consoles that responded.
+        """
+        addresses = sorted({c.address for c in cls.get_registry()})
+        if not addresses:
+            return []
+
+        return [c async for c in cls.discover_iter(
+            networks=addresses, tries=tries, timeout=timeout,
+            max_consoles=len(addresses)
+        )]
 
     @classmethod
     def discovered(cls) -> List:
@@ -274,7 +549,7 @@ class Console(object):
 
         """
         discovered = cls.__protocol__.discovered
-        return [cls.from_message(a, m) for a, m in discovered.items()]
+        return [cls._registered(a, m) for a, m in discovered.items()]
 
     @classmethod
     async def power_on(
@@ -289,6 +564,7 @@ class Console(object):
         Optionally the IP address of the console can be supplied,
         this is useful if the console is stubborn and does not react
         to broadcast / multicast packets (due to routing issues).
+        If omitted, the last known address from the registry is used.
 
         Args:
             liveid (str): Live ID of console.
@@ -298,6 +574,10 @@ class Console(object):
         Returns: None
 
         """
+        if not addr:
+            known = cls.get_registry().get(liveid)
+            addr = known.address if known else None
+
         await cls._ensure_global_protocol_started()
         await cls.__protocol__.power_on(liveid, addr, tries)
 
@@ -329,6 +609,7 @@ class Console(object):
             LOGGER.error('send_message: Protocol not ready')
             return
 
+        self.on_send(msg, channel)
         return await self.protocol.send_message(
             msg, channel, addr, blocking, timeout, retries
         )
@@ -479,6 +760,8 @@ class Console(object):
         elif msg_type == MessageType.ActiveSurfaceChange:
             self.active_surface = msg.protected_payload
 
+        self._message_history.append((msg, channel))
+        self._message_dispatcher.dispatch(msg, channel, msg_type)
         self.on_message(msg, channel)
 
     def _handle_json(self, msg: XStruct, channel: ServiceChannel) -> None:
@@ -491,6 +774,7 @@ class Console(object):
 
         Returns: None
         """
+        self._json_dispatcher.dispatch(msg, channel)
         self.on_json(msg, channel)
 
     def _handle_timeout(self) -> None:
@@ -531,11 +815,29 @@ class Console(object):
     @public_key.setter
     def public_key(self, key: Union[EllipticCurvePublicKey, bytes]) -> None:
         if isinstance(key, bytes):
-            self._crypto = Crypto.from_bytes(key)
-        else:
-            self._crypto = Crypto(key)
+            key = Crypto.load_public_key(key)
+        elif not isinstance(key, EllipticCurvePublicKey):
+            raise ValueError("Unsupported public key format, "
+                             "expected EllipticCurvePublicKey")
 
-        self._public_key = self._crypto.foreign_pubkey
+        if key != self._public_key:
+            self._crypto = None
+        self._public_key = key
+
+    @property
+    def crypto(self) -> Optional[Crypto]:
+        """
+        Crypto context, derived from the console's public key.
+
+        Keypair generation is deferred until first access (usually on
+        `connect`), discovered consoles which are never connected to
+        don't pay for it.
+
+        Returns: Crypto context or `None` if public key is unknown
+        """
+        if not self._crypto and self._public_key:
+            self._crypto = Crypto(self._public_key)
+        return self._crypto
 
     @property
     def device_status(self) -> DeviceStatus:
@@ -594,6 +896,7 @@ class Console(object):
     @console_status.setter
     def console_status(self, status):
         self._console_status = status
+        self.title_tracker.update(status)
         self.on_console_status(status)
 
     @property
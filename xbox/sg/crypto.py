@@ -24,10 +24,17 @@ can be used:
 
 6. The resulting `public key` from this :class:`Crypto` context is
    sent with the ConnectRequest message to the console
+
+Private keys are taken from a per-curve :class:`KeyPool`, which is
+refilled by a background thread. Use :meth:`Crypto.create_async` to
+run the key exchange off the event loop.
 """
 import os
 import hmac
+import asyncio
 import hashlib
+import threading
+from collections import deque
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives.asymmetric import ec
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
@@ -83,6 +90,86 @@ class Salt(object):
         raise ValueError("Unknown salt type: " + str(self.type))
 
 
+class KeyPool(object):
+    DEFAULT_SIZE = 16
+
+    def __init__(self, curve, size=DEFAULT_SIZE):
+        """
+        Pool of pre-generated private keys for a single curve.
+
+        Keys are handed out once. When the pool runs below half of its
+        size, a background thread refills it, so keypair generation
+        does not happen on the caller's (event loop) thread.
+
+        Args:
+            curve (type): Elliptic curve class, e.g. `ec.SECP256R1`
+            size (int): Number of keys to keep ready
+        """
+        self.curve = curve
+        self.size = size
+        self._keys = deque()
+        self._lock = threading.Lock()
+        self._refill_thread = None
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _generate(self):
+        return ec.generate_private_key(self.curve(), default_backend())
+
+    def get(self):
+        """
+        Take a private key from the pool.
+
+        Generates one synchronously if the pool is drained.
+
+        Returns:
+            :obj:`ec.EllipticCurvePrivateKey`: Unused private key
+        """
+        try:
+            key = self._keys.popleft()
+        except IndexError:
+            key = self._generate()
+
+        if len(self._keys) < self.size // 2:
+            self.refill()
+        return key
+
+    def refill(self, wait=False):
+        """
+        Start refilling the pool in a background thread, if not already
+        running.
+
+        Args:
+            wait (bool): Block until the pool is full
+
+        Returns:
+            None
+        """
+        with self._lock:
+            if not self._refill_thread:
+                self._refill_thread = threading.Thread(
+                    target=self._refill, daemon=True,
+                    name='KeyPool-%s' % self.curve.name
+                )
+                self._refill_thread.start()
+            thread = self._refill_thread
+
+        if wait:
+            thread.join()
+
+    def _refill(self):
+        try:
+            while len(self._keys) < self.size:
+                self._keys.append(self._generate())
+        finally:
+            with self._lock:
+                self._refill_thread = None
+
+
+KEY_POOLS = {curve: KeyPool(curve) for curve in CURVE_MAP.values()}
+
+
 class Crypto(object):
     _backend = default_backend()
 
@@ -111,9 +198,13 @@ class Crypto(object):
             raise ValueError("Unsupported private key format, \
                 expected EllipticCurvePrivateKey")
         elif not privkey:
-            privkey = ec.generate_private_key(
-                foreign_public_key.curve, self._backend
-            )
+            pool = KEY_POOLS.get(type(foreign_public_key.curve))
+            if pool:
+                privkey = pool.get()
+            else:
+                privkey = ec.generate_private_key(
+                    foreign_public_key.curve, self._backend
+                )
 
         if pubkey and not isinstance(pubkey, ec.EllipticCurvePublicKey):
             raise ValueError("Unsupported public key format, \
@@ -139,6 +230,24 @@ class Crypto(object):
             encoding=Encoding.X962)[1:]
         self._foreign_pubkey = foreign_public_key
 
+    @classmethod
+    async def create_async(cls, foreign_public_key, executor=None):
+        """
+        Initialize Crypto context in an executor, keeping the ECDH key
+        exchange and key derivation off the event loop.
+
+        Args:
+            foreign_public_key (:obj:`ec.EllipticCurvePublicKey`):
+                The console's public key
+            executor (:obj:`concurrent.futures.Executor`): Optional executor,
+                defaults to the loop's default executor
+
+        Returns:
+            :obj:`.Crypto`: Instance
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, cls, foreign_public_key)
+
     @property
     def shared_secret(self):
         """
@@ -180,18 +289,17 @@ class Crypto(object):
         """
         return self._foreign_pubkey
 
-    @classmethod
-    def from_bytes(cls, foreign_public_key, public_key_type=None):
+    @staticmethod
+    def load_public_key(foreign_public_key, public_key_type=None):
         """
-        Initialize Crypto context with foreign public key in
-        bytes / hexstring format.
+        Decode a foreign public key from bytes / hexstring format.
 
         Args:
             foreign_public_key (bytes): Console's public key
             public_key_type (:obj:`.PublicKeyType`): Public Key Type
 
         Returns:
-            :obj:`.Crypto`: Instance
+            :obj:`ec.EllipticCurvePublicKey`: Decoded public key
         """
 
         if not isinstance(foreign_public_key, bytes):
@@ -210,10 +318,24 @@ class Crypto(object):
                 raise ValueError("Invalid public keylength")
 
         curve = CURVE_MAP[public_key_type]
-        foreign_public_key = ec.EllipticCurvePublicKey.from_encoded_point(
+        return ec.EllipticCurvePublicKey.from_encoded_point(
             curve(), foreign_public_key
         )
-        return cls(foreign_public_key)
+
+    @classmethod
+    def from_bytes(cls, foreign_public_key, public_key_type=None):
+        """
+        Initialize Crypto context with foreign public key in
+        bytes / hexstring format.
+
+        Args:
+            foreign_public_key (bytes): Console's public key
+            public_key_type (:obj:`.PublicKeyType`): Public Key Type
+
+        Returns:
+            :obj:`.Crypto`: Instance
+        """
+        return cls(cls.load_public_key(foreign_public_key, public_key_type))
 
     @classmethod
     def from_shared_secret(cls, shared_secret):
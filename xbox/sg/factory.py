@@ -352,6 +352,160 @@ def gamepad(timestamp, buttons, l_trigger, r_trigger, l_thumb_x, l_thumb_y,
     )
 
 
+def touch(timestamp, touchpoints, system=False, **kwargs):
+    """
+    Assemble TitleTouch / SystemTouch message.
+
+    Args:
+        timestamp (int): Timestamp in milliseconds.
+        touchpoints (list): List of touchpoint containers, see
+                            :func:`touchpoint`.
+        system (bool): Assemble SystemTouch instead of TitleTouch.
+
+    Returns:
+        :class:`XStructObj`: Instance of :class:`:class:`XStructObj``.
+    """
+    msg_type = MessageType.SystemTouch if system else MessageType.TitleTouch
+    return message.struct(
+        header=_message_header(msg_type, **kwargs),
+        protected_payload=message.touch(
+            touch_msg_timestamp=timestamp,
+            touchpoints=touchpoints
+        )
+    )
+
+
+def touchpoint(touchpoint_id, action, x, y):
+    """
+    Assemble single touchpoint, to be used in :func:`touch`.
+
+    Args:
+        touchpoint_id (int): Touchpoint Id, constant while touching.
+        action (:class:`TouchAction`): Touch action.
+        x (int): X coordinate.
+        y (int): Y coordinate.
+
+    Returns:
+        :class:`Container`: Touchpoint.
+    """
+    return Container(
+        touchpoint_id=touchpoint_id,
+        touchpoint_action=action,
+        touchpoint_x=x,
+        touchpoint_y=y
+    )
+
+
+def accelerometer(timestamp, x, y, z, **kwargs):
+    """
+    Assemble Accelerometer message.
+
+    Args:
+        timestamp (longlong): Timestamp.
+        x (float): Acceleration, X-Axis.
+        y (float): Acceleration, Y-Axis.
+        z (float): Acceleration, Z-Axis.
+
+    Returns:
+        :class:`XStructObj`: Instance of :class:`:class:`XStructObj``.
+    """
+    return message.struct(
+        header=_message_header(MessageType.Accelerometer, **kwargs),
+        protected_payload=message.accelerometer(
+            timestamp=timestamp,
+            acceleration_x=x, acceleration_y=y, acceleration_z=z
+        )
+    )
+
+
+def gyrometer(timestamp, x, y, z, **kwargs):
+    """
+    Assemble Gyrometer message.
+
+    Args:
+        timestamp (longlong): Timestamp.
+        x (float): Angular velocity, X-Axis.
+        y (float): Angular velocity, Y-Axis.
+        z (float): Angular velocity, Z-Axis.
+
+    Returns:
+        :class:`XStructObj`: Instance of :class:`:class:`XStructObj``.
+    """
+    return message.struct(
+        header=_message_header(MessageType.Gyrometer, **kwargs),
+        protected_payload=message.gyrometer(
+            timestamp=timestamp,
+            angular_velocity_x=x, angular_velocity_y=y, angular_velocity_z=z
+        )
+    )
+
+
+def inclinometer(timestamp, pitch, roll, yaw, **kwargs):
+    """
+    Assemble Inclinometer message.
+
+    Args:
+        timestamp (longlong): Timestamp.
+        pitch (float): Pitch.
+        roll (float): Roll.
+        yaw (float): Yaw.
+
+    Returns:
+        :class:`XStructObj`: Instance of :class:`:class:`XStructObj``.
+    """
+    return message.struct(
+        header=_message_header(MessageType.Inclinometer, **kwargs),
+        protected_payload=message.inclinometer(
+            timestamp=timestamp, pitch=pitch, roll=roll, yaw=yaw
+        )
+    )
+
+
+def compass(timestamp, magnetic_north, true_north, **kwargs):
+    """
+    Assemble Compass message.
+
+    Args:
+        timestamp (longlong): Timestamp.
+        magnetic_north (float): Heading to magnetic north.
+        true_north (float): Heading to true north.
+
+    Returns:
+        :class:`XStructObj`: Instance of :class:`:class:`XStructObj``.
+    """
+    return message.struct(
+        header=_message_header(MessageType.Compass, **kwargs),
+        protected_payload=message.compass(
+            timestamp=timestamp,
+            magnetic_north=magnetic_north, true_north=true_north
+        )
+    )
+
+
+def orientation(timestamp, rotation_matrix_value, w, x, y, z, **kwargs):
+    """
+    Assemble Orientation message.
+
+    Args:
+        timestamp (longlong): Timestamp.
+        rotation_matrix_value (float): Rotation matrix value.
+        w (float): Quaternion W.
+        x (float): Quaternion X.
+        y (float): Quaternion Y.
+        z (float): Quaternion Z.
+
+    Returns:
+        :class:`XStructObj`: Instance of :class:`:class:`XStructObj``.
+    """
+    return message.struct(
+        header=_message_header(MessageType.Orientation, **kwargs),
+        protected_payload=message.orientation(
+            timestamp=timestamp, rotation_matrix_value=rotation_matrix_value,
+            w=w, x=x, y=y, z=z
+        )
+    )
+
+
 def unsnap(unknown, **kwargs):
     """
     Assemble unsnap message.
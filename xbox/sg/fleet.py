@@ -0,0 +1,238 @@
+"""
+Fleet operations
+
+Power on, power off and verify the state of many consoles concurrently,
+with a bounded number of operations in flight.
+
+Targets are given as Live IDs or IP addresses. Addresses are resolved
+to Live IDs (and vice versa) through the console registry, see
+:meth:`Console.get_registry`.
+
+Power on packets and discovery requests for verification are sent
+via the shared, global protocol socket. Powering off requires an
+authenticated session per console, so these use a connection each.
+
+Example:
+    Turn on a lab of consoles and wait until they respond::
+
+        from xbox.sg.fleet import Fleet
+
+        fleet = Fleet(['FD00112233FFEE66', '10.0.0.23'], concurrency=32)
+        results = await fleet.power_on(verify=True, timeout=30)
+        for result in results:
+            print(result)
+"""
+import time
+import asyncio
+import logging
+import ipaddress
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from xbox.sg.console import Console
+from xbox.sg.enum import ConnectionState
+from xbox.sg.protocol import SmartglassProtocol
+
+LOGGER = logging.getLogger(__name__)
+
+
+class FleetResult(NamedTuple):
+    """
+    Outcome of a fleet operation for a single target
+    """
+    target: str
+    liveid: Optional[str]
+    address: Optional[str]
+    success: bool
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+
+def _is_address(target: str) -> bool:
+    try:
+        ipaddress.ip_address(target)
+        return True
+    except ValueError:
+        return False
+
+
+class Fleet(object):
+    DEFAULT_CONCURRENCY = 16
+
+    def __init__(
+        self,
+        targets: Iterable[str],
+        concurrency: int = DEFAULT_CONCURRENCY,
+        console_cls=Console
+    ):
+        """
+        Group of consoles to run operations on.
+
+        Args:
+            targets: Live IDs and / or IP addresses of consoles
+            concurrency: Max. operations in flight
+            console_cls: Console class, providing protocol and registry
+        """
+        # Keep order, drop duplicates
+        self.targets = list(dict.fromkeys(targets))
+        self.concurrency = concurrency
+        self.console_cls = console_cls
+
+    def resolve(self, target: str) -> Tuple[Optional[str], Optional[str], Optional[Console]]:
+        """
+        Resolve target via the console registry.
+
+        Args:
+            target: Live ID or IP address
+
+        Returns: Tuple of (liveid, address, console), unknown parts are `None`
+        """
+        registry = self.console_cls.get_registry()
+        if _is_address(target):
+            consoles = registry.by_address(target)
+            console = consoles[0] if consoles else None
+            return (console.liveid if console else None), target, console
+
+        console = registry.get(target)
+        return target, (console.address if console else None), console
+
+    async def _run(self, operation, targets: List[str]) -> List[FleetResult]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def _run_single(target: str) -> FleetResult:
+            liveid, address, console = self.resolve(target)
+            async with semaphore:
+                start = time.monotonic()
+                try:
+                    error = await operation(liveid, address, console)
+                except Exception as e:
+                    LOGGER.debug(f'Fleet operation failed for {target}',
+                                 exc_info=True)
+                    error = str(e) or e.__class__.__name__
+
+                return FleetResult(
+                    target, liveid, address, error is None, error,
+                    time.monotonic() - start
+                )
+
+        return await asyncio.gather(*[_run_single(t) for t in targets])
+
+    async def power_on(
+        self,
+        tries: int = 2,
+        verify: bool = False,
+        timeout: float = 30
+    ) -> List[FleetResult]:
+        """
+        Power on all consoles.
+
+        Args:
+            tries: Poweron attempts per console
+            verify: Wait for the consoles to respond to discovery
+            timeout: Verification timeout in seconds
+
+        Returns: List of results, in order of targets
+        """
+        await self.console_cls._ensure_global_protocol_started()
+        protocol = self.console_cls.__protocol__
+
+        async def _power_on(liveid, address, console) -> Optional[str]:
+            if not liveid:
+                return 'Unknown Live ID'
+            await protocol.power_on(liveid, address, tries)
+
+        results = await self._run(_power_on, self.targets)
+        if not verify:
+            return results
+
+        sent = [r.target for r in results if r.success]
+        verified = {r.target: r for r in await self.verify(timeout, sent)}
+        return [verified.get(r.target, r) for r in results]
+
+    async def power_off(
+        self,
+        userhash: str = '',
+        xsts_token: str = ''
+    ) -> List[FleetResult]:
+        """
+        Power off all consoles, connecting to them if required.
+
+        Args:
+            userhash: Userhash for authenticated connections
+            xsts_token: XSTS token for authenticated connections
+
+        Returns: List of results, in order of targets
+        """
+        async def _power_off(liveid, address, console) -> Optional[str]:
+            if not console:
+                return 'Console unknown, discover it first'
+
+            if not console.connected:
+                state = await console.connect(userhash, xsts_token)
+                if state != ConnectionState.Connected:
+                    return f'Connection failed: {state.name}'
+
+            await console.power_off()
+
+        return await self._run(_power_off, self.targets)
+
+    async def verify(
+        self,
+        timeout: float = 5,
+        targets: Optional[List[str]] = None
+    ) -> List[FleetResult]:
+        """
+        Check which consoles respond to discovery.
+
+        Known addresses are probed via unicast, otherwise broadcast /
+        multicast discovery is used. Returns as soon as all consoles
+        responded.
+
+        Args:
+            timeout: Timeout in seconds
+            targets: Subset of targets to verify, defaults to all
+
+        Returns: List of results, in order of targets
+        """
+        targets = self.targets if targets is None else targets
+        if not targets:
+            return []
+
+        start = time.monotonic()
+        resolved = {t: self.resolve(t) for t in targets}
+        pending = set(targets)
+        addresses = {address for _, address, _ in resolved.values()}
+
+        # Keep asking until timeout, consoles take a while to boot up
+        tries = int(timeout / SmartglassProtocol.DISCOVERY_INTERVAL)
+        kwargs = dict(timeout=timeout, tries=max(1, tries))
+        if None not in addresses:
+            kwargs['networks'] = sorted(addresses)
+
+        found = {}
+        discovery = self.console_cls.discover_iter(**kwargs)
+        try:
+            async for console in discovery:
+                for target in list(pending):
+                    if target in (console.liveid, console.address):
+                        found[target] = (console, time.monotonic() - start)
+                        pending.remove(target)
+                if not pending:
+                    break
+        finally:
+            await discovery.aclose()
+
+        results = []
+        for target in targets:
+            liveid, address, _ = resolved[target]
+            if target in found:
+                console, elapsed = found[target]
+                results.append(FleetResult(
+                    target, console.liveid, console.address, True, None,
+                    elapsed
+                ))
+            else:
+                results.append(FleetResult(
+                    target, liveid, address, False, 'No response',
+                    time.monotonic() - start
+                ))
+        return results
@@ -0,0 +1,244 @@
+"""
+Gamepad streaming
+
+A :class:`GamepadSession` holds the current controller state and sends it
+at a fixed tick rate. State can be updated at any rate without awaiting
+anything, only the latest state is transmitted on the next tick and only
+if it changed since the last transmitted frame.
+
+Example:
+    Hold A for half a second, while moving the left stick::
+
+        async with console.gamepad_session(rate=120) as pad:
+            pad.press(GamePadButton.PadA)
+            for i in range(50):
+                pad.update(l_thumb_x=i / 50)
+                await asyncio.sleep(0.01)
+            pad.release(GamePadButton.PadA)
+"""
+import time
+import asyncio
+import logging
+from typing import Callable, NamedTuple, Optional, Union
+
+from xbox.sg import factory
+from xbox.sg.enum import GamePadButton, ServiceChannel
+from xbox.sg.utils.events import Event
+
+log = logging.getLogger(__name__)
+
+
+def button_bits(buttons: Union[GamePadButton, int]) -> int:
+    """
+    Bitmask of gamepad buttons.
+
+    Args:
+        buttons: Button or bitmask of buttons
+
+    Returns: Bitmask
+    """
+    if isinstance(buttons, GamePadButton):
+        return buttons.value
+    return int(buttons)
+
+
+class GamepadState(NamedTuple):
+    """
+    Controller state, as sent in a `Gamepad` message
+    """
+    buttons: int = 0
+    l_trigger: float = 0.0
+    r_trigger: float = 0.0
+    l_thumb_x: float = 0.0
+    l_thumb_y: float = 0.0
+    r_thumb_x: float = 0.0
+    r_thumb_y: float = 0.0
+
+
+class GamepadSession(object):
+    DEFAULT_RATE = 60
+
+    def __init__(
+        self,
+        console,
+        rate: float = DEFAULT_RATE,
+        channel: ServiceChannel = ServiceChannel.SystemInput,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Streaming controller session.
+
+        Args:
+            console: Console object
+            rate: Ticks per second
+            channel: Service channel to send on
+            clock: Monotonic time source
+        """
+        if rate <= 0:
+            raise ValueError('rate needs to be positive')
+
+        self.console = console
+        self.rate = rate
+        self.channel = channel
+        self.clock = clock
+
+        self.state = GamepadState()
+        self.last_sent: Optional[GamepadState] = None
+        self.frames_sent = 0
+        self.updates = 0
+
+        # Fired with (timestamp, state) for every transmitted frame
+        self.on_frame = Event()
+
+        # Single message, payload is updated in place for every frame
+        self._msg = factory.gamepad(0, 0, 0, 0, 0, 0, 0, 0)
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def interval(self) -> float:
+        return 1.0 / self.rate
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def set_state(self, state: GamepadState) -> None:
+        """
+        Replace the controller state, sent on the next tick.
+
+        Args:
+            state: New state
+
+        Returns: None
+        """
+        self.state = state
+        self.updates += 1
+
+    def update(self, buttons: Union[GamePadButton, int, None] = None, **axes) -> None:
+        """
+        Update buttons and / or axes, sent on the next tick.
+
+        Args:
+            buttons: New button bitmask, unchanged if `None`
+            **axes: Any of `l_trigger`, `r_trigger`, `l_thumb_x`,
+                    `l_thumb_y`, `r_thumb_x`, `r_thumb_y`
+
+        Returns: None
+        """
+        if buttons is not None:
+            axes['buttons'] = button_bits(buttons)
+        self.set_state(self.state._replace(**axes))
+
+    def press(self, buttons: Union[GamePadButton, int]) -> None:
+        """
+        Press buttons, keeping others pressed.
+
+        Args:
+            buttons: Button or bitmask of buttons
+
+        Returns: None
+        """
+        self.update(self.state.buttons | button_bits(buttons))
+
+    def release(self, buttons: Union[GamePadButton, int]) -> None:
+        """
+        Release buttons.
+
+        Args:
+            buttons: Button or bitmask of buttons
+
+        Returns: None
+        """
+        self.update(self.state.buttons & ~button_bits(buttons))
+
+    def reset(self) -> None:
+        """
+        Release all buttons and center all axes.
+
+        Returns: None
+        """
+        self.set_state(GamepadState())
+
+    async def flush(self) -> bool:
+        """
+        Send the current state now, if it changed.
+
+        Returns: `True` if a frame was sent
+        """
+        state = self.state
+        if state == self.last_sent:
+            return False
+
+        timestamp = int(time.time())
+        self._msg.protected_payload(
+            timestamp=timestamp,
+            buttons=state.buttons,
+            left_trigger=state.l_trigger,
+            right_trigger=state.r_trigger,
+            left_thumbstick_x=state.l_thumb_x,
+            left_thumbstick_y=state.l_thumb_y,
+            right_thumbstick_x=state.r_thumb_x,
+            right_thumbstick_y=state.r_thumb_y
+        )
+        # Mark as sent before awaiting, updates meanwhile go out next tick
+        self.last_sent = state
+        await self.console.send_message(self._msg, channel=self.channel)
+        self.frames_sent += 1
+        self.on_frame(timestamp, state)
+        return True
+
+    async def _run(self) -> None:
+        start = self.clock()
+        tick = 0
+        while True:
+            try:
+                await self.flush()
+            except Exception:
+                log.exception('Failed to send gamepad frame')
+
+            # Schedule against the start time, so the rate doesn't drift.
+            # Ticks that were missed are skipped, not caught up on, since
+            # only the latest state is of interest.
+            elapsed = self.clock() - start
+            tick = max(tick + 1, int(elapsed * self.rate) + 1)
+            delay = start + tick * self.interval - self.clock()
+            await asyncio.sleep(max(0.0, delay))
+
+    def start(self) -> None:
+        """
+        Start transmitting at the configured rate.
+
+        Returns: None
+        """
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self, reset: bool = True) -> None:
+        """
+        Stop transmitting.
+
+        Args:
+            reset: Release all buttons and center axes before stopping
+
+        Returns: None
+        """
+        if not self._task:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        if reset:
+            self.reset()
+            await self.flush()
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.stop()
@@ -0,0 +1,386 @@
+"""
+Input macros
+
+A macro is a timeline of input steps (gamepad, media commands, text),
+played back against a monotonic clock. Every step is scheduled relative
+to the start of the macro, so timing errors do not accumulate, and the
+observed oversleep of the event loop is compensated on following steps.
+Gamepad and media command messages are assembled before playback starts.
+
+Macro file format, one step per line::
+
+    # time   action   arguments
+    0        press    PadA
+    0.1      release  PadA
+    +0.5     tap      DPadDown 0.05
+    +0.2     axis     l_thumb_x=0.5 l_trigger=1
+    +0.2     clear
+    1.5      media    PlayPauseToggle
+    +1       seek     600000000
+    2        text     hello world
+    +0.5     done
+
+Time is given in seconds, either absolute or, prefixed with `+`,
+relative to the previous step. Buttons can be combined with `+`
+(e.g. `PadA+PadB`). `tap` presses and releases after the given hold
+time (default: 0.1s).
+
+Example:
+    Play a macro and check its timing::
+
+        macro = Macro.load('navigate.macro')
+        player = MacroPlayer(console, macro)
+        timings = await player.run()
+        print(max(abs(t.deviation) for t in timings))
+"""
+import time
+import shlex
+import asyncio
+import logging
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple
+
+from xbox.sg import factory
+from xbox.sg.enum import GamePadButton, MediaControlCommand, ServiceChannel
+from xbox.sg.gamepad import GamepadState
+
+log = logging.getLogger(__name__)
+
+GAMEPAD_ACTIONS = ('press', 'release', 'axis', 'clear')
+MEDIA_ACTIONS = ('media', 'seek')
+TEXT_ACTIONS = ('text', 'done')
+AXES = GamepadState._fields[1:]
+
+
+class MacroError(Exception):
+    """
+    Exception thrown on invalid macros
+    """
+    pass
+
+
+class MacroStep(NamedTuple):
+    """
+    Single step of a macro
+    """
+    at: float
+    action: str
+    args: Tuple[str, ...] = ()
+
+
+class StepTiming(NamedTuple):
+    """
+    Intended vs. actual time of a played step, in seconds from start
+    """
+    step: MacroStep
+    intended: float
+    actual: float
+    error: Optional[str] = None
+
+    @property
+    def deviation(self) -> float:
+        return self.actual - self.intended
+
+
+def _parse_buttons(value: str) -> int:
+    bits = 0
+    for name in value.split('+'):
+        try:
+            bits |= GamePadButton[name].value
+        except KeyError:
+            raise MacroError(f'Unknown button: {name}')
+    return bits
+
+
+def _parse_axes(args: Tuple[str, ...]) -> dict:
+    axes = {}
+    for arg in args:
+        name, _, value = arg.partition('=')
+        if name not in AXES:
+            raise MacroError(f'Unknown axis: {name}')
+        axes[name] = float(value)
+    return axes
+
+
+class Macro(object):
+    DEFAULT_HOLD = 0.1
+
+    def __init__(self, steps: List[MacroStep]):
+        """
+        Timeline of input steps.
+
+        Args:
+            steps: Steps, sorted by time on creation
+        """
+        self.steps = sorted(steps, key=lambda s: s.at)
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def __iter__(self) -> Iterator[MacroStep]:
+        return iter(self.steps)
+
+    @property
+    def duration(self) -> float:
+        return self.steps[-1].at if self.steps else 0.0
+
+    @classmethod
+    def parse(cls, text: str) -> 'Macro':
+        """
+        Parse macro from text.
+
+        Args:
+            text: Macro in text format, see module documentation
+
+        Raises:
+            MacroError: On syntax errors
+
+        Returns: Macro
+        """
+        steps = []
+        previous = 0.0
+        for lineno, line in enumerate(text.splitlines(), 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+
+            try:
+                if line.split(None, 2)[1] == 'text':
+                    # Keep text verbatim
+                    timestamp, action, *args = line.split(None, 2)
+                else:
+                    timestamp, action, *args = shlex.split(line)
+
+                if timestamp.startswith('+'):
+                    at = round(previous + float(timestamp[1:]), 6)
+                else:
+                    at = float(timestamp)
+            except (IndexError, ValueError):
+                raise MacroError(f'Line {lineno}: Invalid step: {line}')
+
+            if action == 'tap':
+                if not args:
+                    raise MacroError(f'Line {lineno}: tap needs a button')
+                hold = float(args[1]) if len(args) > 1 else cls.DEFAULT_HOLD
+                steps.append(MacroStep(at, 'press', (args[0],)))
+                steps.append(
+                    MacroStep(round(at + hold, 6), 'release', (args[0],))
+                )
+            elif action in GAMEPAD_ACTIONS + MEDIA_ACTIONS + TEXT_ACTIONS:
+                steps.append(MacroStep(at, action, tuple(args)))
+            else:
+                raise MacroError(f'Line {lineno}: Unknown action: {action}')
+            previous = at
+
+        return cls(steps)
+
+    @classmethod
+    def load(cls, filepath: str) -> 'Macro':
+        """
+        Load macro from file.
+
+        Args:
+            filepath: Path to macro file
+
+        Returns: Macro
+        """
+        with open(filepath, 'r') as fh:
+            return cls.parse(fh.read())
+
+    def dumps(self) -> str:
+        """
+        Serialize macro to text format, with absolute timestamps.
+
+        Returns: Macro text
+        """
+        lines = []
+        for step in self.steps:
+            args = step.args
+            if step.action != 'text':
+                args = [shlex.quote(a) for a in args]
+            at = f'{step.at:.6f}'.rstrip('0').rstrip('.')
+            lines.append(' '.join([at, step.action] + list(args)))
+        return '\n'.join(lines) + '\n'
+
+
+class MacroPlayer(object):
+    # Remaining time that is waited for by yielding to the loop instead
+    # of sleeping, sleep granularity is too coarse below that
+    SPIN_THRESHOLD = 0.001
+
+    def __init__(
+        self,
+        console,
+        macro: Macro,
+        title_id: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Plays a macro on a console.
+
+        Gamepad and media messages are sent without waiting for acks,
+        so slow acknowledgements don't delay following steps. Text steps
+        go through the console's `TextManager`.
+
+        Args:
+            console: Console object
+            macro: Macro to play
+            title_id: Title Id for media commands, defaults to the title
+                      of the active media
+            clock: Monotonic time source
+        """
+        self.console = console
+        self.macro = macro
+        self.title_id = title_id
+        self.clock = clock
+
+        self._prepared: Optional[List[Tuple[MacroStep, object]]] = None
+        self._oversleep = 0.0
+        self._request_id = 0
+
+    def prepare(self) -> None:
+        """
+        Assemble all gamepad and media messages of the macro.
+
+        Called by :meth:`run` if not done before.
+
+        Raises:
+            MacroError: If a step is invalid
+
+        Returns: None
+        """
+        prepared = []
+        state = GamepadState()
+        title_id = self.title_id
+        if title_id is None and 'media' in self.console.managers:
+            title_id = self.console.media.title_id
+
+        for step in self.macro:
+            action, args = step.action, step.args
+            if action in GAMEPAD_ACTIONS:
+                if action == 'press':
+                    state = state._replace(
+                        buttons=state.buttons | _parse_buttons(args[0])
+                    )
+                elif action == 'release':
+                    state = state._replace(
+                        buttons=state.buttons & ~_parse_buttons(args[0])
+                    )
+                elif action == 'axis':
+                    state = state._replace(**_parse_axes(args))
+                else:
+                    state = GamepadState()
+                msg = factory.gamepad(0, *state)
+            elif action in MEDIA_ACTIONS:
+                if title_id is None:
+                    raise MacroError('No title id for media commands')
+                if action == 'seek':
+                    command, position = MediaControlCommand.Seek, int(args[0])
+                else:
+                    try:
+                        command = MediaControlCommand[args[0]]
+                    except (IndexError, KeyError):
+                        raise MacroError(f'Invalid media command: {args}')
+                    position = None
+                msg = factory.media_command(
+                    self._next_request_id(), title_id, command, position
+                )
+            else:
+                msg = None
+            prepared.append((step, msg))
+
+        self._prepared = prepared
+
+    def _next_request_id(self) -> int:
+        # Shared with the media command pipeline, results must not collide
+        if 'media' in self.console.managers:
+            return self.console.media.next_media_request_id()
+        self._request_id += 1
+        return self._request_id
+
+    async def _wait_until(self, target: float) -> None:
+        delay = target - self.clock() - self._oversleep
+        if delay > self.SPIN_THRESHOLD:
+            before = self.clock()
+            await asyncio.sleep(delay)
+            # Learn how late the loop wakes up, smoothed
+            late = (self.clock() - before) - delay
+            self._oversleep = 0.8 * self._oversleep + 0.2 * max(0.0, late)
+
+        while self.clock() < target:
+            await asyncio.sleep(0)
+
+    async def _execute(self, step: MacroStep, msg) -> None:
+        if step.action in GAMEPAD_ACTIONS:
+            msg.protected_payload(timestamp=int(time.time()))
+            await self.console.send_message(
+                msg, channel=ServiceChannel.SystemInput, blocking=False
+            )
+        elif step.action in MEDIA_ACTIONS:
+            await self.console.send_message(
+                msg, channel=ServiceChannel.SystemMedia, blocking=False
+            )
+        elif step.action == 'text':
+            await self.console.text.send_systemtext_input(
+                step.args[0] if step.args else ''
+            )
+        elif step.action == 'done':
+            await self.console.text.finish_text_input()
+
+    async def _run_text_steps(self, queue: asyncio.Queue, timings: List[StepTiming]) -> None:
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            index, step, msg = item
+            try:
+                await self._execute(step, msg)
+            except Exception as e:
+                log.debug('Macro step failed: %s', step, exc_info=True)
+                timings[index] = timings[index]._replace(
+                    error=str(e) or e.__class__.__name__
+                )
+
+    async def run(self, speed: float = 1.0) -> List[StepTiming]:
+        """
+        Play the macro.
+
+        Args:
+            speed: Playback speed factor
+
+        Returns: Timing of every step
+        """
+        if speed <= 0:
+            raise ValueError('speed needs to be positive')
+        if self._prepared is None:
+            self.prepare()
+
+        timings = []
+        # Text steps wait for acks and depend on the previous text version,
+        # they run in order in one worker without holding up other steps
+        text_steps = asyncio.Queue()
+        text_worker = asyncio.create_task(
+            self._run_text_steps(text_steps, timings)
+        )
+        try:
+            start = self.clock()
+            for step, msg in self._prepared:
+                intended = step.at / speed
+                await self._wait_until(start + intended)
+                actual = self.clock() - start
+
+                error = None
+                if step.action in TEXT_ACTIONS:
+                    text_steps.put_nowait((len(timings), step, msg))
+                else:
+                    try:
+                        await self._execute(step, msg)
+                    except Exception as e:
+                        log.debug('Macro step failed: %s', step, exc_info=True)
+                        error = str(e) or e.__class__.__name__
+                timings.append(StepTiming(step, intended, actual, error))
+
+            text_steps.put_nowait(None)
+            await text_worker
+        finally:
+            text_worker.cancel()
+        return timings
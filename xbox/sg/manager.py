@@ -38,15 +38,20 @@ Example:
 import asyncio
 import time
 import logging
-from typing import Optional
+from collections import deque
+from typing import Dict, List, Optional
 
 from construct import Container
 
 from xbox.sg import factory
 from xbox.sg.enum import MessageType, ServiceChannel, AckStatus, TextResult, \
     SoundLevel, MediaControlCommand, MediaPlaybackStatus, TextInputScope, \
-    MediaType, GamePadButton
+    MediaType, GamePadButton, TouchAction
+from xbox.sg.gamepad import GamepadSession
+from xbox.sg.textinput import TextSession
+from xbox.sg.tracker import MediaStateTracker
 from xbox.sg.utils.events import Event
+from xbox.sg.utils.stream import MessageStream, OverflowPolicy, StreamHub
 from xbox.sg.utils.struct import XStruct
 
 log = logging.getLogger(__name__)
@@ -65,17 +70,9 @@ class Manager(object):
             channel: Service channel
         """
         self.console = console
-        self.console.on_message += self._pre_on_message
-        self.console.on_json += self._pre_on_json
         self._channel = channel
-
-    def _pre_on_message(self, msg, channel):
-        if channel == self._channel:
-            self._on_message(msg, channel)
-
-    def _pre_on_json(self, data, channel):
-        if channel == self._channel:
-            self._on_json(data, channel)
+        self.console.subscribe(self._on_message, channel)
+        self.console.subscribe_json(self._on_json, channel)
 
     def _on_message(self, msg, channel):
         """
@@ -169,6 +166,292 @@ class InputManager(Manager):
         )
         return await self._send_message(msg)
 
+    def gamepad_session(
+        self,
+        rate: float = GamepadSession.DEFAULT_RATE
+    ) -> GamepadSession:
+        """
+        Create a streaming gamepad session, sending the controller state
+        at a fixed rate. Use as async context manager or call `start()`.
+
+        Args:
+            rate: Frames per second, e.g. 60 - 120
+
+        Returns: Gamepad session
+        """
+        return GamepadSession(self.console, rate, self._channel)
+
+
+class SensorManagerError(Exception):
+    """
+    Exception thrown by SensorManager
+    """
+    pass
+
+
+SENSOR_RATE = 60
+
+
+class SensorManager(Manager):
+    __namespace__ = 'sensor'
+
+    def __init__(self, console, rate: float = SENSOR_RATE):
+        """
+        Sensor Manager (ServiceChannel.Title)
+
+        Streams touch and motion sensor samples at a fixed rate. Only the
+        latest sample per sensor is sent each tick, samples older than
+        two ticks are dropped. Pending touchpoints are batched into a
+        single message per tick.
+
+        Args:
+            console: Console object, internally passed by `Console.add_manager
+            rate: Samples per second
+
+        """
+        super(SensorManager, self).__init__(console, ServiceChannel.Title)
+        if rate <= 0:
+            raise SensorManagerError('rate needs to be positive')
+
+        self._rate = rate
+        self._clock = time.monotonic
+        self._epoch = self._clock()
+        # msg type -> (sample time, payload fields)
+        self._samples = {}
+        # system touch -> pending touchpoints
+        self._touchpoints = {False: [], True: []}
+        # Prebuilt messages, payloads are updated in place
+        self._messages = {
+            MessageType.Accelerometer: factory.accelerometer(0, 0, 0, 0),
+            MessageType.Gyrometer: factory.gyrometer(0, 0, 0, 0),
+            MessageType.Inclinometer: factory.inclinometer(0, 0, 0, 0),
+            MessageType.Compass: factory.compass(0, 0, 0),
+            MessageType.Orientation: factory.orientation(0, 0, 0, 0, 0, 0)
+        }
+        # Payload fields following the timestamp
+        self._fields = {}
+        for msg_type, msg in self._messages.items():
+            subcons = msg.protected_payload.subcon.subcon.subcons
+            self._fields[msg_type] = [sc.name for sc in subcons][1:]
+        self._touch_messages = {
+            system: factory.touch(0, [], system) for system in (False, True)
+        }
+        self._task: Optional[asyncio.Task] = None
+        self.samples_sent = 0
+        self.samples_dropped = 0
+
+    def _on_message(self, msg: XStruct, channel: ServiceChannel) -> None:
+        # Title channel messages are handled by TitleManager
+        pass
+
+    def _timestamp(self) -> int:
+        return int((self._clock() - self._epoch) * 1000)
+
+    def _set_sample(self, msg_type: MessageType, *values) -> None:
+        if self._samples.pop(msg_type, None):
+            self.samples_dropped += 1
+        self._samples[msg_type] = (self._clock(), values)
+
+    def set_accelerometer(self, x: float, y: float, z: float) -> None:
+        """
+        Set accelerometer sample, sent on the next tick.
+
+        Args:
+            x: Acceleration, X-Axis
+            y: Acceleration, Y-Axis
+            z: Acceleration, Z-Axis
+
+        Returns: None
+        """
+        self._set_sample(MessageType.Accelerometer, x, y, z)
+
+    def set_gyrometer(self, x: float, y: float, z: float) -> None:
+        """
+        Set gyrometer sample, sent on the next tick.
+
+        Args:
+            x: Angular velocity, X-Axis
+            y: Angular velocity, Y-Axis
+            z: Angular velocity, Z-Axis
+
+        Returns: None
+        """
+        self._set_sample(MessageType.Gyrometer, x, y, z)
+
+    def set_inclinometer(self, pitch: float, roll: float, yaw: float) -> None:
+        """
+        Set inclinometer sample, sent on the next tick.
+
+        Args:
+            pitch: Pitch
+            roll: Roll
+            yaw: Yaw
+
+        Returns: None
+        """
+        self._set_sample(MessageType.Inclinometer, pitch, roll, yaw)
+
+    def set_compass(self, magnetic_north: float, true_north: float) -> None:
+        """
+        Set compass sample, sent on the next tick.
+
+        Args:
+            magnetic_north: Heading to magnetic north
+            true_north: Heading to true north
+
+        Returns: None
+        """
+        self._set_sample(MessageType.Compass, magnetic_north, true_north)
+
+    def set_orientation(
+        self,
+        rotation_matrix_value: float,
+        w: float,
+        x: float,
+        y: float,
+        z: float
+    ) -> None:
+        """
+        Set orientation sample, sent on the next tick.
+
+        Args:
+            rotation_matrix_value: Rotation matrix value
+            w: Quaternion W
+            x: Quaternion X
+            y: Quaternion Y
+            z: Quaternion Z
+
+        Returns: None
+        """
+        self._set_sample(
+            MessageType.Orientation, rotation_matrix_value, w, x, y, z
+        )
+
+    def touch(
+        self,
+        touchpoint_id: int,
+        action: TouchAction,
+        x: int,
+        y: int,
+        system: bool = False
+    ) -> None:
+        """
+        Add touchpoint, sent with others on the next tick.
+
+        Consecutive moves of a touchpoint are coalesced, down and up
+        actions are always sent.
+
+        Args:
+            touchpoint_id: Touchpoint Id, constant while touching
+            action: Touch action
+            x: X coordinate
+            y: Y coordinate
+            system: Send as SystemTouch instead of TitleTouch
+
+        Returns: None
+        """
+        pending = self._touchpoints[system]
+        if action == TouchAction.Move:
+            for point in reversed(pending):
+                if point.touchpoint_id != touchpoint_id:
+                    continue
+                if point.touchpoint_action == TouchAction.Move:
+                    point.touchpoint_x = x
+                    point.touchpoint_y = y
+                    return
+                break
+        pending.append(factory.touchpoint(touchpoint_id, action, x, y))
+
+    async def flush_sensors(self) -> int:
+        """
+        Send pending samples and touchpoints now.
+
+        Returns: Number of messages sent
+        """
+        sent = 0
+        stale = self._clock() - 2.0 / self._rate
+        timestamp = self._timestamp()
+
+        samples, self._samples = self._samples, {}
+        for msg_type, (sampled, values) in samples.items():
+            if sampled < stale:
+                self.samples_dropped += 1
+                continue
+
+            msg = self._messages[msg_type]
+            msg.protected_payload(
+                timestamp=timestamp,
+                **dict(zip(self._fields[msg_type], values))
+            )
+            await self.console.send_message(
+                msg, channel=ServiceChannel.Title, blocking=False
+            )
+            sent += 1
+
+        for system, pending in self._touchpoints.items():
+            if not pending:
+                continue
+            self._touchpoints[system] = []
+            msg = self._touch_messages[system]
+            msg.protected_payload(
+                touch_msg_timestamp=timestamp & 0xFFFFFFFF,
+                touchpoints=pending
+            )
+            channel = ServiceChannel.SystemInput if system \
+                else ServiceChannel.Title
+            await self.console.send_message(
+                msg, channel=channel, blocking=False
+            )
+            sent += 1
+
+        self.samples_sent += sent
+        return sent
+
+    async def _stream(self) -> None:
+        start = self._clock()
+        tick = 0
+        while True:
+            try:
+                await self.flush_sensors()
+            except Exception:
+                log.exception('Failed to send sensor samples')
+
+            elapsed = self._clock() - start
+            tick = max(tick + 1, int(elapsed * self._rate) + 1)
+            await asyncio.sleep(
+                max(0.0, start + tick / self._rate - self._clock())
+            )
+
+    def start_sensor_stream(self, rate: Optional[float] = None) -> None:
+        """
+        Start sending samples at a fixed rate.
+
+        Args:
+            rate: Samples per second, defaults to the rate passed on init
+
+        Returns: None
+        """
+        if rate:
+            self._rate = rate
+        if not self._task or self._task.done():
+            self._task = asyncio.create_task(self._stream())
+
+    async def stop_sensor_stream(self) -> None:
+        """
+        Stop sending samples, pending touchpoints are sent.
+
+        Returns: None
+        """
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._samples.clear()
+        await self.flush_sensors()
+
 
 class MediaManagerError(Exception):
     """
@@ -177,6 +460,19 @@ class MediaManagerError(Exception):
     pass
 
 
+# Seconds to wait for the MediaCommandResult of a pipelined command
+MEDIA_COMMAND_TIMEOUT = 5.0
+
+
+class _PendingMediaCommand(object):
+    __slots__ = ('command', 'seek_position', 'futures')
+
+    def __init__(self, command, seek_position, future):
+        self.command = command
+        self.seek_position = seek_position
+        self.futures: List[asyncio.Future] = [future]
+
+
 class MediaManager(Manager):
     __namespace__ = 'media'
 
@@ -193,6 +489,17 @@ class MediaManager(Manager):
         self.on_media_command_result = Event()
         self.on_media_controller_removed = Event()
 
+        self._media_state_hub = StreamHub(history=1)
+        self.on_media_state += self._media_state_hub.publish
+
+        self.tracker = MediaStateTracker()
+
+        # Media command pipeline
+        self._request_id = 0
+        self._command_results: Dict[int, asyncio.Future] = {}
+        self._command_queues: Dict[int, deque] = {}
+        self._command_workers: Dict[int, asyncio.Task] = {}
+
     def _on_message(self, msg: XStruct, channel: ServiceChannel) -> None:
         """
         Internal handler method to receive messages from SystemMedia Channel
@@ -206,10 +513,14 @@ class MediaManager(Manager):
         if msg_type == MessageType.MediaState:
             log.debug('Received MediaState message')
             self._media_state = payload
+            self.tracker.update(payload)
             self.on_media_state(self.media_state)
 
         elif msg_type == MessageType.MediaCommandResult:
             log.debug('Received MediaCommandResult message')
+            future = self._command_results.pop(payload.request_id, None)
+            if future and not future.done():
+                future.set_result(payload.result)
             self.on_media_command_result(payload)
 
         elif msg_type == MessageType.MediaControllerRemoved:
@@ -218,6 +529,7 @@ class MediaManager(Manager):
             if self.title_id == title_id:
                 log.debug('Clearing MediaState')
                 self._media_state = None
+                self.tracker.clear()
             self.on_media_controller_removed(payload)
 
         else:
@@ -383,6 +695,24 @@ class MediaManager(Manager):
         if self.media_state:
             return self.media_state.metadata
 
+    def media_states(
+        self,
+        maxsize: int = MessageStream.DEFAULT_MAXSIZE,
+        overflow: OverflowPolicy = OverflowPolicy.DropOldest,
+        replay: int = 0
+    ) -> MessageStream:
+        """
+        Stream of media state updates, to be consumed with `async for`.
+
+        Args:
+            maxsize: Max. buffered states
+            overflow: What to do when the buffer is full
+            replay: Start with the current media state (if any), max. 1
+
+        Returns: Stream of media state payloads
+        """
+        return self._media_state_hub.stream(maxsize, overflow, replay)
+
     async def media_command(
         self,
         title_id: int,
@@ -406,6 +736,138 @@ class MediaManager(Manager):
         )
         return await self._send_message(msg)
 
+    def next_media_request_id(self) -> int:
+        """
+        Allocate a request id for a media command.
+
+        Commands sent past the pipeline (e.g. by a macro) must take their
+        ids from here, so their `MediaCommandResult` can't be mistaken
+        for the result of a queued command.
+
+        Returns: Request Id
+        """
+        self._request_id += 1
+        return self._request_id
+
+    def queue_media_command(
+        self,
+        command: MediaControlCommand,
+        title_id: Optional[int] = None,
+        seek_position: Optional[int] = None
+    ) -> asyncio.Future:
+        """
+        Queue media command in the command pipeline.
+
+        Commands are sent one at a time per title: The next command is
+        only sent once the `MediaCommandResult` of the previous one arrived
+        (or `MEDIA_COMMAND_TIMEOUT` passed). Request ids are assigned
+        automatically.
+
+        A seek replaces a seek that is still queued for the same title,
+        so scrubbing only sends the latest position. All callers of the
+        replaced seek receive the result of the one that was sent.
+
+        Args:
+            command: Media Command
+            title_id: Title Id, defaults to the title of the active media
+            seek_position: Seek position
+
+        Returns: Future, resolving to the result code of the
+                 `MediaCommandResult`, or failing with
+                 :class:`MediaManagerError`
+        """
+        if title_id is None:
+            title_id = self.title_id or 0
+
+        future = asyncio.get_running_loop().create_future()
+        queue = self._command_queues.setdefault(title_id, deque())
+        if command == MediaControlCommand.Seek and queue and \
+                queue[-1].command == MediaControlCommand.Seek:
+            log.debug('Coalescing seek to %s', seek_position)
+            queue[-1].seek_position = seek_position
+            queue[-1].futures.append(future)
+        else:
+            queue.append(_PendingMediaCommand(command, seek_position, future))
+
+        if title_id not in self._command_workers:
+            self._command_workers[title_id] = asyncio.create_task(
+                self._run_media_commands(title_id)
+            )
+        return future
+
+    async def _run_media_commands(self, title_id: int) -> None:
+        queue = self._command_queues[title_id]
+        pending = None
+        try:
+            while queue:
+                pending = queue.popleft()
+                request_id = self.next_media_request_id()
+                result = asyncio.get_running_loop().create_future()
+                self._command_results[request_id] = result
+
+                try:
+                    await self.media_command(
+                        title_id, pending.command, request_id,
+                        pending.seek_position
+                    )
+                    await asyncio.wait_for(result, MEDIA_COMMAND_TIMEOUT)
+                except asyncio.TimeoutError:
+                    error = MediaManagerError(
+                        f'No result for media command {pending.command} '
+                        f'(request id: {request_id})'
+                    )
+                except Exception as e:
+                    error = MediaManagerError(f'Media command failed: {e}')
+                else:
+                    error = None
+                finally:
+                    self._command_results.pop(request_id, None)
+
+                for future in pending.futures:
+                    if future.done():
+                        continue
+                    if error:
+                        future.set_exception(error)
+                    else:
+                        future.set_result(result.result())
+                pending = None
+        except asyncio.CancelledError:
+            error = MediaManagerError('Media command pipeline cancelled')
+            for cancelled in ([pending] if pending else []) + list(queue):
+                for future in cancelled.futures:
+                    if not future.done():
+                        future.set_exception(error)
+            queue.clear()
+            raise
+        finally:
+            # No await since the last queue check, nothing was added meanwhile
+            if self._command_queues.get(title_id) is queue:
+                del self._command_queues[title_id]
+            if self._command_workers.get(title_id) is asyncio.current_task():
+                del self._command_workers[title_id]
+
+    async def send_media_command(
+        self,
+        command: MediaControlCommand,
+        title_id: Optional[int] = None,
+        seek_position: Optional[int] = None
+    ) -> int:
+        """
+        Send media command through the command pipeline and wait for
+        its result, see :meth:`queue_media_command`.
+
+        Args:
+            command: Media Command
+            title_id: Title Id, defaults to the title of the active media
+            seek_position: Seek position
+
+        Raises:
+            MediaManagerError: If the command failed or timed out
+
+        Returns: Result code of the `MediaCommandResult`
+        """
+        return await self.queue_media_command(command, title_id, seek_position)
+
 
 class TextManagerError(Exception):
     """
@@ -637,6 +1099,25 @@ class TextManager(Manager):
         self.current_session_input = msg.protected_payload
         return ack_status
 
+    def text_session(
+        self,
+        rate: float = TextSession.DEFAULT_RATE,
+        deltas: bool = False
+    ) -> TextSession:
+        """
+        Create a buffered text session for the active system text session,
+        for typing keystroke by keystroke. Use as async context manager or
+        call `start()`.
+
+        Args:
+            rate: Max. messages per second
+            deltas: Send only the changed tail of the text instead of
+                    the whole text
+
+        Returns: Text session
+        """
+        return TextSession(self, rate, deltas)
+
     async def send_systemtext_ack(
         self,
         session_id: int,
@@ -19,12 +19,25 @@ If message has `protected payload` it might need padding according
 to PKCS#7 (e.g. padding is in whole bytes, the value of each added byte is
 the number of bytes that are added, i.e. N bytes, each of value N are
 added. thx wikipedia).
+
+**Note on decode memoization**
+Ciphertexts of repeated messages always differ (the `IV` depends on the
+sequence number), their plaintext often doesn't. Passing a
+:class:`DecodeMemo` to :func:`unpack` skips parsing protected payloads
+that are byte-identical to the previous one of the same message type.
 """
-from construct import Int16ub
-from xbox.sg.enum import PacketType
+import struct
+from io import BytesIO
+from typing import Dict, Iterable, Optional, Tuple
+
+from construct import Container, Int16ub
+from xbox.sg.enum import PacketType, MessageType
 from xbox.sg.crypto import PKCS7Padding
 from xbox.sg.packet import simple, message
-from xbox.sg.utils.struct import flatten
+from xbox.sg.utils.adapters import CryptoTunnel
+from xbox.sg.utils.struct import flatten, XStructObj
+
+HEADER_FORMAT = struct.Struct('>HHIIIHQ')
 
 
 class PackerError(Exception):
@@ -34,7 +47,119 @@ class PackerError(Exception):
     pass
 
 
-def unpack(buf, crypto=None):
+class DecodeMemo(object):
+    DEFAULT_TYPES = (
+        MessageType.ConsoleStatus,
+        MessageType.ActiveSurfaceChange,
+        MessageType.MediaState
+    )
+
+    def __init__(self, msg_types: Iterable[MessageType] = DEFAULT_TYPES):
+        """
+        Remembers the last decrypted payload per message type, along with
+        its parsed representation.
+
+        Memoized payloads are shared between messages, treat them as
+        read-only. As a side effect, unchanged payloads are the identical
+        object, so change detection can compare by identity.
+
+        Use one instance per session (crypto context).
+
+        Args:
+            msg_types: Message types to memoize
+        """
+        self.msg_types = frozenset(msg_types)
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[MessageType, Tuple[bytes, Container]] = {}
+
+    def get(self, msg_type: MessageType, data: bytes) -> Optional[Container]:
+        """
+        Get parsed payload if `data` matches the previous payload.
+
+        Args:
+            msg_type: Message type
+            data: Decrypted protected payload
+
+        Returns: Parsed payload or `None`
+        """
+        entry = self._entries.get(msg_type)
+        if entry and entry[0] == data:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def put(self, msg_type: MessageType, data: bytes, payload: Container) -> None:
+        """
+        Store parsed payload.
+
+        Args:
+            msg_type: Message type
+            data: Decrypted protected payload
+            payload: Parsed payload
+
+        Returns: None
+        """
+        self._entries[msg_type] = (data, payload)
+
+    def clear(self) -> None:
+        """
+        Forget all payloads, e.g. on a new session.
+
+        Returns: None
+        """
+        self._entries.clear()
+
+
+def _parse_header(buf: bytes) -> Container:
+    # Fixed layout of `message.header`, without construct overhead
+    pkt_type, payload_length, sequence_number, target_participant_id, \
+        source_participant_id, flags, channel_id = \
+        HEADER_FORMAT.unpack_from(buf)
+
+    return Container(
+        pkt_type=PacketType(pkt_type),
+        protected_payload_length=payload_length,
+        sequence_number=sequence_number,
+        target_participant_id=target_participant_id,
+        source_participant_id=source_participant_id,
+        flags=Container(
+            version=flags >> 14,
+            need_ack=bool(flags & 0x2000),
+            is_fragment=bool(flags & 0x1000),
+            msg_type=MessageType(flags & 0xFFF)
+        ),
+        channel_id=channel_id
+    )
+
+
+def _unpack_memoized(buf, crypto, memo):
+    header = _parse_header(buf)
+    msg_type = header.flags.msg_type
+    if header.flags.is_fragment or msg_type not in memo.msg_types:
+        return None
+
+    stream = BytesIO(buf)
+    stream.seek(HEADER_FORMAT.size)
+    decrypted = CryptoTunnel.decrypt(
+        stream, Container(header=header, _crypto=crypto)
+    )
+    if not decrypted:
+        return None
+
+    data = decrypted.getvalue()
+    payload = memo.get(msg_type, data)
+    if payload is None:
+        payload = message.message_structs[msg_type].compiled.parse(data)
+        memo.put(msg_type, data, payload)
+
+    return XStructObj(
+        message.struct, Container(header=header, protected_payload=payload)
+    )
+
+
+def unpack(buf, crypto=None, memo=None):
     """
     Unpacks messages from Smartglass CoreProtocol.
 
@@ -46,6 +171,7 @@ def unpack(buf, crypto=None):
     Args:
         buf (bytes): A byte string to be deserialized into a message.
         crypto (Crypto): Instance of :class:`Crypto`.
+        memo (DecodeMemo): Optional, reuse repeated payloads.
 
     Raises:
         PackerError: On various errors, instance of :class:`PackerError`.
@@ -62,6 +188,10 @@ def unpack(buf, crypto=None):
     if pkt_type in simple.pkt_types:
         msg_struct = simple.struct
     elif pkt_type == PacketType.Message:
+        if memo is not None and crypto:
+            msg = _unpack_memoized(buf, crypto, memo)
+            if msg:
+                return msg
         msg_struct = message.struct
 
     return msg_struct.parse(buf, _crypto=crypto)
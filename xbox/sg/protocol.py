@@ -11,8 +11,10 @@ import logging
 
 import asyncio
 import socket
+import ipaddress
 
-from typing import List, Optional, Tuple, Dict, Union
+from typing import List, Optional, Tuple, Dict, Union, AsyncIterator,\
+    Iterator
 
 from xbox.sg import factory, packer, crypto, console
 from xbox.sg.packet.message import message_structs
@@ -49,11 +51,15 @@ class ProtocolError(Exception):
 
 class SmartglassProtocol(asyncio.DatagramProtocol):
     HEARTBEAT_INTERVAL = 3.0
+    DISCOVERY_INTERVAL = 0.5
+    SWEEP_RATE = 1000
+    SWEEP_CONCURRENCY = 64
 
     def __init__(
         self,
         address: Optional[str] = None,
-        crypto_instance: Optional[crypto.Crypto] = None
+        crypto_instance: Optional[crypto.Crypto] = None,
+        decode_memo: bool = False
     ):
         """
         Instantiate Smartglass Protocol handler.
@@ -61,12 +67,17 @@ class SmartglassProtocol(asyncio.DatagramProtocol):
         Args:
             address: Address
             crypto_instance: Crypto instance
+            decode_memo: Reuse parsed payloads of repeated messages,
+                         see :class:`packer.DecodeMemo`
         """
         self.address = address
         self._transport: Optional[asyncio.DatagramTransport] = None
         self.crypto = crypto_instance
+        self.decode_memo = packer.DecodeMemo() if decode_memo else None
 
         self._discovered = {}
+        # host -> (raw datagram, parsed DiscoveryResponse)
+        self._discovery_cache: Dict[str, Tuple[bytes, XStruct]] = {}
 
         self.target_participant_id = None
         self.source_participant_id = None
@@ -216,8 +227,17 @@ class SmartglassProtocol(asyncio.DatagramProtocol):
         try:
             host, _ = addr
 
+            # Consoles answer every discovery round with the exact same
+            # datagram, skip parsing (and certificate decoding) for repeats
+            cached = self._discovery_cache.get(host)
+            if cached and cached[0] == data:
+                msg = cached[1]
+                self._discovered[host] = msg
+                self.on_discover(host, msg)
+                return
+
             if self.crypto:
-                msg = packer.unpack(data, self.crypto)
+                msg = packer.unpack(data, self.crypto, self.decode_memo)
             else:
                 msg = packer.unpack(data)
 
@@ -226,6 +246,7 @@ class SmartglassProtocol(asyncio.DatagramProtocol):
                     f"Received DiscoverResponse from {host}",
                     extra={'_msg': msg}
                 )
+                self._discovery_cache[host] = (data, msg)
                 self._discovered[host] = msg
                 self.on_discover(host, msg)
 
@@ -415,7 +436,14 @@ class SmartglassProtocol(asyncio.DatagramProtocol):
             addr: str = None,
             tries: int = 5,
             blocking: bool = True,
-            timeout: int = 5
+            timeout: int = 5,
+            max_consoles: Optional[int] = None,
+            until_liveid: Optional[str] = None,
+            until_addr: Optional[str] = None,
+            quiet_period: Optional[float] = None,
+            networks: Optional[List[str]] = None,
+            rate: int = SWEEP_RATE,
+            concurrency: int = SWEEP_CONCURRENCY
     ) -> Dict[str, XStruct]:
         """
         Discover consoles on the network
@@ -426,24 +454,142 @@ class SmartglassProtocol(asyncio.DatagramProtocol):
             blocking (bool): Wait a given time for responses, otherwise
                              return immediately
             timeout (int): Timeout in seconds (only if `blocking` is `True`)
+            max_consoles (int): Stop after this many consoles responded
+            until_liveid (str): Stop once console with this Live ID responded
+            until_addr (str): Stop once console with this IP address responded
+            quiet_period (float): Stop if no new console responded for this
+                                  many seconds (after the first response)
+            networks (list): Subnets in CIDR notation to sweep with unicast
+                             requests, instead of broadcast / multicast
+            rate (int): Max. sweep datagrams per second
+            concurrency (int): Max. sweep datagrams sent back-to-back
 
         Returns:
             list: List of discovered consoles
         """
         self._discovered = {}
-        msg = factory.discovery()
-
-        task = asyncio.create_task(self._discover(msg, addr, tries))
 
         # Blocking for a discovery is different than connect or regular message
-        if blocking:
-            try:
-                await asyncio.wait_for(task, timeout)
-            except asyncio.TimeoutError:
+        if not blocking:
+            msg = factory.discovery()
+            if networks:
+                coro = self._sweep(msg, networks, tries, rate, concurrency)
+            else:
+                coro = self._discover(msg, addr, tries)
+            asyncio.create_task(coro)
+            return self.discovered
+
+        discovered = {}
+        async for host, msg in self.discover_iter(
+            addr, tries, timeout, max_consoles,
+            until_liveid, until_addr, quiet_period,
+            networks, rate, concurrency
+        ):
+            discovered[host] = msg
+
+        return discovered
 
-                pass
+    async def discover_iter(
+            self,
+            addr: str = None,
+            tries: int = 5,
+            timeout: int = 5,
+            max_consoles: Optional[int] = None,
+            until_liveid: Optional[str] = None,
+            until_addr: Optional[str] = None,
+            quiet_period: Optional[float] = None,
+            networks: Optional[List[str]] = None,
+            rate: int = SWEEP_RATE,
+            concurrency: int = SWEEP_CONCURRENCY
+    ) -> AsyncIterator[Tuple[str, XStruct]]:
+        """
+        Discover consoles on the network, yielding each console as soon
+        as its `DiscoveryResponse` arrives.
+
+        Iteration ends when all discovery attempts were sent (plus one
+        interval grace period), on `timeout` or when one of the optional
+        stop conditions is met.
+
+        If `networks` is provided, every host of these subnets gets an
+        unicast discovery request instead of broadcast / multicast.
+        Useful if consoles are located in routed networks.
+        Consoles reachable via several addresses are only reported once
+        (by Live ID).
 
-        return self.discovered
+        Args:
+            addr: IP address
+            tries: Discover attempts
+            timeout: Timeout in seconds
+            max_consoles: Stop after this many consoles responded
+            until_liveid: Stop once console with this Live ID responded
+            until_addr: Stop once console with this IP address responded
+            quiet_period: Stop if no new console responded for this many
+                          seconds (after the first response)
+            networks: Subnets in CIDR notation to sweep with unicast requests
+            rate: Max. sweep datagrams per second
+            concurrency: Max. sweep datagrams sent back-to-back
+
+        Returns:
+            Async iterator of tuples (ip_address, DiscoveryResponse)
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        seen = set()
+        seen_liveids = set()
+
+        def on_discover(host: str, msg: XStruct) -> None:
+            queue.put_nowait((host, msg))
+
+        msg = factory.discovery()
+        if networks:
+            coro = self._sweep(msg, networks, tries, rate, concurrency)
+        else:
+            coro = self._discover(msg, addr, tries)
+
+        self.on_discover += on_discover
+        sender = asyncio.create_task(coro)
+        # Sentinel, wakes up the consumer once everything was sent
+        sender.add_done_callback(lambda _: queue.put_nowait(None))
+
+        deadline = loop.time() + timeout
+        last_response = None
+        try:
+            while True:
+                stop_at = deadline
+                if quiet_period is not None and last_response is not None:
+                    stop_at = min(stop_at, last_response + quiet_period)
+
+                wait = stop_at - loop.time()
+                if wait <= 0:
+                    break
+
+                try:
+                    item = await asyncio.wait_for(queue.get(), wait)
+                except asyncio.TimeoutError:
+                    break
+
+                if item is None:
+                    break
+
+                host, msg = item
+                liveid = msg.unprotected_payload.cert.liveid
+                if host in seen or liveid in seen_liveids:
+                    continue
+
+                seen.add(host)
+                seen_liveids.add(liveid)
+                last_response = loop.time()
+                yield host, msg
+
+                if max_consoles and len(seen) >= max_consoles:
+                    break
+                elif until_liveid and liveid == until_liveid:
+                    break
+                elif until_addr and host == until_addr:
+                    break
+        finally:
+            self.on_discover -= on_discover
+            sender.cancel()
 
     async def _discover(
         self,
@@ -458,7 +604,48 @@ class SmartglassProtocol(asyncio.DatagramProtocol):
             if addr:
                 await self.send_message(msg, addr=addr)
 
-            await asyncio.sleep(0.5)
+            await asyncio.sleep(self.DISCOVERY_INTERVAL)
+
+    async def _sweep(
+        self,
+        msg,
+        networks: List[str],
+        tries: int,
+        rate: int,
+        concurrency: int
+    ) -> None:
+        """
+        Send unicast discovery requests to every host of the given subnets.
+
+        The request is packed only once. Sending happens in bursts of
+        `concurrency` datagrams, paced to not exceed `rate` datagrams per
+        second.
+
+        Args:
+            msg: Discovery request
+            networks: Subnets in CIDR notation
+            tries: Sweep attempts
+            rate: Max. datagrams per second
+            concurrency: Max. datagrams sent back-to-back
+
+        Returns: None
+        """
+        loop = asyncio.get_running_loop()
+        data = packer.pack(msg)
+        hosts = list(_iter_hosts(networks))
+        interval = concurrency / rate
+
+        LOGGER.debug(f"Sweeping {len(hosts)} hosts for consoles")
+        for _ in range(tries):
+            next_burst = loop.time()
+            for i in range(0, len(hosts), concurrency):
+                for host in hosts[i:i + concurrency]:
+                    await self._send(data, (host, PORT))
+
+                next_burst += interval
+                await asyncio.sleep(max(0.0, next_burst - loop.time()))
+
+            await asyncio.sleep(self.DISCOVERY_INTERVAL)
 
     @property
     def discovered(self) -> Dict[str, XStruct]:
@@ -496,6 +683,9 @@ class SmartglassProtocol(asyncio.DatagramProtocol):
         if not self.crypto:
             raise ProtocolError("No crypto")
 
+        if self.decode_memo:
+            self.decode_memo.clear()
+
         if isinstance(userhash, type(None)):
             userhash = ''
         if isinstance(xsts_token, type(None)):
@@ -1059,6 +1249,28 @@ class FragmentManager:
         return json.loads(base64.b64decode(data).decode('utf-8'))
 
 
+def _iter_hosts(networks: List[str]) -> Iterator[str]:
+    """
+    Internal method to enumerate host addresses of subnets.
+
+    Single addresses (e.g. /32 networks) are yielded as-is.
+
+    Args:
+        networks: Subnets in CIDR notation
+
+    Returns:
+        Iterator of IP addresses
+    """
+    for network in networks:
+        network = ipaddress.ip_network(network, strict=False)
+        if network.num_addresses == 1:
+            yield str(network.network_address)
+            continue
+
+        for host in network.hosts():
+            yield str(host)
+
+
 def _fragment_connect_request(
     crypto_instance: crypto.Crypto,
     client_uuid: uuid.UUID,
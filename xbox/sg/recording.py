@@ -0,0 +1,456 @@
+"""
+Input recording and replay
+
+Records the gamepad frames, text input and media commands sent to a
+console and replays them later, e.g. for QA.
+
+Gamepad frames are stored column-wise in :mod:`array` buffers (one array
+for timestamps, one for the button bitmask and one per axis), not as an
+object per frame. Transforms like resampling, deadzone and response
+curves are applied per column over the whole timeline.
+
+Recordings are saved in a compact binary format: A small header followed
+by the zlib-compressed columns and a JSON list of other events.
+
+Example:
+    Record a session, then replay it at double speed::
+
+        recorder = InputRecorder(console)
+        recorder.start()
+        ...
+        recording = recorder.stop()
+        recording.save('session.xsgrec')
+
+        recording = Recording.load('session.xsgrec').deadzone(0.1)
+        await RecordingPlayer(console, recording, speed=2.0).run()
+"""
+import sys
+import json
+import time
+import zlib
+import struct
+import asyncio
+import logging
+from array import array
+from bisect import bisect_right
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from xbox.sg import factory
+from xbox.sg.enum import MessageType, MediaControlCommand, ServiceChannel
+from xbox.sg.gamepad import GamepadSession, GamepadState, button_bits
+
+log = logging.getLogger(__name__)
+
+MAGIC = b'XSGR'
+VERSION = 1
+HEADER = struct.Struct('<4sBII')
+
+AXES = GamepadState._fields[1:]
+STICK_AXES = ('l_thumb_x', 'l_thumb_y', 'r_thumb_x', 'r_thumb_y')
+
+
+class RecordingError(Exception):
+    """
+    Exception thrown on invalid recordings
+    """
+    pass
+
+
+def _to_le(column: array) -> bytes:
+    if sys.byteorder == 'big':
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def _from_le(typecode: str, data: bytes) -> array:
+    column = array(typecode)
+    column.frombytes(data)
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column
+
+
+class Recording(object):
+    def __init__(self):
+        """
+        Columnar storage of gamepad frames plus a list of other events
+        (text input, media commands).
+
+        Timestamps are seconds since start of the recording.
+        """
+        self.timestamps = array('d')
+        self.buttons = array('H')
+        self.axes: Dict[str, array] = {name: array('f') for name in AXES}
+        # (timestamp, kind, data)
+        self.events: List[Tuple[float, str, dict]] = []
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def duration(self) -> float:
+        last = [self.timestamps[-1]] if self.timestamps else []
+        last += [self.events[-1][0]] if self.events else []
+        return max(last, default=0.0)
+
+    def append(self, timestamp: float, state: GamepadState) -> None:
+        """
+        Add a gamepad frame.
+
+        Args:
+            timestamp: Seconds since start
+            state: Gamepad state
+
+        Returns: None
+        """
+        self.timestamps.append(timestamp)
+        self.buttons.append(state.buttons)
+        for name in AXES:
+            self.axes[name].append(getattr(state, name))
+
+    def add_event(self, timestamp: float, kind: str, **data) -> None:
+        """
+        Add a non-gamepad event.
+
+        Args:
+            timestamp: Seconds since start
+            kind: `text` or `media`
+            **data: JSON serializable event data
+
+        Returns: None
+        """
+        self.events.append((timestamp, kind, data))
+
+    def frame(self, index: int) -> GamepadState:
+        """
+        Get gamepad frame.
+
+        Args:
+            index: Frame index
+
+        Returns: Gamepad state
+        """
+        return GamepadState(
+            self.buttons[index], *[self.axes[name][index] for name in AXES]
+        )
+
+    def _copy(self, timestamps=None, buttons=None, axes=None) -> 'Recording':
+        axes = axes or {}
+        recording = Recording()
+        recording.timestamps = array('d', self.timestamps) \
+            if timestamps is None else timestamps
+        recording.buttons = array('H', self.buttons) \
+            if buttons is None else buttons
+        recording.axes = {
+            name: axes[name] if name in axes else array('f', self.axes[name])
+            for name in AXES
+        }
+        recording.events = list(self.events)
+        return recording
+
+    def resample(self, rate: float) -> 'Recording':
+        """
+        Resample gamepad frames to a fixed rate, holding the last state.
+
+        Args:
+            rate: Frames per second
+
+        Returns: New recording
+        """
+        if rate <= 0:
+            raise ValueError('rate needs to be positive')
+        if not self.timestamps:
+            return self._copy()
+
+        start = self.timestamps[0]
+        count = int((self.timestamps[-1] - start) * rate) + 1
+        timestamps = array('d', (start + i / rate for i in range(count)))
+        indices = [bisect_right(self.timestamps, t) - 1 for t in timestamps]
+
+        return self._copy(
+            timestamps,
+            array('H', (self.buttons[i] for i in indices)),
+            {name: array('f', (self.axes[name][i] for i in indices))
+             for name in AXES}
+        )
+
+    def deadzone(
+        self,
+        threshold: float,
+        axes: Iterable[str] = STICK_AXES
+    ) -> 'Recording':
+        """
+        Apply a deadzone: Values within `threshold` become 0, the
+        remaining range is rescaled to keep full deflection.
+
+        Args:
+            threshold: Deadzone, 0 - 1
+            axes: Axes to apply to
+
+        Returns: New recording
+        """
+        if not 0 <= threshold < 1:
+            raise ValueError('threshold needs to be in [0, 1)')
+
+        scale = 1.0 / (1.0 - threshold)
+
+        def _apply(v):
+            if abs(v) <= threshold:
+                return 0.0
+            return (v - threshold if v > 0 else v + threshold) * scale
+
+        return self._copy(axes={
+            name: array('f', map(_apply, self.axes[name])) for name in axes
+        })
+
+    def curve(
+        self,
+        exponent: float,
+        axes: Iterable[str] = STICK_AXES
+    ) -> 'Recording':
+        """
+        Apply a response curve, `sign(v) * |v| ^ exponent`.
+
+        Args:
+            exponent: Curve exponent, > 1 for finer control around center
+            axes: Axes to apply to
+
+        Returns: New recording
+        """
+        def _apply(v):
+            return abs(v) ** exponent if v >= 0 else -(abs(v) ** exponent)
+
+        return self._copy(axes={
+            name: array('f', map(_apply, self.axes[name])) for name in axes
+        })
+
+    def save(self, filepath: str) -> None:
+        """
+        Save recording to a binary file.
+
+        Args:
+            filepath: Path to file
+
+        Returns: None
+        """
+        events = json.dumps(self.events, separators=(',', ':')).encode()
+        columns = [_to_le(self.timestamps), _to_le(self.buttons)]
+        columns.extend(_to_le(self.axes[name]) for name in AXES)
+        columns.append(events)
+        body = b''.join(columns)
+        with open(filepath, 'wb') as fh:
+            fh.write(HEADER.pack(MAGIC, VERSION, len(self), len(events)))
+            fh.write(zlib.compress(body))
+
+    @classmethod
+    def load(cls, filepath: str) -> 'Recording':
+        """
+        Load recording from a binary file.
+
+        Args:
+            filepath: Path to file
+
+        Raises:
+            RecordingError: If the file is not a valid recording
+
+        Returns: Recording
+        """
+        with open(filepath, 'rb') as fh:
+            data = fh.read()
+
+        try:
+            magic, version, count, events_len = HEADER.unpack_from(data)
+            body = zlib.decompress(data[HEADER.size:])
+        except (struct.error, zlib.error):
+            raise RecordingError(f'Invalid recording: {filepath}')
+        if magic != MAGIC or version != VERSION:
+            raise RecordingError(f'Unsupported recording: {filepath}')
+
+        columns = [('d', 8), ('H', 2)] + [('f', 4)] * len(AXES)
+        if len(body) != sum(size for _, size in columns) * count + events_len:
+            raise RecordingError(f'Truncated recording: {filepath}')
+
+        offset = 0
+        arrays = []
+        for typecode, size in columns:
+            arrays.append(_from_le(typecode, body[offset:offset + size * count]))
+            offset += size * count
+
+        recording = cls()
+        recording.timestamps, recording.buttons = arrays[:2]
+        recording.axes = dict(zip(AXES, arrays[2:]))
+        recording.events = [tuple(e) for e in json.loads(body[offset:])]
+        return recording
+
+
+class InputRecorder(object):
+    def __init__(
+        self,
+        console,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Records input sent to a console, via `Console.on_send`.
+
+        Args:
+            console: Console object
+            clock: Monotonic time source
+        """
+        self.console = console
+        self.clock = clock
+        self.recording: Optional[Recording] = None
+        self._start = None
+
+    @property
+    def recording_active(self) -> bool:
+        return self._start is not None
+
+    def start(self) -> None:
+        """
+        Start a new recording.
+
+        Returns: None
+        """
+        if self.recording_active:
+            return
+        self.recording = Recording()
+        self._start = self.clock()
+        self.console.on_send += self._on_send
+
+    def stop(self) -> Recording:
+        """
+        Stop recording.
+
+        Returns: Recording
+        """
+        if self.recording_active:
+            self.console.on_send -= self._on_send
+            self._start = None
+        return self.recording
+
+    def _on_send(self, msg, channel) -> None:
+        timestamp = self.clock() - self._start
+        msg_type = msg.header.flags.msg_type
+        payload = msg.protected_payload
+
+        if msg_type == MessageType.Gamepad:
+            self.recording.append(timestamp, GamepadState(
+                button_bits(payload.buttons), payload.left_trigger,
+                payload.right_trigger, payload.left_thumbstick_x,
+                payload.left_thumbstick_y, payload.right_thumbstick_x,
+                payload.right_thumbstick_y
+            ))
+        elif msg_type == MessageType.SystemTextInput:
+            self.recording.add_event(timestamp, 'text', text=payload.text_chunk)
+        elif msg_type == MessageType.MediaCommand:
+            self.recording.add_event(
+                timestamp, 'media', title_id=payload.title_id,
+                command=getattr(payload.command, 'value', payload.command),
+                seek_position=payload.seek_position
+            )
+
+
+class RecordingPlayer(object):
+    def __init__(
+        self,
+        console,
+        recording: Recording,
+        speed: float = 1.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Replays a recording, frames are sent at their recorded time
+        (divided by `speed`).
+
+        Args:
+            console: Console object
+            recording: Recording to play
+            speed: Playback speed factor
+            clock: Monotonic time source
+        """
+        if speed <= 0:
+            raise ValueError('speed needs to be positive')
+
+        self.console = console
+        self.recording = recording
+        self.speed = speed
+        self.clock = clock
+        self.session = GamepadSession(console)
+        self.max_lateness = 0.0
+
+    def _timeline(self) -> List[Tuple[float, int, Optional[tuple]]]:
+        timeline = [(t, i, None) for i, t in enumerate(self.recording.timestamps)]
+        timeline += [(e[0], -1, e) for e in self.recording.events]
+        timeline.sort(key=lambda item: item[0])
+        return timeline
+
+    async def _send_event(self, kind: str, data: dict) -> None:
+        if kind == 'text':
+            await self.console.text.send_systemtext_input(data['text'])
+        elif kind == 'media':
+            if 'media' in self.console.managers:
+                request_id = self.console.media.next_media_request_id()
+            else:
+                request_id = 0
+            msg = factory.media_command(
+                request_id, data['title_id'],
+                MediaControlCommand(data['command']),
+                data.get('seek_position')
+            )
+            await self.console.send_message(
+                msg, channel=ServiceChannel.SystemMedia, blocking=False
+            )
+
+    async def _run_text_events(self, queue: asyncio.Queue) -> None:
+        while True:
+            data = await queue.get()
+            if data is None:
+                return
+            try:
+                await self._send_event('text', data)
+            except Exception:
+                log.exception('Failed to replay input')
+
+    async def run(self) -> None:
+        """
+        Play the recording, returns when done.
+
+        Returns: None
+        """
+        # Text events wait for acks and depend on the previous text
+        # version, they are sent in order by one worker without holding
+        # up following frames
+        text_events = asyncio.Queue()
+        text_worker = asyncio.create_task(self._run_text_events(text_events))
+        try:
+            start = self.clock()
+            for timestamp, index, event in self._timeline():
+                delay = start + timestamp / self.speed - self.clock()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                self.max_lateness = max(
+                    self.max_lateness,
+                    self.clock() - start - timestamp / self.speed
+                )
+
+                if event and event[1] == 'text':
+                    text_events.put_nowait(event[2])
+                    continue
+
+                try:
+                    if event:
+                        await self._send_event(event[1], event[2])
+                    else:
+                        self.session.set_state(self.recording.frame(index))
+                        await self.session.flush()
+                except Exception:
+                    log.exception('Failed to replay input')
+
+            text_events.put_nowait(None)
+            await text_worker
+        finally:
+            text_worker.cancel()
+
+        self.session.reset()
+        await self.session.flush()
@@ -0,0 +1,309 @@
+"""
+Console Registry
+
+Keeps a single :class:`Console` instance per Live ID. Discovery responses
+update the known instances in place (address, flags, last seen time,
+device status), so references held by the application, their events and
+added managers stay valid across discovery rounds.
+
+Example:
+    Watch consoles appearing and disappearing::
+
+        from xbox.sg.console import Console
+
+        registry = Console.get_registry()
+        registry.on_added += lambda c: print('Added', c)
+        registry.on_removed += lambda c: print('Removed', c)
+
+        await Console.discover(timeout=1)
+        console = registry.get('FD00112233FFEE66')
+
+    Warm start from disk::
+
+        registry.load(CONSOLES_FILE)
+        await Console.revalidate()
+        ...
+        registry.save(CONSOLES_FILE)
+"""
+import os
+import json
+import time
+import logging
+from typing import Dict, Iterator, Optional, List, Tuple
+
+from xbox.sg.enum import DeviceStatus
+from xbox.sg.tracker import RunningTitle
+from xbox.sg.utils.events import Event
+from xbox.sg.utils.struct import XStruct
+
+LOGGER = logging.getLogger(__name__)
+
+
+class ConsoleRegistry(object):
+    DEFAULT_TTL = 300
+
+    def __init__(self, console_cls, ttl: float = DEFAULT_TTL):
+        """
+        Registry of known consoles, keyed by Live ID.
+
+        Args:
+            console_cls: Console class to instantiate new entries with
+            ttl: Seconds after the last response until a console expires
+        """
+        self.console_cls = console_cls
+        self.ttl = ttl
+        self._consoles: Dict[str, object] = {}
+
+        self.on_added = Event()
+        self.on_updated = Event()
+        self.on_removed = Event()
+
+    def __contains__(self, liveid: str) -> bool:
+        return liveid in self._consoles
+
+    def __iter__(self) -> Iterator:
+        return iter(list(self._consoles.values()))
+
+    def __len__(self) -> int:
+        return len(self._consoles)
+
+    def __repr__(self) -> str:
+        return f'<ConsoleRegistry consoles={len(self._consoles)} ttl={self.ttl}>'
+
+    def get(self, liveid: str):
+        """
+        Get console by Live ID.
+
+        Args:
+            liveid: Live ID of console
+
+        Returns: Console instance or `None`
+        """
+        return self._consoles.get(liveid)
+
+    def by_address(self, address: str) -> List:
+        """
+        Get consoles last seen at a specific address.
+
+        Args:
+            address: IP address
+
+        Returns: List of consoles
+        """
+        return [c for c in self._consoles.values() if c.address == address]
+
+    def running(self, title_id: int) -> List[Tuple[object, RunningTitle]]:
+        """
+        Get consoles currently running a title, from their title trackers.
+
+        Args:
+            title_id: Title Id
+
+        Returns: List of (console, running title) tuples
+        """
+        result = []
+        for console in self._consoles.values():
+            title = console.title_tracker.get(title_id)
+            if title:
+                result.append((console, title))
+        return result
+
+    def add(self, console):
+        """
+        Add a console instance to the registry.
+
+        If a console with the same Live ID is known already, the existing
+        instance is kept and returned.
+
+        Args:
+            console: Console instance
+
+        Returns: Registered console instance
+        """
+        existing = self._consoles.get(console.liveid)
+        if existing:
+            return existing
+
+        if not console.last_seen:
+            console.last_seen = time.time()
+        self._consoles[console.liveid] = console
+        self.on_added(console)
+        return console
+
+    def update(self, address: str, msg: XStruct):
+        """
+        Update or add a console from a `DiscoveryResponse`.
+
+        Can be used as handler for `SmartglassProtocol.on_discover`.
+
+        Args:
+            address: IP address of the console
+            msg: Discovery Response struct
+
+        Returns: Registered console instance
+        """
+        payload = msg.unprotected_payload
+        console = self._consoles.get(payload.cert.liveid)
+        if not console:
+            console = self.console_cls.from_message(address, msg)
+            console.last_seen = time.time()
+            self._consoles[console.liveid] = console
+            self.on_added(console)
+            return console
+
+        console.last_seen = time.time()
+        changed = False
+
+        if console.address != address and not console.connected:
+            LOGGER.debug(f'{console.liveid} moved from {console.address} '
+                         f'to {address}')
+            console._close_protocol()
+            console.address = address
+            changed = True
+
+        for attr in ('name', 'uuid', 'flags', 'last_error'):
+            value = getattr(payload, attr)
+            if getattr(console, attr) != value:
+                setattr(console, attr, value)
+                changed = True
+
+        # Certificates are cached, an unchanged key is the same object
+        if console.public_key is not payload.cert.pubkey \
+                and not console.connected:
+            console.public_key = payload.cert.pubkey
+            changed = True
+
+        if console.device_status != DeviceStatus.Available:
+            console.device_status = DeviceStatus.Available
+            changed = True
+
+        if changed:
+            self.on_updated(console)
+        return console
+
+    def remove(self, liveid: str):
+        """
+        Remove console from registry.
+
+        Args:
+            liveid: Live ID of console
+
+        Returns: Removed console instance or `None`
+        """
+        console = self._consoles.pop(liveid, None)
+        if console:
+            self.on_removed(console)
+        return console
+
+    def mark_unavailable(self, seen_before: float) -> List:
+        """
+        Set consoles that did not respond since a given time to
+        `DeviceStatus.Unavailable`, keeping them registered.
+
+        Connected consoles are left alone.
+
+        Args:
+            seen_before: Timestamp (`time.time()`)
+
+        Returns: List of consoles that changed to unavailable
+        """
+        changed = []
+        for console in self._consoles.values():
+            if console.connected or console.last_seen >= seen_before:
+                continue
+            if console.device_status != DeviceStatus.Unavailable:
+                console.device_status = DeviceStatus.Unavailable
+                changed.append(console)
+                self.on_updated(console)
+        return changed
+
+    def expire(self, now: Optional[float] = None) -> List:
+        """
+        Remove consoles that did not respond within `ttl` seconds.
+
+        Connected consoles never expire.
+
+        Args:
+            now: Reference timestamp, defaults to `time.time()`
+
+        Returns: List of removed consoles
+        """
+        deadline = (now or time.time()) - self.ttl
+        expired = [c for c in self._consoles.values()
+                   if not c.connected and c.last_seen < deadline]
+
+        for console in expired:
+            del self._consoles[console.liveid]
+            console.device_status = DeviceStatus.Unavailable
+            self.on_removed(console)
+        return expired
+
+    def load(self, filepath: str) -> List:
+        """
+        Add consoles from a JSON file, as written by :meth:`save`.
+
+        Loaded consoles are `DeviceStatus.Unavailable` until they respond
+        to discovery, see `Console.revalidate`.
+
+        Args:
+            filepath: Path to JSON file
+
+        Returns: List of registered consoles
+        """
+        try:
+            with open(filepath, 'r') as fh:
+                entries = json.load(fh)
+        except FileNotFoundError:
+            return []
+        except ValueError:
+            LOGGER.warning(f'Ignoring malformed console store {filepath}')
+            return []
+
+        consoles = []
+        for entry in entries:
+            try:
+                console = self.console_cls.from_dict(entry)
+            except (KeyError, TypeError, ValueError):
+                LOGGER.warning(f'Ignoring malformed console entry: {entry}')
+                continue
+            consoles.append(self.add(console))
+        return consoles
+
+    def save(self, filepath: str, consoles: Optional[List] = None) -> None:
+        """
+        Store consoles in a JSON file.
+
+        Entries already stored in the file are kept (powered off consoles
+        do not respond to discovery, but can still be powered on), known
+        consoles overwrite their previous entry. The file is replaced
+        atomically.
+
+        Args:
+            filepath: Path to JSON file
+            consoles: Consoles to store, defaults to all registered ones
+
+        Returns: None
+        """
+        try:
+            with open(filepath, 'r') as fh:
+                entries = {e['liveid']: e for e in json.load(fh)}
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            entries = {}
+
+        if consoles is None:
+            consoles = self._consoles.values()
+        for console in consoles:
+            entries[console.liveid] = console.to_dict()
+
+        tmp_filepath = filepath + '.tmp'
+        with open(tmp_filepath, 'w') as fh:
+            json.dump(list(entries.values()), fh, indent=2)
+        os.replace(tmp_filepath, filepath)
+
+    def clear(self) -> None:
+        """
+        Remove all consoles, without emitting events.
+
+        Returns: None
+        """
+        self._consoles.clear()
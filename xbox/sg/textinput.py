@@ -0,0 +1,301 @@
+"""
+Text input sessions
+
+A :class:`TextSession` buffers keystrokes for the active system text
+session and sends them in the background. At most one `SystemTextInput`
+is in flight, edits made meanwhile are coalesced into the next message
+and messages are sent at a bounded rate.
+
+By default every message carries the whole text. With `deltas` enabled
+only the changed tail is sent: The text chunk starting at the first
+changed byte (`text_chunk_byte_start`) plus the total length. This is
+opt-in, as consoles are not known to accept partial chunks.
+
+Versions are tracked locally. Every message is based on the previously
+submitted version, so sending never waits for the `SystemTextAck` of an
+older version.
+
+Example:
+    Type a search query and accept it::
+
+        async with console.text_session() as session:
+            for char in 'halo infinite':
+                session.type(char)
+                await asyncio.sleep(0.05)
+            await session.done()
+"""
+import os
+import time
+import asyncio
+import logging
+from typing import Callable, Optional
+
+from xbox.sg import factory
+from xbox.sg.enum import AckStatus, TextResult
+
+log = logging.getLogger(__name__)
+
+
+class TextSessionError(Exception):
+    """
+    Exception thrown by TextSession
+    """
+    pass
+
+
+class TextSession(object):
+    DEFAULT_RATE = 20
+
+    def __init__(
+        self,
+        manager,
+        rate: float = DEFAULT_RATE,
+        deltas: bool = False,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Buffered text input for the active system text session.
+
+        Args:
+            manager: TextManager of the console
+            rate: Max. messages per second
+            deltas: Send only the changed tail of the text instead of
+                    the whole text with every message
+            clock: Monotonic time source
+        """
+        if rate <= 0:
+            raise ValueError('rate needs to be positive')
+
+        self.manager = manager
+        self.rate = rate
+        self.deltas = deltas
+        self.clock = clock
+
+        self.text = ''
+        self.sent_text = ''
+        self.version = 0
+        self.messages_sent = 0
+        self.updates = 0
+
+        self._session_id = None
+        self._last_send = None
+        self._task: Optional[asyncio.Task] = None
+        self._error: Optional[Exception] = None
+
+    @property
+    def interval(self) -> float:
+        return 1.0 / self.rate
+
+    @property
+    def acked_version(self) -> int:
+        """
+        Latest text version acknowledged by the console via `SystemTextAck`
+
+        Returns: Text version
+        """
+        return self.manager.current_text_version
+
+    @property
+    def pending(self) -> bool:
+        return self.text != self.sent_text
+
+    def set_text(self, text: str) -> None:
+        """
+        Replace the text, sent in the background.
+
+        Args:
+            text: New text
+
+        Returns: None
+        """
+        max_length = self.manager.max_text_length
+        if max_length:
+            text = text[:max_length]
+        self.text = text
+        self.updates += 1
+        self._schedule()
+
+    def type(self, chars: str) -> None:
+        """
+        Append characters.
+
+        Args:
+            chars: Characters to append
+
+        Returns: None
+        """
+        self.set_text(self.text + chars)
+
+    def backspace(self, count: int = 1) -> None:
+        """
+        Delete characters at the end of the text.
+
+        Args:
+            count: Number of characters to delete
+
+        Returns: None
+        """
+        self.set_text(self.text[:max(0, len(self.text) - count)])
+
+    def _sync_session(self) -> None:
+        session_id = self.manager.text_session_id
+        if session_id is None:
+            raise TextSessionError('No active text session')
+        if session_id != self._session_id:
+            # New session on the console, nothing of it was sent yet
+            self._session_id = session_id
+            self.sent_text = ''
+            self.version = 0
+
+    def _on_systemtext_input(self, payload) -> None:
+        # Console side edit, take its text as the new base. Echoes of
+        # versions this session already superseded are stale
+        if payload.text_chunk_byte_start != 0 or \
+                payload.submitted_version <= self.version:
+            return
+
+        text = payload.text_chunk
+        if self.pending:
+            # Replay unsent local edits (deleted tail, appended chars)
+            # on top of the console text
+            common = len(os.path.commonprefix([self.sent_text, self.text]))
+            removed = len(self.sent_text) - common
+            text = text[:max(0, len(text) - removed)] + self.text[common:]
+            max_length = self.manager.max_text_length
+            if max_length:
+                text = text[:max_length]
+
+        self.sent_text = payload.text_chunk
+        self.version = payload.submitted_version
+        self.text = text
+        if self.pending:
+            self._schedule()
+
+    def _schedule(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while self.pending:
+            if self._last_send is not None:
+                delay = self._last_send + self.interval - self.clock()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            try:
+                await self.flush()
+            except Exception as e:
+                log.exception('Failed to send text input')
+                self._error = e
+                return
+
+    async def flush(self) -> bool:
+        """
+        Send the current text now, if it changed.
+
+        Raises:
+            TextSessionError: If there is no active text session or the
+                              message was not acknowledged
+
+        Returns: `True` if a message was sent
+        """
+        self._sync_session()
+        text = self.text
+        if text == self.sent_text:
+            return False
+
+        if self.deltas:
+            common = len(os.path.commonprefix([self.sent_text, text]))
+            chunk_start = len(text[:common].encode('utf8'))
+            chunk = text[common:]
+        else:
+            chunk_start, chunk = 0, text
+
+        # Base on the latest submitted version, not the acked one
+        base_version = max(self.version, self.acked_version)
+        msg = factory.systemtext_input(
+            session_id=self._session_id,
+            base_version=base_version,
+            submitted_version=base_version + 1,
+            total_text_len=len(text.encode('utf8')),
+            selection_start=-1,
+            selection_length=-1,
+            flags=0,
+            text_chunk_byte_start=chunk_start,
+            text_chunk=chunk
+        )
+
+        # Mark as sent before awaiting, edits meanwhile go out next
+        self.sent_text = text
+        self.version = base_version + 1
+        self._last_send = self.clock()
+        ack_status = await self.manager._send_message(msg)
+        if ack_status != AckStatus.Processed:
+            raise TextSessionError(
+                'InputMsg was not acknowledged: %s' % ack_status
+            )
+
+        self.manager.current_session_input = msg.protected_payload
+        self.messages_sent += 1
+        return True
+
+    async def wait_sent(self) -> None:
+        """
+        Wait until the current text was sent.
+
+        Raises:
+            TextSessionError: If sending failed
+
+        Returns: None
+        """
+        if self._task:
+            await self._task
+        if self._error:
+            error, self._error = self._error, None
+            raise TextSessionError(f'Sending text failed: {error}')
+        if self.pending:
+            await self.flush()
+
+    async def done(self, result: TextResult = TextResult.Accept) -> None:
+        """
+        Send remaining text and finish the text session.
+
+        Args:
+            result: Accept or cancel the text
+
+        Returns: None
+        """
+        await self.wait_sent()
+        self._sync_session()
+        await self.manager.send_systemtext_done(
+            session_id=self._session_id,
+            version=self.version,
+            flags=0,
+            result=result
+        )
+
+    def start(self) -> None:
+        """
+        Follow text edits made on the console.
+
+        Returns: None
+        """
+        self.manager.on_systemtext_input += self._on_systemtext_input
+
+    async def stop(self) -> None:
+        """
+        Send remaining text and stop following console edits.
+
+        Returns: None
+        """
+        try:
+            if self.manager.got_active_session:
+                await self.wait_sent()
+        finally:
+            self.manager.on_systemtext_input -= self._on_systemtext_input
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.stop()
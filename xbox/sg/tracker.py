@@ -0,0 +1,543 @@
+"""
+State trackers
+
+Consoles repeat their state frequently, e.g. a `MediaState` message is
+sent every second during playback, mostly with only the position
+advanced. Trackers compare successive states and emit typed events only
+for what actually changed.
+
+Example:
+    React to playback changes and redraw a progress bar twice a second::
+
+        tracker = console.media.tracker
+        tracker.on_playback_status += lambda old, new: print(old, '->', new)
+        tracker.on_track_change += lambda state: print('Now playing', state.aum_id)
+        tracker.on_seek += lambda old, new: print('Seeked to', new)
+
+        tracker.subscribe(
+            lambda state, position: progressbar.update(position),
+            interval=0.5, periodic=True
+        )
+
+    Follow active titles::
+
+        titles = console.title_tracker
+        titles.on_title_launched += lambda t: print('Launched', t.aum)
+        titles.on_title_closed += lambda t: print('Closed', t.aum)
+
+        for title in titles.running:
+            print(title.aum, 'running since', title.since)
+"""
+import time
+import asyncio
+import logging
+from enum import Enum
+from collections import deque
+from typing import Callable, Dict, FrozenSet, List, NamedTuple, Optional, \
+    Tuple
+
+from xbox.sg.enum import MediaPlaybackStatus, ActiveTitleLocation
+from xbox.sg.utils.events import Event
+from xbox.sg.utils.struct import XStruct
+
+log = logging.getLogger(__name__)
+
+TICKS_PER_SECOND = 10000000
+
+MEDIA_STATE_FIELDS = (
+    'title_id', 'aum_id', 'asset_id', 'media_type', 'sound_level',
+    'enabled_commands', 'playback_status', 'rate', 'position',
+    'media_start', 'media_end', 'min_seek', 'max_seek'
+)
+MEDIA_TRACK_FIELDS = ('title_id', 'aum_id', 'asset_id')
+
+
+def media_metadata(state: Optional[XStruct]) -> Dict[str, str]:
+    """
+    Media metadata as dict.
+
+    Args:
+        state: Media state payload
+
+    Returns: Dict of metadata name -> value
+    """
+    if not state:
+        return {}
+    return {m.name: m.value for m in state.metadata}
+
+
+def diff_media_state(
+    old: Optional[XStruct],
+    new: Optional[XStruct]
+) -> FrozenSet[str]:
+    """
+    Compare two media states field by field.
+
+    Args:
+        old: Previous media state payload
+        new: Current media state payload
+
+    Returns: Names of changed fields, metadata changes are reported
+             as `metadata`
+    """
+    if old is new:
+        # Also covers memoized payloads, see `packer.DecodeMemo`
+        return frozenset()
+    elif old is None or new is None:
+        return frozenset(MEDIA_STATE_FIELDS + ('metadata',))
+
+    changed = {f for f in MEDIA_STATE_FIELDS
+               if getattr(old, f) != getattr(new, f)}
+    if media_metadata(old) != media_metadata(new):
+        changed.add('metadata')
+    return frozenset(changed)
+
+
+class Subscription(object):
+    def __init__(
+        self,
+        tracker: 'MediaStateTracker',
+        handler: Callable,
+        interval: float,
+        periodic: bool
+    ):
+        """
+        Throttled subscription to a :class:`MediaStateTracker`.
+
+        Args:
+            tracker: Tracker instance
+            handler: Callback receiving (state, interpolated position)
+            interval: Min. seconds between calls
+            periodic: Keep calling every `interval` during playback
+        """
+        self.tracker = tracker
+        self.handler = handler
+        self.interval = interval
+        self.periodic = periodic
+
+        self._last = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def notify(self) -> None:
+        """
+        Deliver the current state now or, if called within `interval`
+        of the last delivery, once the interval passed. Notifications
+        in between are coalesced.
+
+        Returns: None
+        """
+        if self._timer:
+            return
+
+        now = self.tracker.clock()
+        if self._last is None or now - self._last >= self.interval:
+            self._deliver()
+        else:
+            self._schedule(self._last + self.interval - now)
+
+    def cancel(self) -> None:
+        """
+        Stop receiving updates.
+
+        Returns: None
+        """
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        if self in self.tracker._subscriptions:
+            self.tracker._subscriptions.remove(self)
+
+    def _schedule(self, delay: float) -> None:
+        loop = asyncio.get_running_loop()
+        self._timer = loop.call_later(delay, self._fire)
+
+    def _fire(self) -> None:
+        self._timer = None
+        self._deliver()
+
+    def _deliver(self) -> None:
+        self._last = self.tracker.clock()
+        try:
+            self.handler(self.tracker.state, self.tracker.position)
+        except Exception:
+            log.exception('Exception in media state subscriber')
+
+        if self.periodic and self.tracker.playing:
+            self._schedule(self.interval)
+
+
+class MediaStateTracker(object):
+    DEFAULT_SEEK_TOLERANCE = 2.0
+
+    def __init__(
+        self,
+        seek_tolerance: float = DEFAULT_SEEK_TOLERANCE,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Change detection for `MediaState` payloads.
+
+        Position is interpolated locally from the last reported position
+        and playback `rate`, position updates matching the interpolation
+        do not cause any events. Jumps larger than `seek_tolerance` are
+        reported as seek.
+
+        Args:
+            seek_tolerance: Max. deviation from the interpolated position,
+                            in seconds, before a position update is
+                            considered a seek
+            clock: Monotonic time source
+        """
+        self.seek_tolerance = seek_tolerance
+        self.clock = clock
+
+        self.state: Optional[XStruct] = None
+        self.updated: Optional[float] = None
+        self._subscriptions = []
+
+        self.on_change = Event()
+        self.on_playback_status = Event()
+        self.on_track_change = Event()
+        self.on_metadata_change = Event()
+        self.on_seek = Event()
+
+    @property
+    def playing(self) -> bool:
+        """
+        Whether media is currently playing
+
+        Returns: `True` if playing
+        """
+        return self.state is not None and \
+            self.state.playback_status == MediaPlaybackStatus.Playing
+
+    @property
+    def position(self) -> Optional[int]:
+        """
+        Playback position, interpolated from last update and rate
+
+        Returns: Position in 100ns ticks, `None` if no media is active
+        """
+        if self.state is None:
+            return None
+
+        position = self.state.position
+        if self.playing and self.state.rate:
+            elapsed = self.clock() - self.updated
+            position += int(elapsed * self.state.rate * TICKS_PER_SECOND)
+            if self.state.media_end > self.state.media_start:
+                position = min(position, self.state.media_end)
+        return position
+
+    @property
+    def metadata(self) -> Dict[str, str]:
+        """
+        Metadata of the current media
+
+        Returns: Dict of metadata name -> value
+        """
+        return media_metadata(self.state)
+
+    def update(self, state: Optional[XStruct]) -> FrozenSet[str]:
+        """
+        Feed a new media state.
+
+        Can be used as handler for `MediaManager.on_media_state`.
+
+        Args:
+            state: Media state payload, `None` if media was removed
+
+        Returns: Names of changed fields
+        """
+        old = self.state
+        expected = self.position
+        changed = diff_media_state(old, state)
+
+        self.state = state
+        self.updated = self.clock()
+        if not changed:
+            return changed
+
+        significant = changed - {'position'}
+        if state is None:
+            self.on_change(None, changed)
+            self._notify()
+            return changed
+
+        track_changed = old is None or \
+            any(f in changed for f in MEDIA_TRACK_FIELDS)
+        if track_changed:
+            self.on_track_change(state)
+
+        if 'playback_status' in changed:
+            self.on_playback_status(
+                old.playback_status if old else None, state.playback_status
+            )
+
+        if 'metadata' in changed:
+            self.on_metadata_change(self.metadata)
+
+        if 'position' in changed and not track_changed:
+            deviation = abs(state.position - expected) / TICKS_PER_SECOND
+            if deviation > self.seek_tolerance:
+                self.on_seek(expected, state.position)
+                significant = changed
+
+        if significant:
+            self.on_change(state, changed)
+            self._notify()
+        return changed
+
+    def clear(self) -> None:
+        """
+        Forget the current media state, e.g. when the media
+        controller was removed.
+
+        Returns: None
+        """
+        self.update(None)
+
+    def subscribe(
+        self,
+        handler: Callable,
+        interval: float = 1.0,
+        periodic: bool = False
+    ) -> Subscription:
+        """
+        Subscribe to state changes at a limited rate.
+
+        The handler is called with (state, interpolated position) at
+        most once per `interval`, changes in between are coalesced into
+        a single call.
+
+        Args:
+            handler: Callback receiving (state, position)
+            interval: Min. seconds between calls
+            periodic: Keep calling every `interval` during playback, to
+                      drive progress displays
+
+        Returns: Subscription, call `cancel()` to unsubscribe
+        """
+        subscription = Subscription(self, handler, interval, periodic)
+        self._subscriptions.append(subscription)
+        if self.state is not None:
+            subscription.notify()
+        return subscription
+
+    def _notify(self) -> None:
+        for subscription in tuple(self._subscriptions):
+            subscription.notify()
+
+
+class TitleEventType(Enum):
+    """
+    Kind of change in active titles
+    """
+    Launched = 'launched'
+    Closed = 'closed'
+    FocusChanged = 'focus_changed'
+
+
+class RunningTitle(NamedTuple):
+    """
+    Active title, as tracked by :class:`TitleTracker`
+    """
+    title_id: int
+    location: ActiveTitleLocation
+    aum: str
+    has_focus: bool
+    since: float
+    focus_since: Optional[float] = None
+
+    @property
+    def key(self) -> Tuple[int, ActiveTitleLocation]:
+        return self.title_id, self.location
+
+
+class TitleEvent(NamedTuple):
+    """
+    Entry of the title history
+    """
+    event_type: TitleEventType
+    title_id: int
+    location: ActiveTitleLocation
+    aum: str
+    timestamp: float
+
+
+class TitleTracker(object):
+    DEFAULT_HISTORY = 32
+
+    def __init__(
+        self,
+        history: int = DEFAULT_HISTORY,
+        clock: Callable[[], float] = time.time
+    ):
+        """
+        Incremental tracking of active titles from `ConsoleStatus`
+        payloads.
+
+        Titles are keyed by (title id, location), launch / close and
+        focus changes are emitted as events and recorded in a history
+        ring buffer.
+
+        Args:
+            history: Number of title events kept
+            clock: Time source for timestamps
+        """
+        self.clock = clock
+        self.history = deque(maxlen=history)
+        self._titles: Dict[Tuple[int, ActiveTitleLocation], RunningTitle] = {}
+        self._status = None
+        self._signature = ()
+
+        self.on_title_launched = Event()
+        self.on_title_closed = Event()
+        self.on_focus_changed = Event()
+
+    def __contains__(self, title_id: int) -> bool:
+        return any(k[0] == title_id for k in self._titles)
+
+    def __len__(self) -> int:
+        return len(self._titles)
+
+    @property
+    def running(self) -> List[RunningTitle]:
+        """
+        Currently active titles
+
+        Returns: List of titles, oldest first
+        """
+        return sorted(self._titles.values(), key=lambda t: t.since)
+
+    @property
+    def focused(self) -> Optional[RunningTitle]:
+        """
+        Title having focus
+
+        Returns: Focused title or `None`
+        """
+        return next((t for t in self._titles.values() if t.has_focus), None)
+
+    def get(
+        self,
+        title_id: int,
+        location: Optional[ActiveTitleLocation] = None
+    ) -> Optional[RunningTitle]:
+        """
+        Get active title.
+
+        Args:
+            title_id: Title Id
+            location: Title location, any if not given
+
+        Returns: Title or `None` if not running
+        """
+        if location is not None:
+            return self._titles.get((title_id, location))
+        return next(
+            (t for t in self._titles.values() if t.title_id == title_id), None
+        )
+
+    def since(self, title_id: int) -> Optional[float]:
+        """
+        Timestamp since when a title is running.
+
+        Args:
+            title_id: Title Id
+
+        Returns: Timestamp or `None` if not running
+        """
+        times = [t.since for t in self._titles.values()
+                 if t.title_id == title_id]
+        return min(times) if times else None
+
+    def update(self, status: Optional[XStruct]) -> List[TitleEvent]:
+        """
+        Feed a new console status.
+
+        Can be used as handler for `Console.on_console_status`.
+
+        Args:
+            status: Console status payload, `None` when disconnected
+
+        Returns: List of title events caused by this update
+        """
+        if status is not None and status is self._status:
+            return []
+        self._status = status
+
+        titles = status.active_titles if status else []
+        signature = tuple(
+            (t.title_id, t.disposition.title_location, t.disposition.has_focus)
+            for t in titles
+        )
+        # Fast path, consoles repeat their status frequently
+        if signature == self._signature:
+            return []
+        self._signature = signature
+
+        now = self.clock()
+        current = {}
+        for title in titles:
+            key = (title.title_id, title.disposition.title_location)
+            current[key] = title
+
+        events = []
+        old_focused = self.focused
+
+        for key in [k for k in self._titles if k not in current]:
+            closed = self._titles.pop(key)
+            events.append(self._record(TitleEventType.Closed, closed, now))
+            self.on_title_closed(closed)
+
+        for key, title in current.items():
+            has_focus = title.disposition.has_focus
+            existing = self._titles.get(key)
+            if not existing:
+                launched = RunningTitle(
+                    title.title_id, key[1], title.aum, has_focus, now,
+                    now if has_focus else None
+                )
+                self._titles[key] = launched
+                events.append(
+                    self._record(TitleEventType.Launched, launched, now)
+                )
+                self.on_title_launched(launched)
+            elif existing.has_focus != has_focus:
+                self._titles[key] = existing._replace(
+                    has_focus=has_focus,
+                    focus_since=now if has_focus else None
+                )
+
+        new_focused = self.focused
+        old_key = old_focused.key if old_focused else None
+        new_key = new_focused.key if new_focused else None
+        if old_key != new_key:
+            if new_focused:
+                events.append(
+                    self._record(TitleEventType.FocusChanged, new_focused, now)
+                )
+            self.on_focus_changed(old_focused, new_focused)
+
+        return events
+
+    def clear(self) -> List[TitleEvent]:
+        """
+        Close all titles, e.g. on disconnect.
+
+        Returns: List of title events
+        """
+        return self.update(None)
+
+    def _record(
+        self,
+        event_type: TitleEventType,
+        title: RunningTitle,
+        timestamp: float
+    ) -> TitleEvent:
+        event = TitleEvent(
+            event_type, title.title_id, title.location, title.aum, timestamp
+        )
+        self.history.append(event)
+        return event
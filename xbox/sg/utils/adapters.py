@@ -2,6 +2,7 @@
 Adapters and other Construct utility classes
 """
 import json
+import hashlib
 import construct
 from io import BytesIO
 from enum import Enum
@@ -151,14 +152,17 @@ class CertificateAdapter(construct.Adapter):
         return obj.dump()
 
     def _decode(self, obj, context, path):
-        return CertificateInfo(obj)
+        return CertificateInfo.load(obj)
 
     def _emitparse(self, code):
         code.append('from xbox.sg.utils.adapters import CertificateInfo')
-        return 'CertificateInfo({})'.format(self.subcon._emitparse(code))
+        return 'CertificateInfo.load({})'.format(self.subcon._emitparse(code))
 
 
 class CertificateInfo(object):
+    CACHE_SIZE = 256
+    _cache = {}
+
     def __init__(self, raw_cert):
         """
         Helper class for parsing a x509 certificate.
@@ -173,6 +177,33 @@ class CertificateInfo(object):
             NameOID.COMMON_NAME)[0].value
         self.pubkey = self.cert.public_key()
 
+    @classmethod
+    def load(cls, raw_cert):
+        """
+        Parse a x509 certificate, reusing earlier results.
+
+        Consoles send the same certificate with every discovery response,
+        parsed instances are cached by the SHA-256 digest of the DER data.
+
+        Args:
+            raw_cert (bytes): The DER certificate to parse.
+
+        Returns:
+            CertificateInfo: Parsed (possibly shared) instance
+        """
+        if not isinstance(raw_cert, bytes):
+            return cls(raw_cert)
+
+        digest = hashlib.sha256(raw_cert).digest()
+        info = cls._cache.get(digest)
+        if not info:
+            info = cls(raw_cert)
+            if len(cls._cache) >= cls.CACHE_SIZE:
+                # Evict oldest entry
+                del cls._cache[next(iter(cls._cache))]
+            cls._cache[digest] = info
+        return info
+
     def dump(self, encoding=Encoding.DER):
         return self.cert.public_bytes(encoding)
 
@@ -2,12 +2,44 @@
 Wrapper around asyncio's tasks
 """
 import asyncio
+import logging
+from collections import deque
+
+log = logging.getLogger(__name__)
 
 
 class Event(object):
-    def __init__(self, asynchronous: bool = False):
+    def __init__(
+        self,
+        asynchronous: bool = False,
+        max_concurrency: int = None,
+        ordered: bool = False,
+        on_error=None
+    ):
+        """
+        Event, calling all added handlers when fired.
+
+        Asynchronous events run their handlers as tasks. The tasks are
+        tracked until finished (see :meth:`drain`) and exceptions are
+        passed to `on_error` (or logged).
+
+        Args:
+            asynchronous: Run handlers as tasks, handlers may be coroutine
+                          functions
+            max_concurrency: Max. handler calls in flight, further calls
+                             are queued; `None` for no limit
+            ordered: Run handler calls one after another, in order of firing
+            on_error: Callback receiving (exception, handler) on failure
+        """
         self.handlers = []
         self.asynchronous = asynchronous
+        self.max_concurrency = 1 if ordered else max_concurrency
+        self.ordered = ordered
+        self.on_error = on_error
+
+        self._tasks = set()
+        self._pending = deque()
+        self._workers = 0
 
     def add(self, handler):
         if not callable(handler):
@@ -29,6 +61,109 @@ class Event(object):
     def __call__(self, *args, **kwargs):
         for handler in self.handlers:
             if self.asynchronous:
-                asyncio.create_task(handler(*args, **kwargs))
+                self._schedule(handler, args, kwargs)
             else:
                 handler(*args, **kwargs)
+
+    @property
+    def pending(self) -> int:
+        """
+        Number of handler calls queued or in flight
+        """
+        return len(self._pending) + len(self._tasks)
+
+    def _schedule(self, handler, args, kwargs):
+        if not self.max_concurrency:
+            self._spawn(self._run(handler, args, kwargs))
+            return
+
+        self._pending.append((handler, args, kwargs))
+        if self._workers < self.max_concurrency:
+            self._workers += 1
+            self._spawn(self._worker())
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        # Keep a strong reference until the task is done
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _worker(self):
+        try:
+            while self._pending:
+                handler, args, kwargs = self._pending.popleft()
+                await self._run(handler, args, kwargs)
+        finally:
+            self._workers -= 1
+
+    async def _run(self, handler, args, kwargs):
+        try:
+            result = handler(*args, **kwargs)
+            if asyncio.iscoroutine(result):
+                await result
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if self.on_error:
+                self.on_error(e, handler)
+            else:
+                log.exception('Event handler %r failed', handler)
+
+    async def drain(self, timeout: float = None) -> None:
+        """
+        Wait for queued and running handler calls to finish,
+        e.g. on shutdown.
+
+        Args:
+            timeout: Cancel remaining handler calls after this many seconds
+
+        Returns: None
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+
+        while self._tasks:
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                break
+            await asyncio.wait(set(self._tasks), timeout=remaining)
+
+        if self._tasks:
+            self._pending.clear()
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+class MessageDispatcher(object):
+    def __init__(self):
+        """
+        Index of message handlers, keyed by service channel and
+        (optionally) message type.
+
+        Handlers registered without message type receive all messages
+        of the channel. Dispatching only touches the handlers of the
+        matching keys.
+        """
+        self.handlers = {}
+
+    def subscribe(self, handler, channel, msg_type=None):
+        if not callable(handler):
+            raise TypeError("Handler should be callable")
+        self.handlers.setdefault((channel, msg_type), []).append(handler)
+
+    def unsubscribe(self, handler, channel, msg_type=None):
+        key = (channel, msg_type)
+        handlers = self.handlers.get(key, [])
+        if handler in handlers:
+            handlers.remove(handler)
+        if not handlers:
+            self.handlers.pop(key, None)
+
+    def dispatch(self, msg, channel, msg_type=None):
+        if msg_type is not None:
+            # Copy, handlers might unsubscribe themselves
+            for handler in tuple(self.handlers.get((channel, msg_type), ())):
+                handler(msg, channel)
+        for handler in tuple(self.handlers.get((channel, None), ())):
+            handler(msg, channel)
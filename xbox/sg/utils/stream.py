@@ -0,0 +1,199 @@
+"""
+Async iterator streams
+
+Bounded, per-subscriber buffers which are fed synchronously (e.g. from
+a datagram handler) and consumed with `async for`. Feeding a stream never
+blocks, if the consumer falls behind the configured overflow policy
+decides what happens.
+
+Example:
+    Consume media states::
+
+        async with console.media.media_states(replay=1) as states:
+            async for state in states:
+                print(state.playback_status)
+"""
+import asyncio
+from enum import Enum
+from collections import deque
+from typing import Callable, Optional, Any
+
+
+class OverflowPolicy(Enum):
+    """
+    What to do when a stream buffer is full
+    """
+    DropOldest = 'drop_oldest'
+    DropNewest = 'drop_newest'
+    Raise = 'raise'
+
+
+class StreamOverflowError(Exception):
+    """
+    Raised by a stream with `OverflowPolicy.Raise` once its buffer overflowed
+    """
+    pass
+
+
+class MessageStream(object):
+    DEFAULT_MAXSIZE = 100
+
+    def __init__(
+        self,
+        maxsize: int = DEFAULT_MAXSIZE,
+        overflow: OverflowPolicy = OverflowPolicy.DropOldest,
+        on_close: Optional[Callable] = None
+    ):
+        """
+        Bounded async iterator.
+
+        Args:
+            maxsize: Max. buffered items
+            overflow: Overflow policy
+            on_close: Callback, receiving the stream, when it gets closed
+        """
+        if maxsize < 1:
+            raise ValueError('maxsize needs to be at least 1')
+
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.dropped = 0
+
+        self._items = deque()
+        self._waiter: Optional[asyncio.Future] = None
+        self._error: Optional[Exception] = None
+        self._closed = False
+        self._on_close = on_close
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def put(self, item: Any) -> None:
+        """
+        Add item to the stream, never blocks.
+
+        Args:
+            item: Item
+
+        Returns: None
+        """
+        if self._closed:
+            return
+
+        if len(self._items) >= self.maxsize:
+            self.dropped += 1
+            if self.overflow == OverflowPolicy.DropNewest:
+                return
+            elif self.overflow == OverflowPolicy.DropOldest:
+                self._items.popleft()
+            else:
+                self._error = StreamOverflowError(
+                    f'Stream buffer overflowed (maxsize={self.maxsize})'
+                )
+                self.close()
+                return
+
+        self._items.append(item)
+        self._wakeup()
+
+    def close(self) -> None:
+        """
+        Close the stream. Buffered items can still be consumed.
+
+        Returns: None
+        """
+        if self._closed:
+            return
+
+        self._closed = True
+        if self._on_close:
+            self._on_close(self)
+        self._wakeup()
+
+    def _wakeup(self) -> None:
+        if self._waiter and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Any:
+        if self._error:
+            raise self._error
+
+        while not self._items:
+            if self._closed:
+                raise StopAsyncIteration
+
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+
+            if self._error:
+                raise self._error
+
+        return self._items.popleft()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+class StreamHub(object):
+    def __init__(self, history: int = 0):
+        """
+        Fan out items to any number of streams.
+
+        Args:
+            history: Number of recent items kept for replay
+        """
+        self._history = deque(maxlen=history)
+        self._streams = []
+
+    def __len__(self) -> int:
+        return len(self._streams)
+
+    def publish(self, *args) -> None:
+        """
+        Publish an item to all open streams.
+
+        Can be used as :class:`Event` handler, multiple arguments are
+        published as tuple.
+
+        Returns: None
+        """
+        item = args[0] if len(args) == 1 else args
+        self._history.append(item)
+        for stream in tuple(self._streams):
+            stream.put(item)
+
+    def stream(
+        self,
+        maxsize: int = MessageStream.DEFAULT_MAXSIZE,
+        overflow: OverflowPolicy = OverflowPolicy.DropOldest,
+        replay: int = 0
+    ) -> MessageStream:
+        """
+        Open a new stream.
+
+        Args:
+            maxsize: Max. buffered items
+            overflow: Overflow policy
+            replay: Number of recent items to start the stream with
+
+        Returns: Stream
+        """
+        stream = MessageStream(maxsize, overflow, self._streams.remove)
+        if replay:
+            for item in list(self._history)[-replay:]:
+                stream.put(item)
+        self._streams.append(stream)
+        return stream
@@ -0,0 +1,188 @@
+"""
+Stump response cache
+
+Caches responses of stump requests whose data rarely changes (device
+configuration, headend info, tuner lineups), per console. Entries expire
+after a per message type TTL and are invalidated by the stump
+notifications announcing a change of the underlying data.
+
+Concurrent identical requests are deduplicated: Only the first one goes
+to the console, the others wait for its result.
+"""
+import json
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from xbox.stump.enum import Message, Notification
+
+log = logging.getLogger(__name__)
+
+# Seconds a response stays valid, message types not listed are not cached
+DEFAULT_TTLS = {
+    Message.CONFIGURATION: 3600,
+    Message.HEADEND_INFO: 3600,
+    Message.TUNER_LINEUPS: 3600,
+    Message.APPCHANNEL_LINEUPS: 3600,
+    Message.LIVETV_INFO: 10
+}
+
+# Cached message types invalidated by a notification
+INVALIDATIONS = {
+    Notification.CONFIGURATION_CHANGED: (
+        Message.CONFIGURATION,
+    ),
+    Notification.HEADEND_CHANGED: (
+        Message.HEADEND_INFO, Message.TUNER_LINEUPS,
+        Message.APPCHANNEL_LINEUPS, Message.LIVETV_INFO
+    ),
+    Notification.TUNERSTATE_CHANGED: (
+        Message.TUNER_LINEUPS, Message.LIVETV_INFO
+    ),
+    Notification.CHANNEL_CHANGED: (Message.LIVETV_INFO,),
+    Notification.CHANNELTYPE_CHANGED: (Message.LIVETV_INFO,),
+    Notification.DEVICE_UI_CHANGED: (Message.LIVETV_INFO,),
+    Notification.VIDEOFORMAT_CHANGED: (Message.LIVETV_INFO,)
+}
+
+
+class StumpCache(object):
+    def __init__(
+        self,
+        ttls: Optional[Dict[Message, float]] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        TTL cache with single-flight requests.
+
+        Args:
+            ttls: TTL in seconds per message type, defaults to
+                  `DEFAULT_TTLS`
+            clock: Monotonic time source
+        """
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+
+        # key -> (expiry, result)
+        self._entries: Dict[Tuple, Tuple[float, Any]] = {}
+        # key -> (generation, future)
+        self._inflight: Dict[Tuple, Tuple[int, asyncio.Future]] = {}
+        # Bumped on invalidation, requests started before are neither
+        # joined nor stored
+        self._generation = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _key(message: Message, params: Optional[dict]) -> Tuple:
+        return message, json.dumps(params, sort_keys=True)
+
+    def cacheable(self, message: Message) -> bool:
+        return self.ttls.get(message, 0) > 0
+
+    def get_cached(self, message: Message, params: Optional[dict] = None) -> Any:
+        """
+        Get a cached, unexpired response.
+
+        Args:
+            message: Message type
+            params: Request parameters
+
+        Returns: Response or `None`
+        """
+        entry = self._entries.get(self._key(message, params))
+        if entry and entry[0] > self.clock():
+            return entry[1]
+
+    async def get(
+        self,
+        message: Message,
+        params: Optional[dict],
+        fetch: Callable[[], Awaitable[Any]],
+        refresh: bool = False
+    ) -> Any:
+        """
+        Get response from cache or fetch it.
+
+        Args:
+            message: Message type
+            params: Request parameters
+            fetch: Coroutine function requesting the data from the console
+            refresh: Bypass cached entries (in-flight requests are
+                     still joined)
+
+        Returns: Response
+        """
+        if not self.cacheable(message):
+            return await fetch()
+
+        key = self._key(message, params)
+        if not refresh:
+            entry = self._entries.get(key)
+            if entry and entry[0] > self.clock():
+                self.hits += 1
+                return entry[1]
+
+        inflight = self._inflight.get(key)
+        if inflight and inflight[0] == self._generation:
+            future = inflight[1]
+        else:
+            self.misses += 1
+            future = asyncio.ensure_future(
+                self._fetch(key, fetch, self._generation)
+            )
+            self._inflight[key] = (self._generation, future)
+        # Callers getting cancelled must not cancel the shared request
+        return await asyncio.shield(future)
+
+    async def _fetch(
+        self,
+        key: Tuple,
+        fetch: Callable[[], Awaitable[Any]],
+        generation: int
+    ) -> Any:
+        try:
+            result = await fetch()
+        finally:
+            if self._inflight.get(key, (None,))[0] == generation:
+                del self._inflight[key]
+
+        if generation == self._generation:
+            self._entries[key] = (self.clock() + self.ttls[key[0]], result)
+        return result
+
+    def invalidate(self, *messages: Message) -> None:
+        """
+        Drop cached responses.
+
+        Args:
+            *messages: Message types to drop, all if none given
+
+        Returns: None
+        """
+        self._generation += 1
+        if not messages:
+            self._entries.clear()
+            return
+        for key in [k for k in self._entries if k[0] in messages]:
+            del self._entries[key]
+
+    def on_notification(self, notification: Notification, data=None) -> None:
+        """
+        Invalidate responses affected by a stump notification, can be
+        used as :class:`Event` handler.
+
+        Args:
+            notification: Notification type
+            data: Notification message
+
+        Returns: None
+        """
+        messages = INVALIDATIONS.get(notification)
+        if messages:
+            log.debug('%s: Invalidating %s', notification, messages)
+            self.invalidate(*messages)
@@ -0,0 +1,99 @@
+"""
+Stump request / response correlation
+
+Stump requests carry a message id, the console echoes it in the response.
+:class:`RequestCorrelator` maps message ids to futures, so any number of
+requests can be in flight at once. Every request gets its own deadline;
+futures of timed out or abandoned (cancelled) requests are removed right
+away, late responses for them are ignored.
+"""
+import asyncio
+import logging
+from typing import Any, Dict, Tuple
+
+log = logging.getLogger(__name__)
+
+
+class RequestTimeoutError(Exception):
+    """
+    Raised when a stump request got no response before its deadline
+    """
+    pass
+
+
+class RequestCorrelator(object):
+    def __init__(self):
+        """
+        Maps message ids of in-flight requests to futures.
+        """
+        # msgid -> (future, deadline timer)
+        self._pending: Dict[str, Tuple[asyncio.Future, asyncio.TimerHandle]] = {}
+        self.late_responses = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def __contains__(self, msgid: str) -> bool:
+        return msgid in self._pending
+
+    def register(self, msgid: str, timeout: float) -> asyncio.Future:
+        """
+        Register a request, before it is sent.
+
+        Args:
+            msgid: Message id of the request
+            timeout: Seconds until the future fails with
+                     :class:`RequestTimeoutError`
+
+        Returns: Future, resolving to the response
+        """
+        if msgid in self._pending:
+            raise ValueError(f'Request {msgid} already pending')
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        timer = loop.call_later(timeout, self._expire, msgid, timeout)
+        self._pending[msgid] = (future, timer)
+        future.add_done_callback(lambda f: self._discard(msgid, f))
+        return future
+
+    def _discard(self, msgid: str, future: asyncio.Future) -> None:
+        entry = self._pending.get(msgid)
+        if entry and entry[0] is future:
+            entry[1].cancel()
+            del self._pending[msgid]
+
+    def _expire(self, msgid: str, timeout: float) -> None:
+        entry = self._pending.pop(msgid, None)
+        if entry and not entry[0].done():
+            entry[0].set_exception(RequestTimeoutError(
+                f'Request {msgid} got no response within {timeout}s'
+            ))
+
+    def resolve(self, msgid: str, result: Any) -> bool:
+        """
+        Resolve a pending request with its response.
+
+        Args:
+            msgid: Message id of the response
+            result: Response
+
+        Returns: `True` if a request was waiting for the response
+        """
+        entry = self._pending.pop(msgid, None)
+        if not entry or entry[0].done():
+            self.late_responses += 1
+            log.debug('No pending request for response %s', msgid)
+            return False
+        entry[1].cancel()
+        entry[0].set_result(result)
+        return True
+
+    def cancel_all(self) -> None:
+        """
+        Cancel all pending requests.
+
+        Returns: None
+        """
+        for future, _ in list(self._pending.values()):
+            future.cancel()
@@ -0,0 +1,556 @@
+"""
+Electronic programme guide (EPG)
+
+The console hands out programme data one app channel at a time. :class:`Epg`
+prefetches the schedules of all channels of all app channel lineups with
+bounded concurrency and keeps them in a local sqlite store
+(:class:`EpgStore`), indexed by channel and start time. Guide queries like
+"what's on now / next" are answered from the store, without a console round
+trip.
+
+Refreshes are incremental: Only channels whose schedule is older than
+`max_age` (or new to the lineup) are fetched again. Channels that
+disappeared from the lineup are dropped.
+
+The layout of `GetAppChannelData` responses is provider specific,
+:func:`parse_schedule` extracts programmes from the common layouts. A custom
+parser can be passed to :class:`Epg`.
+
+Example:
+    Print what's on now::
+
+        epg = Epg(console.stump, EpgStore('guide.sqlite'))
+        await epg.refresh()
+        for (provider_id, channel_id), (now, next) in epg.now_next().items():
+            print(channel_id, now.title if now else '-')
+"""
+import json
+import time
+import sqlite3
+import logging
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from xbox.stump import json_model
+from xbox.stump.enum import Message
+from xbox.stump.manager import StumpException
+
+log = logging.getLogger(__name__)
+
+# Seconds until a channel schedule gets refreshed
+EPG_MAX_AGE = 3600
+# Max. channel data requests in flight during refresh
+EPG_CONCURRENCY = 4
+# Seconds ended programmes are kept for
+EPG_KEEP_PAST = 3 * 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS channels (
+    provider_id TEXT NOT NULL,
+    channel_id TEXT NOT NULL,
+    name TEXT,
+    fetched REAL,
+    PRIMARY KEY (provider_id, channel_id)
+);
+CREATE TABLE IF NOT EXISTS programmes (
+    provider_id TEXT NOT NULL,
+    channel_id TEXT NOT NULL,
+    start REAL NOT NULL,
+    end REAL NOT NULL,
+    programme_id TEXT,
+    title TEXT,
+    details TEXT,
+    PRIMARY KEY (provider_id, channel_id, start)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS programmes_time ON programmes (start, end);
+CREATE INDEX IF NOT EXISTS programmes_id ON programmes (provider_id, programme_id);
+"""
+
+PROGRAMME_COLUMNS = 'provider_id, channel_id, start, end, programme_id, title, details'
+
+ChannelKey = Tuple[str, str]
+
+
+class Programme(NamedTuple):
+    """
+    Programme of a channel, times are unix timestamps
+    """
+    provider_id: str
+    channel_id: str
+    start: float
+    end: float
+    programme_id: Optional[str] = None
+    title: Optional[str] = None
+    details: Optional[dict] = None
+
+    @property
+    def channel(self) -> ChannelKey:
+        return self.provider_id, self.channel_id
+
+    def airing(self, at: float) -> bool:
+        return self.start <= at < self.end
+
+
+def _timestamp(value) -> Optional[float]:
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        # Milliseconds
+        return value / 1000.0 if value > 1e11 else float(value)
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except (AttributeError, ValueError):
+        return None
+
+
+def parse_schedule(params) -> List[dict]:
+    """
+    Extract programmes from a `GetAppChannelData` response.
+
+    Accepts a list of programmes or an object holding one under
+    `programs`, `programmes`, `schedule` or `airings`. Per programme,
+    `startTime` / `start` and `endTime` / `end` (or `duration` in
+    seconds) are read as unix time (s or ms) or ISO 8601.
+
+    Args:
+        params: Response params
+
+    Returns: Dicts with `start`, `end`, `programme_id`, `title`
+    """
+    entries = params
+    if isinstance(params, dict):
+        for key in ('programs', 'programmes', 'schedule', 'airings'):
+            if isinstance(params.get(key), list):
+                entries = params[key]
+                break
+        else:
+            entries = []
+    if not isinstance(entries, list):
+        return []
+
+    programmes = []
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        start = _timestamp(entry.get('startTime', entry.get('start')))
+        end = _timestamp(entry.get('endTime', entry.get('end')))
+        if end is None and start is not None and entry.get('duration'):
+            end = start + float(entry['duration'])
+        if start is None or end is None or end <= start:
+            continue
+        programme_id = entry.get('programId', entry.get('id'))
+        programmes.append({
+            'start': start,
+            'end': end,
+            'programme_id': str(programme_id) if programme_id is not None else None,
+            'title': entry.get('title', entry.get('name'))
+        })
+    return programmes
+
+
+class EpgStore(object):
+    def __init__(self, path: str = ':memory:'):
+        """
+        Local programme store, backed by sqlite.
+
+        Args:
+            path: Database file, in-memory by default
+        """
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.db.close()
+
+    @staticmethod
+    def _programme(row) -> Optional[Programme]:
+        if not row:
+            return None
+        details = json.loads(row[6]) if row[6] is not None else None
+        return Programme(*row[:6], details)
+
+    def set_channels(
+        self,
+        provider_id: str,
+        channels: Iterable[Tuple[str, str]]
+    ) -> None:
+        """
+        Set the channel lineup of a provider. Channels not in the lineup
+        anymore are removed, with their programmes.
+
+        Args:
+            provider_id: Provider ID
+            channels: Tuples of (channel ID, name)
+
+        Returns: None
+        """
+        channels = list(channels)
+        ids = {channel_id for channel_id, _ in channels}
+        with self.db:
+            known = self.db.execute(
+                'SELECT channel_id FROM channels WHERE provider_id = ?',
+                (provider_id,)
+            ).fetchall()
+            for (channel_id,) in known:
+                if channel_id not in ids:
+                    self._drop_channel(provider_id, channel_id)
+            self.db.executemany(
+                'INSERT INTO channels (provider_id, channel_id, name) '
+                'VALUES (?, ?, ?) ON CONFLICT (provider_id, channel_id) '
+                'DO UPDATE SET name = excluded.name',
+                [(provider_id, channel_id, name) for channel_id, name in channels]
+            )
+
+    def _drop_channel(self, provider_id: str, channel_id: str) -> None:
+        for table in ('channels', 'programmes'):
+            self.db.execute(
+                f'DELETE FROM {table} WHERE provider_id = ? AND channel_id = ?',
+                (provider_id, channel_id)
+            )
+
+    def channels(self, provider_id: Optional[str] = None) -> List[Tuple[str, str, str]]:
+        """
+        Known channels.
+
+        Args:
+            provider_id: Only channels of this provider
+
+        Returns: Tuples of (provider ID, channel ID, name)
+        """
+        if provider_id is None:
+            return self.db.execute(
+                'SELECT provider_id, channel_id, name FROM channels'
+            ).fetchall()
+        return self.db.execute(
+            'SELECT provider_id, channel_id, name FROM channels '
+            'WHERE provider_id = ?', (provider_id,)
+        ).fetchall()
+
+    def stale_channels(self, max_age: float, now: float) -> List[ChannelKey]:
+        """
+        Channels whose schedule was never fetched or is older than `max_age`.
+
+        Args:
+            max_age: Max. age in seconds
+            now: Current unix time
+
+        Returns: Tuples of (provider ID, channel ID)
+        """
+        return self.db.execute(
+            'SELECT provider_id, channel_id FROM channels '
+            'WHERE fetched IS NULL OR fetched < ?', (now - max_age,)
+        ).fetchall()
+
+    def store_schedule(
+        self,
+        provider_id: str,
+        channel_id: str,
+        programmes: List[dict],
+        fetched: float
+    ) -> None:
+        """
+        Store the schedule of a channel. Stored programmes from the start
+        of the new schedule on are replaced.
+
+        Args:
+            provider_id: Provider ID
+            channel_id: Channel ID
+            programmes: Dicts as returned by :func:`parse_schedule`
+            fetched: Unix time of the fetch
+
+        Returns: None
+        """
+        with self.db:
+            if programmes:
+                self.db.execute(
+                    'DELETE FROM programmes WHERE provider_id = ? '
+                    'AND channel_id = ? AND end > ?',
+                    (provider_id, channel_id, min(p['start'] for p in programmes))
+                )
+            self.db.executemany(
+                f'INSERT OR REPLACE INTO programmes ({PROGRAMME_COLUMNS}) '
+                'VALUES (?, ?, ?, ?, ?, ?, NULL)',
+                [(provider_id, channel_id, p['start'], p['end'],
+                  p.get('programme_id'), p.get('title')) for p in programmes]
+            )
+            self.db.execute(
+                'UPDATE channels SET fetched = ? '
+                'WHERE provider_id = ? AND channel_id = ?',
+                (fetched, provider_id, channel_id)
+            )
+
+    def set_details(self, provider_id: str, programme_id: str, details) -> None:
+        """
+        Store programme details (`GetAppChannelProgramData` response).
+
+        Args:
+            provider_id: Provider ID
+            programme_id: Programme ID
+            details: JSON serializable details
+
+        Returns: None
+        """
+        with self.db:
+            self.db.execute(
+                'UPDATE programmes SET details = ? '
+                'WHERE provider_id = ? AND programme_id = ?',
+                (json.dumps(details), provider_id, programme_id)
+            )
+
+    def missing_details(self, start: float, end: float) -> List[Tuple[str, str]]:
+        """
+        Programmes airing within a time range, without details.
+
+        Args:
+            start: Range start, unix time
+            end: Range end, unix time
+
+        Returns: Tuples of (provider ID, programme ID)
+        """
+        return self.db.execute(
+            'SELECT DISTINCT provider_id, programme_id FROM programmes '
+            'WHERE start < ? AND end > ? AND details IS NULL '
+            'AND programme_id IS NOT NULL', (end, start)
+        ).fetchall()
+
+    def now(self, provider_id: str, channel_id: str, at: float) -> Optional[Programme]:
+        """
+        Programme airing on a channel.
+
+        Args:
+            provider_id: Provider ID
+            channel_id: Channel ID
+            at: Unix time
+
+        Returns: Programme or `None`
+        """
+        row = self.db.execute(
+            f'SELECT {PROGRAMME_COLUMNS} FROM programmes '
+            'WHERE provider_id = ? AND channel_id = ? AND start <= ? '
+            'ORDER BY start DESC LIMIT 1', (provider_id, channel_id, at)
+        ).fetchone()
+        if row and row[3] > at:
+            return self._programme(row)
+
+    def next(self, provider_id: str, channel_id: str, at: float) -> Optional[Programme]:
+        """
+        Next programme starting on a channel.
+
+        Args:
+            provider_id: Provider ID
+            channel_id: Channel ID
+            at: Unix time
+
+        Returns: Programme or `None`
+        """
+        return self._programme(self.db.execute(
+            f'SELECT {PROGRAMME_COLUMNS} FROM programmes '
+            'WHERE provider_id = ? AND channel_id = ? AND start > ? '
+            'ORDER BY start LIMIT 1', (provider_id, channel_id, at)
+        ).fetchone())
+
+    def now_next(self, at: float) -> Dict[ChannelKey, Tuple[Optional[Programme], Optional[Programme]]]:
+        """
+        Current and next programme of every channel.
+
+        Args:
+            at: Unix time
+
+        Returns: Dict of (provider ID, channel ID) to (now, next)
+        """
+        guide = {
+            (provider_id, channel_id): [None, None]
+            for provider_id, channel_id, _ in self.channels()
+        }
+        for row in self.db.execute(
+            f'SELECT {PROGRAMME_COLUMNS} FROM programmes '
+            'WHERE start <= ? AND end > ?', (at, at)
+        ):
+            guide.setdefault(row[:2], [None, None])[0] = self._programme(row)
+        for row in self.db.execute(
+            f'SELECT {PROGRAMME_COLUMNS}, MIN(start) FROM programmes '
+            'WHERE start > ? GROUP BY provider_id, channel_id', (at,)
+        ):
+            guide.setdefault(row[:2], [None, None])[1] = self._programme(row)
+        return {key: tuple(value) for key, value in guide.items()}
+
+    def schedule(
+        self,
+        provider_id: str,
+        channel_id: str,
+        start: float,
+        end: float
+    ) -> List[Programme]:
+        """
+        Programmes of a channel airing within a time range.
+
+        Args:
+            provider_id: Provider ID
+            channel_id: Channel ID
+            start: Range start, unix time
+            end: Range end, unix time
+
+        Returns: Programmes, ordered by start
+        """
+        return [self._programme(row) for row in self.db.execute(
+            f'SELECT {PROGRAMME_COLUMNS} FROM programmes '
+            'WHERE provider_id = ? AND channel_id = ? AND start < ? AND end > ? '
+            'ORDER BY start', (provider_id, channel_id, end, start)
+        )]
+
+    def prune(self, before: float) -> int:
+        """
+        Remove programmes that ended before a given time.
+
+        Args:
+            before: Unix time
+
+        Returns: Number of removed programmes
+        """
+        with self.db:
+            return self.db.execute(
+                'DELETE FROM programmes WHERE end < ?', (before,)
+            ).rowcount
+
+
+class Epg(object):
+    def __init__(
+        self,
+        stump,
+        store: Optional[EpgStore] = None,
+        max_age: float = EPG_MAX_AGE,
+        concurrency: int = EPG_CONCURRENCY,
+        parser: Callable[[object], List[dict]] = parse_schedule,
+        clock: Callable[[], float] = time.time
+    ):
+        """
+        Programme guide of a console's app channels.
+
+        Args:
+            stump: StumpManager of the console
+            store: Programme store, in-memory by default
+            max_age: Seconds until a channel schedule gets refreshed
+            concurrency: Max. requests in flight during refresh
+            parser: Extracts programmes from `GetAppChannelData` params
+            clock: Unix time source
+        """
+        self.stump = stump
+        self.store = store or EpgStore()
+        self.max_age = max_age
+        self.concurrency = concurrency
+        self.parser = parser
+        self.clock = clock
+
+    async def _batch(self, message: Message, keys: List[Tuple], params: Callable) -> List[Tuple]:
+        results = await self.stump.request_stump_batch(
+            [(message, params(*key)) for key in keys],
+            max_concurrency=self.concurrency
+        )
+        succeeded = []
+        for key, result in zip(keys, results):
+            if isinstance(result, Exception):
+                log.warning('%s %s failed: %s', message.value, key, result)
+            elif json_model.is_error(result):
+                log.warning('%s %s failed: %s', message.value, key, result.error)
+            else:
+                succeeded.append((key, result.params))
+        return succeeded
+
+    async def refresh(self, force: bool = False, details: bool = False) -> int:
+        """
+        Update lineups and fetch schedules of stale channels.
+
+        Args:
+            force: Refetch lineups and all schedules
+            details: Also fetch details of programmes airing within
+                     the next `max_age` seconds
+
+        Raises:
+            StumpException: If the app channel lineups are unavailable
+
+        Returns: Number of fetched channel schedules
+        """
+        now = self.clock()
+        lineups = await self.stump.request_app_channel_lineups(refresh=force)
+        if json_model.is_error(lineups):
+            raise StumpException(
+                'App channel lineups unavailable: {}'.format(lineups.error)
+            )
+        providers = {provider.id for provider in lineups.params}
+        for provider in lineups.params:
+            self.store.set_channels(
+                provider.id, [(c.id, c.name) for c in provider.channels]
+            )
+        for provider_id in {c[0] for c in self.store.channels()} - providers:
+            self.store.set_channels(provider_id, [])
+
+        if force:
+            stale = [c[:2] for c in self.store.channels()]
+        else:
+            stale = self.store.stale_channels(self.max_age, now)
+
+        schedules = await self._batch(
+            Message.APPCHANNEL_DATA, stale,
+            lambda provider_id, channel_id: {
+                'providerId': provider_id,
+                'channelId': channel_id,
+                'id': channel_id
+            }
+        )
+        for (provider_id, channel_id), params in schedules:
+            self.store.store_schedule(
+                provider_id, channel_id, self.parser(params), now
+            )
+
+        if details:
+            missing = self.store.missing_details(now, now + self.max_age)
+            programmes = await self._batch(
+                Message.APPCHANNEL_PROGRAM_DATA, missing,
+                lambda provider_id, programme_id: {
+                    'providerId': provider_id,
+                    'programId': programme_id
+                }
+            )
+            for (provider_id, programme_id), params in programmes:
+                self.store.set_details(provider_id, programme_id, params)
+
+        self.store.prune(now - EPG_KEEP_PAST)
+        log.debug('EPG refresh: %d of %d schedules', len(schedules), len(stale))
+        return len(schedules)
+
+    def now(self, provider_id: str, channel_id: str, at: Optional[float] = None) -> Optional[Programme]:
+        """
+        Programme airing on a channel, from the local store.
+
+        Args:
+            provider_id: Provider ID
+            channel_id: Channel ID
+            at: Unix time, defaults to now
+
+        Returns: Programme or `None`
+        """
+        return self.store.now(provider_id, channel_id, self.clock() if at is None else at)
+
+    def next(self, provider_id: str, channel_id: str, at: Optional[float] = None) -> Optional[Programme]:
+        """
+        Next programme on a channel, from the local store.
+
+        Args:
+            provider_id: Provider ID
+            channel_id: Channel ID
+            at: Unix time, defaults to now
+
+        Returns: Programme or `None`
+        """
+        return self.store.next(provider_id, channel_id, self.clock() if at is None else at)
+
+    def now_next(self, at: Optional[float] = None) -> Dict[ChannelKey, Tuple[Optional[Programme], Optional[Programme]]]:
+        """
+        Current and next programme of every channel, from the local store.
+
+        Args:
+            at: Unix time, defaults to now
+
+        Returns: Dict of (provider ID, channel ID) to (now, next)
+        """
+        return self.store.now_next(self.clock() if at is None else at)
@@ -1,7 +1,7 @@
 """
 JSON models for deserializing Stump messages
 """
-from typing import List, Dict, Union, Optional
+from typing import Any, List, Dict, Union, Optional
 from uuid import UUID
 from pydantic import BaseModel
 from xbox.stump.enum import Message
@@ -131,6 +131,15 @@ class AppChannelLineups(StumpResponse):
     params: List[_AppProvider]
 
 
+class AppChannelData(StumpResponse):
+    # Schedule of an app channel, layout is provider specific
+    params: Any
+
+
+class AppChannelProgramData(StumpResponse):
+    params: Any
+
+
 class EnsureStreamingStarted(StumpResponse):
     params: _EnsureStreamingStarted
 
@@ -139,6 +148,10 @@ class TunerLineups(StumpResponse):
     params: _TunerLineups
 
 
+class GenericResponse(StumpResponse):
+    params: Any = None
+
+
 class SendKey(StumpResponse):
     params: bool
 
@@ -164,40 +177,136 @@ response_map = {
     Message.ENSURE_STREAMING_STARTED: EnsureStreamingStarted,
     Message.SEND_KEY: SendKey,
     Message.RECENT_CHANNELS: RecentChannels,
-    Message.SET_CHANNEL: None,
-    Message.APPCHANNEL_PROGRAM_DATA: None,
-    Message.APPCHANNEL_DATA: None,
+    Message.SET_CHANNEL: GenericResponse,
+    Message.APPCHANNEL_PROGRAM_DATA: AppChannelProgramData,
+    Message.APPCHANNEL_DATA: AppChannelData,
     Message.APPCHANNEL_LINEUPS: AppChannelLineups,
     Message.TUNER_LINEUPS: TunerLineups,
-    Message.PROGRAMM_INFO: None,
+    Message.PROGRAMM_INFO: GenericResponse,
     Message.LIVETV_INFO: LiveTvInfo,
     Message.HEADEND_INFO: HeadendInfo,
-    Message.ERROR: None
+    Message.ERROR: GenericResponse
 }
 
+# Lookup by the raw response name, avoids the enum lookup per message
+_response_models = {message.value: model for message, model in response_map.items()}
+
+
+def _response_model(name: str):
+    return _response_models.get(name, GenericResponse)
+
+
+# Discriminating key -> model lookup by its value, checked in order
+message_kinds = {
+    'response': _response_model,
+    'notification': lambda name: StumpNotification,
+    'error': lambda name: StumpError
+}
+
+
+class LazyStumpMessage(object):
+    __slots__ = ('kind', 'raw', 'model_class', '_model')
+
+    def __init__(self, kind: str, raw: dict, model_class):
+        """
+        Stump message, validated on first typed access.
+
+        The envelope (`msgid`, `name`) is read from the raw dict. Any
+        other attribute access validates the message into `model_class`
+        once and is forwarded to the model.
+
+        Args:
+            kind: `response`, `notification` or `error`
+            raw: JSON message
+            model_class: Model to validate into
+        """
+        self.kind = kind
+        self.raw = raw
+        self.model_class = model_class
+        self._model = None
+
+    @property
+    def msgid(self) -> Optional[str]:
+        return self.raw.get('msgid')
 
-def deserialize_stump_message(data: dict) -> Union[StumpError, StumpNotification, StumpResponse]:
+    @property
+    def name(self) -> str:
+        """
+        Value of the discriminating key, e.g. the response type
+        """
+        return self.raw[self.kind]
+
+    @property
+    def is_error(self) -> bool:
+        return self.kind == 'error'
+
+    @property
+    def validated(self) -> bool:
+        return self._model is not None
+
+    @property
+    def model(self) -> Union[StumpError, StumpNotification, StumpResponse]:
+        if self._model is None:
+            self._model = self.model_class.parse_obj(self.raw)
+        return self._model
+
+    def __getattr__(self, item):
+        return getattr(self.model, item)
+
+    def __repr__(self) -> str:
+        return '<LazyStumpMessage {}={} msgid={}>'.format(
+            self.kind, self.name, self.msgid
+        )
+
+
+def is_error(msg) -> bool:
+    """
+    Check whether a deserialized stump message is an error
+
+    Args:
+        msg: Model or :class:`LazyStumpMessage`
+
+    Returns:
+        bool: `True` for error messages
+    """
+    if isinstance(msg, LazyStumpMessage):
+        return msg.is_error
+    return isinstance(msg, StumpError)
+
+
+def deserialize_stump_message(
+    data: dict,
+    lazy: bool = False,
+    trusted: bool = False
+) -> Union[StumpError, StumpNotification, StumpResponse, LazyStumpMessage]:
     """
     Helper for deserializing JSON stump messages
 
+    The model is looked up by the discriminating key (`response`,
+    `notification` or `error`) and its value.
+
     Args:
         data (dict): Stump message
+        lazy (bool): Return a :class:`LazyStumpMessage`, validated on
+                     first typed access
+        trusted (bool): Skip validation, for data produced by this
+                        library. Nested models are not constructed,
+                        nested data stays raw
+
+    Raises:
+        StumpJsonError: If the message has none of the discriminating keys
 
     Returns:
         Model: Parsed JSON object
     """
-    response = data.get('response')
-    notification = data.get('notification')
-    error = data.get('error')
-
-    if response:
-        response = Message(response)
-        model = response_map.get(response)
-        if not issubclass(model, StumpResponse):
-            raise StumpJsonError('Model not of subclass StumpResponse')
-
-        return model.parse_obj(data)
-    elif notification:
-        return StumpNotification.load(data)
-    elif error:
-        return StumpError.load(data)
+    for kind, model_for in message_kinds.items():
+        name = data.get(kind)
+        if name:
+            model = model_for(name)
+            if lazy:
+                return LazyStumpMessage(kind, data, model)
+            elif trusted:
+                return model.construct(**data)
+            return model.parse_obj(data)
+
+    raise StumpJsonError('Unknown stump message: {}'.format(data))
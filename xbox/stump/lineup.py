@@ -0,0 +1,309 @@
+"""
+Channel index over tuner lineups
+
+:class:`ChannelIndex` indexes the channels of `GetTunerLineups` responses by
+channel number, channel id and normalized display name, and supports
+prefix and fuzzy search. Queries resolve locally to a channel id plus its
+lineup id, as needed by `set_stump_channel_by_id`.
+
+Updates are incremental: Only channels that were added, removed or
+changed between two lineup responses touch the index.
+
+Example:
+    Switch channel by spoken name::
+
+        channel = console.stump.channels.resolve('das erste')
+        await console.set_stump_channel_by_id(
+            channel.channel_id, channel.lineup_id
+        )
+"""
+import re
+import difflib
+import logging
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple, Union
+from uuid import UUID
+
+from xbox.stump import json_model
+
+log = logging.getLogger(__name__)
+
+# Tokens ignored for the alias of a name, "Das Erste HD" -> "das erste"
+QUALITY_TOKENS = {'hd', 'uhd', 'sd', '4k'}
+FUZZY_CUTOFF = 0.75
+
+_NUMBER_QUERY = re.compile(r'^(?:channel|ch\.?)?\s*(\d+)$')
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalize a channel name for lookups: Case folded, accents and
+    punctuation removed, `&` spelled out.
+
+    Args:
+        name: Display name
+
+    Returns: Normalized name
+    """
+    name = unicodedata.normalize('NFKD', name)
+    name = ''.join(c for c in name if not unicodedata.combining(c))
+    name = name.casefold().replace('&', ' and ').replace('+', ' plus ')
+    return ' '.join(re.findall(r'[^\W_]+', name))
+
+
+def _number(value) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _alias(name: str) -> str:
+    # Without parenthesized suffixes like "(Internet)" and quality tokens
+    normalized = normalize_name(re.sub(r'\(.*?\)', ' ', name))
+    return ' '.join(t for t in normalized.split() if t not in QUALITY_TOKENS)
+
+
+class Channel(NamedTuple):
+    """
+    Channel of a tuner lineup
+    """
+    channel_id: str
+    name: str
+    number: int
+    lineup_id: str
+
+    @property
+    def normalized_name(self) -> str:
+        return normalize_name(self.name)
+
+
+class ChannelIndex(object):
+    def __init__(self):
+        """
+        Index over the channels of tuner lineups.
+        """
+        # lineup id -> channel id -> channel
+        self._lineups: Dict[str, Dict[str, Channel]] = {}
+        self._by_id: Dict[str, Channel] = {}
+        self._by_number: Dict[int, List[Channel]] = {}
+        self._by_name: Dict[str, List[Channel]] = {}
+        # Sorted (name key, lineup id, channel id) for prefix search
+        self._names: List[Tuple[str, str, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __iter__(self) -> Iterator[Channel]:
+        return iter(self._by_id.values())
+
+    def __contains__(self, channel_id: str) -> bool:
+        return channel_id in self._by_id
+
+    @staticmethod
+    def _name_keys(channel: Channel) -> Set[str]:
+        return {channel.normalized_name, _alias(channel.name)} - {''}
+
+    def _add(self, channel: Channel) -> None:
+        self._lineups.setdefault(channel.lineup_id, {})[channel.channel_id] = channel
+        self._by_id[channel.channel_id] = channel
+        if channel.number:
+            self._by_number.setdefault(channel.number, []).append(channel)
+        for key in self._name_keys(channel):
+            self._by_name.setdefault(key, []).append(channel)
+            insort(self._names, (key, channel.lineup_id, channel.channel_id))
+
+    def _remove(self, channel: Channel) -> None:
+        del self._lineups[channel.lineup_id][channel.channel_id]
+        if self._by_id.get(channel.channel_id) == channel:
+            del self._by_id[channel.channel_id]
+            # Same channel id may be in another lineup
+            for lineup in self._lineups.values():
+                if channel.channel_id in lineup:
+                    self._by_id[channel.channel_id] = lineup[channel.channel_id]
+                    break
+        if channel.number:
+            self._discard(self._by_number, channel.number, channel)
+        for key in self._name_keys(channel):
+            self._discard(self._by_name, key, channel)
+            entry = (key, channel.lineup_id, channel.channel_id)
+            index = bisect_left(self._names, entry)
+            if index < len(self._names) and self._names[index] == entry:
+                del self._names[index]
+
+    @staticmethod
+    def _discard(index: dict, key, channel: Channel) -> None:
+        channels = index.get(key)
+        if channels and channel in channels:
+            channels.remove(channel)
+            if not channels:
+                del index[key]
+
+    def update_lineup(self, lineup_id: str, channels: List[Channel]) -> Tuple[int, int]:
+        """
+        Replace the channels of a lineup, only differences are applied.
+
+        Args:
+            lineup_id: Lineup id
+            channels: Channels of the lineup
+
+        Returns: Tuple of (added, removed) channels, a changed channel
+                 counts as both
+        """
+        current = self._lineups.get(lineup_id, {})
+        new = {channel.channel_id: channel for channel in channels}
+
+        removed = [c for cid, c in current.items() if new.get(cid) != c]
+        added = [c for cid, c in new.items() if current.get(cid) != c]
+        for channel in removed:
+            self._remove(channel)
+        for channel in added:
+            self._add(channel)
+        if not self._lineups.get(lineup_id):
+            self._lineups.pop(lineup_id, None)
+        return len(added), len(removed)
+
+    def update(
+        self,
+        lineups: Union[json_model.TunerLineups, json_model.LazyStumpMessage]
+    ) -> Tuple[int, int]:
+        """
+        Update the index from a `GetTunerLineups` response. Lineups not in
+        the response are removed.
+
+        A not yet validated :class:`json_model.LazyStumpMessage` is indexed
+        from its raw data, without validating the whole lineup.
+
+        Args:
+            lineups: Tuner lineups response
+
+        Returns: Tuple of (added, removed) channels
+        """
+        if isinstance(lineups, json_model.LazyStumpMessage) and not lineups.validated:
+            providers = [
+                (p['headendId'], [
+                    (c['channelId'], c['displayName'], _number(c['channelNumber']))
+                    for c in p['foundChannels']
+                ]) for p in lineups.raw['params']['providers']
+            ]
+        else:
+            providers = [
+                (p.headendId, [
+                    (c.channelId, c.displayName, c.channelNumber)
+                    for c in p.foundChannels
+                ]) for p in lineups.params.providers
+            ]
+
+        added = removed = 0
+        seen = set()
+        for headend_id, channels in providers:
+            lineup_id = str(UUID(str(headend_id))).upper()
+            seen.add(lineup_id)
+            a, r = self.update_lineup(lineup_id, [
+                Channel(channel_id, name, number, lineup_id)
+                for channel_id, name, number in channels
+            ])
+            added, removed = added + a, removed + r
+        for lineup_id in set(self._lineups) - seen:
+            removed += self.update_lineup(lineup_id, [])[1]
+        if added or removed:
+            log.debug('Channel index: %d added, %d removed', added, removed)
+        return added, removed
+
+    def by_id(self, channel_id: str) -> Optional[Channel]:
+        return self._by_id.get(channel_id)
+
+    def by_number(self, number: int) -> List[Channel]:
+        return list(self._by_number.get(number, []))
+
+    def by_name(self, name: str) -> List[Channel]:
+        return list(self._by_name.get(normalize_name(name), []))
+
+    def prefix(self, prefix: str, limit: int = 10) -> List[Channel]:
+        """
+        Channels whose normalized name starts with a prefix.
+
+        Args:
+            prefix: Name prefix
+            limit: Max. results
+
+        Returns: Channels, ordered by name
+        """
+        prefix = normalize_name(prefix)
+        if not prefix:
+            return []
+
+        results = []
+        seen = set()
+        index = bisect_left(self._names, (prefix,))
+        while index < len(self._names) and len(results) < limit:
+            key, lineup_id, channel_id = self._names[index]
+            if not key.startswith(prefix):
+                break
+            if (lineup_id, channel_id) not in seen:
+                seen.add((lineup_id, channel_id))
+                results.append(self._lineups[lineup_id][channel_id])
+            index += 1
+        return results
+
+    def fuzzy(self, name: str, limit: int = 5, cutoff: float = FUZZY_CUTOFF) -> List[Channel]:
+        """
+        Channels with a name similar to the given one.
+
+        Args:
+            name: Channel name, e.g. from speech recognition
+            limit: Max. results
+            cutoff: Min. similarity, 0 - 1
+
+        Returns: Channels, best match first
+        """
+        matches = difflib.get_close_matches(
+            normalize_name(name), self._by_name.keys(), limit, cutoff
+        )
+        results = []
+        for key in matches:
+            for channel in self._by_name[key]:
+                if channel not in results:
+                    results.append(channel)
+        return results[:limit]
+
+    def search(self, query: str, limit: int = 10) -> List[Channel]:
+        """
+        Find channels by number, id, name, name prefix or similar name,
+        in this order.
+
+        Args:
+            query: Search query
+            limit: Max. results
+
+        Returns: Channels, best match first
+        """
+        query = query.strip()
+        match = _NUMBER_QUERY.match(query.lower())
+        if match:
+            channels = self.by_number(int(match.group(1)))
+            if channels:
+                return channels[:limit]
+
+        channel = self.by_id(query)
+        if channel:
+            return [channel]
+
+        for lookup in (self.by_name, self.prefix, self.fuzzy):
+            channels = lookup(query)
+            if channels:
+                return channels[:limit]
+        return []
+
+    def resolve(self, query: str) -> Optional[Channel]:
+        """
+        Resolve a query to the best matching channel, see :meth:`search`.
+
+        Args:
+            query: Channel number, id or name
+
+        Returns: Channel or `None`
+        """
+        channels = self.search(query, limit=1)
+        return channels[0] if channels else None
@@ -2,21 +2,44 @@
 StumpManager - Handling TV Streaming / IR control commands
 """
 import random
+import asyncio
 import logging
 import requests
 
-from typing import Union
+from typing import Iterable, List, NamedTuple, Optional, Tuple, Union
 
 from xbox.sg.utils.events import Event
+from xbox.sg.utils.stream import MessageStream, OverflowPolicy, StreamHub
 from xbox.sg.enum import ServiceChannel
 from xbox.sg.manager import Manager
 
+from xbox.stump.cache import StumpCache
+from xbox.stump.correlator import RequestCorrelator, RequestTimeoutError
+from xbox.stump.lineup import Channel, ChannelIndex
 from xbox.stump.enum import Message, Notification, Source, SourceHttpQuery, Quality
 from xbox.stump import json_model
 
 
 log = logging.getLogger(__name__)
 
+# Default seconds to wait for the response to a stump request
+STUMP_TIMEOUT = 3
+# Default seconds between two keys of a key sequence
+KEY_GAP = 0.1
+
+# Response types whose latest response is kept, by attribute
+RESPONSE_FIELDS = {
+    Message.CONFIGURATION: '_stump_config',
+    Message.HEADEND_INFO: '_stump_headend_info',
+    Message.LIVETV_INFO: '_stump_livetv_info',
+    Message.TUNER_LINEUPS: '_stump_tuner_lineups',
+    Message.RECENT_CHANNELS: '_stump_recent_channels',
+    Message.PROGRAMM_INFO: '_stump_program_info',
+    Message.APPCHANNEL_LINEUPS: '_appchannel_lineups',
+    Message.APPCHANNEL_DATA: '_appchannel_data',
+    Message.APPCHANNEL_PROGRAM_DATA: '_appchannel_program_data'
+}
+
 
 class StumpException(Exception):
     """
@@ -25,6 +48,32 @@ class StumpException(Exception):
     pass
 
 
+class KeyResult(NamedTuple):
+    """
+    Result of a key sent in a sequence
+    """
+    button: str
+    response: Optional[json_model.StumpResponse]
+    error: Optional[Exception]
+    latency: float
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _key_params(button: str, device_id: Optional[str] = None, **kwargs) -> dict:
+    params = dict(button_id=button)
+
+    if device_id:
+        params['device_id'] = device_id
+
+    if kwargs:
+        params.update(**kwargs)
+
+    return params
+
+
 class StumpManager(Manager):
     __namespace__ = 'stump'
 
@@ -56,6 +105,32 @@ class StumpManager(Manager):
         self.on_notification = Event()
         self.on_error = Event()
 
+        self._notification_hub = StreamHub(history=16)
+        self.on_notification += self._notification_hub.publish
+
+        self.cache = StumpCache()
+        self._requests = RequestCorrelator()
+        self.channels = ChannelIndex()
+        self.on_notification += self.cache.on_notification
+
+    def notifications(
+        self,
+        maxsize: int = MessageStream.DEFAULT_MAXSIZE,
+        overflow: OverflowPolicy = OverflowPolicy.DropOldest,
+        replay: int = 0
+    ) -> MessageStream:
+        """
+        Stream of stump notifications, to be consumed with `async for`.
+
+        Args:
+            maxsize: Max. buffered notifications
+            overflow: What to do when the buffer is full
+            replay: Start with up to this many recent notifications (max. 16)
+
+        Returns: Stream of tuples (notification, data)
+        """
+        return self._notification_hub.stream(maxsize, overflow, replay)
+
     @property
     def msg_id(self):
         """
@@ -111,6 +186,10 @@ class StumpManager(Manager):
         """
         Internal handler for JSON messages received by the core protocol.
 
+        Messages are dispatched on their discriminating key and kept as
+        raw dict until a typed attribute is accessed, see
+        :class:`json_model.LazyStumpMessage`.
+
         Args:
             data: The JSON object that was received.
             channel: The channel this message was received on.
@@ -118,25 +197,22 @@ class StumpManager(Manager):
         Returns:
             None.
         """
-        msg = json_model.deserialize_stump_message(data)
+        try:
+            msg = json_model.deserialize_stump_message(data, lazy=True)
+        except json_model.StumpJsonError:
+            log.warning("Unknown stump message: {}".format(data))
+            return
 
         if msg.msgid:
-            self.console.protocol._set_result(msg.msgid, msg)
+            self._requests.resolve(msg.msgid, msg)
 
-        if isinstance(msg, json_model.StumpError):
-            log.debug("Error msg: {}".format(msg))
+        log.debug("Stump msg: {}".format(msg))
+        if msg.kind == 'error':
             self._on_error(msg)
-
-        elif isinstance(msg, json_model.StumpResponse):
-            log.debug("Response msg: {}".format(msg))
-            self._on_response(msg.response, msg)
-
-        elif isinstance(msg, json_model.StumpNotification):
-            log.debug("Notification msg: {}".format(msg))
-            self._on_notification(msg.notification, msg)
-
+        elif msg.kind == 'response':
+            self._on_response(msg.name, msg)
         else:
-            log.warning("Unknown stump message: {}".format(data))
+            self._on_notification(msg.name, msg)
 
     def _on_response(self, message_type: Union[Message, str], data: json_model.StumpResponse) -> None:
         """
@@ -146,34 +222,18 @@ class StumpManager(Manager):
             message_type: The message type.
             data: The raw message.
         """
-        if isinstance(message_type, str):
+        try:
             message_type = Message(message_type)
+        except ValueError:
+            log.warning("Unknown response type: {}".format(message_type))
+
+        field = RESPONSE_FIELDS.get(message_type)
+        if field:
+            # Refer to returned data from request_* methods for others
+            setattr(self, field, data)
+        if message_type == Message.TUNER_LINEUPS:
+            self.channels.update(data)
 
-        params = data.params
-
-        if Message.CONFIGURATION == message_type:
-            self._stump_config = params
-        elif Message.HEADEND_INFO == message_type:
-            self._stump_headend_info = params
-        elif Message.LIVETV_INFO == message_type:
-            self._stump_livetv_info = params
-        elif Message.TUNER_LINEUPS == message_type:
-            self._stump_tuner_lineups = params
-        elif Message.RECENT_CHANNELS:
-            self._stump_recent_channels = params
-        elif Message.PROGRAMM_INFO:
-            self._stump_program_info = params
-        elif Message.APPCHANNEL_LINEUPS:
-            self._appchannel_lineups = params
-        elif Message.APPCHANNEL_DATA:
-            self._appchannel_data = params
-        elif Message.APPCHANNEL_PROGRAM_DATA:
-            self._appchannel_program_data = params
-        elif Message.SEND_KEY or \
-                Message.ENSURE_STREAMING_STARTED or \
-                Message.SET_CHANNEL:
-            # Refer to returned data from request_* methods
-            pass
         log.info("Received {} response".format(message_type))
         self.on_response(message_type, data)
 
@@ -185,8 +245,10 @@ class StumpManager(Manager):
             notification: The notification type.
             data: The raw message.
         """
-        if isinstance(notification, str):
+        try:
             notification = Notification(notification)
+        except ValueError:
+            log.warning("Unknown notification type: {}".format(notification))
 
         log.info("Received {} notification: {}".format(notification, data))
         self.on_notification(notification, data)
@@ -201,11 +263,13 @@ class StumpManager(Manager):
         log.error("Error: {}".format(data))
         self.on_error(data)
 
-    async def _send_stump_message(self, name, params=None, msgid=None, timeout=3):
+    async def _send_stump_message(self, name, params=None, msgid=None, timeout=STUMP_TIMEOUT):
         """
         Internal method for sending JSON messages over the core protocol.
 
-        Handles message IDs as well as waiting for results.
+        Handles message IDs as well as waiting for results. The response
+        is correlated by message ID, so any number of requests can be in
+        flight concurrently.
 
         Args:
             name (Enum): Request name
@@ -213,50 +277,167 @@ class StumpManager(Manager):
             msgid (str): Message identifier
             timeout (int): Timeout in seconds
 
+        Raises:
+            StumpException: If no response was received within `timeout`
+                            or the console replied with an error
+
         Returns:
             dict: The received result.
         """
         if not msgid:
             msgid = self.msg_id
 
-        msg = json_model.StumpRequest(msgid=msgid, request=name.value, params=params)
-        await self._send_json(msg.dict())
-
-        result = await self.console.protocol._await_ack(msgid, timeout)
-        if not result:
+        future = await self._start_stump_request(name, params, msgid, timeout)
+        try:
+            result = await future
+        except RequestTimeoutError:
             raise StumpException("Message \'{}\': \'{}\' got no response!".format(msgid, name))
+        finally:
+            # Drops the pending request if we got cancelled
+            future.cancel()
 
+        if json_model.is_error(result):
+            raise StumpException("Message \'{}\': \'{}\' failed: {}".format(msgid, name, result.error))
         return result
 
-    async def request_stump_configuration(self) -> dict:
+    async def _start_stump_request(self, name, params, msgid, timeout) -> asyncio.Future:
+        """
+        Internal method sending a request without waiting for the response.
+
+        Args:
+            name (Enum): Request name
+            params (dict): The message parameters to send.
+            msgid (str): Message identifier
+            timeout (int): Timeout in seconds
+
+        Returns:
+            Future: Resolves to the response, fails with
+                    :class:`RequestTimeoutError` after `timeout`
+        """
+        # Built by us, no validation needed
+        msg = json_model.StumpRequest.construct(msgid=msgid, request=name.value, params=params)
+        # Register before sending, the response may arrive any time
+        future = self._requests.register(msgid, timeout)
+        try:
+            await self._send_json(msg.dict())
+        except BaseException:
+            future.cancel()
+            raise
+        return future
+
+    async def request_stump_batch(
+        self,
+        batch: Iterable[Tuple[Message, Optional[dict]]],
+        timeout: float = STUMP_TIMEOUT,
+        max_concurrency: Optional[int] = None,
+        return_exceptions: bool = True
+    ) -> List[dict]:
+        """
+        Send multiple requests concurrently and gather their results.
+
+        Example:
+            Fetch data of several app channels at once::
+
+                results = await console.request_stump_batch([
+                    (Message.APPCHANNEL_DATA, {'providerId': provider_id,
+                                               'channelId': channel_id,
+                                               'id': channel_id})
+                    for channel_id in channel_ids
+                ])
+
+        Args:
+            batch: Tuples of (request name, params)
+            timeout: Timeout in seconds, per request
+            max_concurrency: Max. requests in flight, `None` for no limit
+            return_exceptions: Return exceptions in place of failed
+                               results instead of raising the first one
+
+        Returns: Results, in order of `batch`
+        """
+        semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+
+        async def _request(name, params):
+            if not semaphore:
+                return await self._send_stump_message(name, params, timeout=timeout)
+            async with semaphore:
+                return await self._send_stump_message(name, params, timeout=timeout)
+
+        return await asyncio.gather(
+            *[_request(name, params) for name, params in batch],
+            return_exceptions=return_exceptions
+        )
+
+    async def _request_cached(
+        self,
+        name: Message,
+        params: Optional[dict] = None,
+        refresh: bool = False
+    ) -> dict:
+        """
+        Internal method for sending requests through the response cache.
+
+        Args:
+            name: Request name
+            params: The message parameters to send.
+            refresh: Bypass cached response
+
+        Returns: The received result.
+        """
+        return await self.cache.get(
+            name, params,
+            lambda: self._send_stump_message(name, params),
+            refresh=refresh
+        )
+
+    def invalidate_stump_cache(self, *messages: Message) -> None:
+        """
+        Drop cached stump responses.
+
+        Args:
+            *messages: Message types to drop, all if none given
+
+        Returns: None
+        """
+        self.cache.invalidate(*messages)
+
+    async def request_stump_configuration(self, refresh: bool = False) -> dict:
         """
         Request device configuration from console.
 
         The configuration holds info about configured, by Xbox controlable \
         devices (TV, AV, STB).
 
+        Args:
+            refresh: Bypass cached response
+
         Returns:
             dict: The received result.
         """
-        return await self._send_stump_message(Message.CONFIGURATION)
+        return await self._request_cached(Message.CONFIGURATION, refresh=refresh)
 
-    async def request_headend_info(self) -> dict:
+    async def request_headend_info(self, refresh: bool = False) -> dict:
         """
         Request available headend information from console.
 
+        Args:
+            refresh: Bypass cached response
+
         Returns: The received result.
         """
-        return await self._send_stump_message(Message.HEADEND_INFO)
+        return await self._request_cached(Message.HEADEND_INFO, refresh=refresh)
 
-    async def request_live_tv_info(self) -> dict:
+    async def request_live_tv_info(self, refresh: bool = False) -> dict:
         """
         Request LiveTV information from console.
 
         Holds information about currently tuned channel, streaming-port etc.
 
+        Args:
+            refresh: Bypass cached response
+
         Returns: The received result.
         """
-        return await self._send_stump_message(Message.LIVETV_INFO)
+        return await self._request_cached(Message.LIVETV_INFO, refresh=refresh)
 
     async def request_program_info(self) -> dict:
         """
@@ -268,23 +449,29 @@ class StumpManager(Manager):
         """
         return await self._send_stump_message(Message.PROGRAMM_INFO)
 
-    async def request_tuner_lineups(self) -> dict:
+    async def request_tuner_lineups(self, refresh: bool = False) -> dict:
         """
         Request Tuner Lineups from console.
 
         Tuner lineups hold information about scanned / found channels.
 
+        Args:
+            refresh: Bypass cached response
+
         Returns: The received result.
         """
-        return await self._send_stump_message(Message.TUNER_LINEUPS)
+        return await self._request_cached(Message.TUNER_LINEUPS, refresh=refresh)
 
-    async def request_app_channel_lineups(self) -> dict:
+    async def request_app_channel_lineups(self, refresh: bool = False) -> dict:
         """
         Request AppChannel Lineups.
 
+        Args:
+            refresh: Bypass cached response
+
         Returns: The received result.
         """
-        return await self._send_stump_message(Message.APPCHANNEL_LINEUPS)
+        return await self._request_cached(Message.APPCHANNEL_LINEUPS, refresh=refresh)
 
     async def request_app_channel_data(self, provider_id: str, channel_id: str) -> dict:
         """
@@ -296,7 +483,7 @@ class StumpManager(Manager):
 
         Returns: The received result.
         """
-        return self._send_stump_message(
+        return await self._send_stump_message(
             Message.APPCHANNEL_DATA,
             params={
                 'providerId': provider_id,
@@ -333,29 +520,79 @@ class StumpManager(Manager):
 
         Returns: The received result.
         """
-        return await self._send_stump_message(
+        result = await self._send_stump_message(
             Message.SET_CHANNEL,
             params={
                 'channelId': channel_id,
                 'lineupInstanceId': lineup_id
             }
         )
+        self.cache.invalidate(Message.LIVETV_INFO)
+        return result
+
+    async def resolve_stump_channel(self, query: str) -> Optional[Channel]:
+        """
+        Resolve a channel number, id or name locally, via the channel
+        index over the tuner lineups. Lineups are requested if not
+        known yet.
+
+        Args:
+            query: Channel number, id or (partial / misspelled) name
+
+        Returns: Channel or `None`
+        """
+        if not len(self.channels):
+            try:
+                await self.request_tuner_lineups()
+            except StumpException as e:
+                log.debug('Tuner lineups unavailable: %s', e)
+        return self.channels.resolve(query)
+
+    async def set_stump_channel(self, query: str) -> dict:
+        """
+        Switch to channel by number, id or name, resolved locally.
+
+        Args:
+            query: Channel number, id or name
+
+        Raises:
+            StumpException: If no matching channel was found
+
+        Returns: The received result.
+        """
+        channel = await self.resolve_stump_channel(query)
+        if not channel:
+            raise StumpException('No channel matching: {}'.format(query))
+        return await self.set_stump_channel_by_id(
+            channel.channel_id, channel.lineup_id
+        )
 
     async def set_stump_channel_by_name(self, channel_name: str) -> dict:
         """
         Switch to channel by providing channel name.
 
+        The name is resolved via the local channel index, if it does
+        not match any channel the console tries to match it.
+
         Args:
             channel_name: Channel name to switch to.
 
         Returns: The received result.
         """
-        return await self._send_stump_message(
+        channel = await self.resolve_stump_channel(channel_name)
+        if channel:
+            return await self.set_stump_channel_by_id(
+                channel.channel_id, channel.lineup_id
+            )
+
+        result = await self._send_stump_message(
             Message.SET_CHANNEL,
             params={
                 'channel_name': channel_name
             }
         )
+        self.cache.invalidate(Message.LIVETV_INFO)
+        return result
 
     async def request_recent_channels(self, first: int, count: int) -> dict:
         """
@@ -386,19 +623,120 @@ class StumpManager(Manager):
 
         Returns: The received result.
         """
-        params = dict(button_id=button)
-
-        if device_id:
-            params['device_id'] = device_id
-
-        if kwargs:
-            params.update(**kwargs)
-
         return await self._send_stump_message(
             Message.SEND_KEY,
-            params=params
+            params=_key_params(button, device_id, **kwargs)
         )
 
+    async def send_stump_key_sequence(
+        self,
+        keys: Iterable[Union[str, Tuple[str, int]]],
+        device_id: str = None,
+        gap: float = KEY_GAP,
+        timeout: float = STUMP_TIMEOUT,
+        **kwargs
+    ) -> List[KeyResult]:
+        """
+        Send a sequence of remote control buttons.
+
+        Keys are sent `gap` seconds apart without waiting for the
+        responses in between, the responses are collected afterwards.
+
+        Example:
+            Three volume steps, then mute::
+
+                results = await console.send_stump_key_sequence(
+                    [('btn.vol_up', 3), 'btn.vol_mute'], device_id='1'
+                )
+                assert all(r.ok for r in results)
+
+        Args:
+            keys: Buttons, or tuples of (button, repeat count)
+            device_id: Device ID of device to control.
+            gap: Seconds between two keys
+            timeout: Timeout in seconds, per key
+            **kwargs: Additional params for every key
+
+        Returns: Result of every sent key, in order
+        """
+        buttons = []
+        for key in keys:
+            if isinstance(key, str):
+                buttons.append(key)
+            else:
+                buttons.extend([key[0]] * key[1])
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        received = {}
+        sent = []
+        for index, button in enumerate(buttons):
+            # Scheduled against the start, so the gap doesn't drift
+            delay = start + index * gap - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            sent_at = loop.time()
+            try:
+                future = await self._start_stump_request(
+                    Message.SEND_KEY, _key_params(button, device_id, **kwargs),
+                    self.msg_id, timeout
+                )
+            except Exception as e:
+                sent.append((button, sent_at, e))
+                continue
+            future.add_done_callback(
+                lambda f, i=index: received.setdefault(i, loop.time())
+            )
+            sent.append((button, sent_at, future))
+
+        results = []
+        for index, (button, sent_at, future) in enumerate(sent):
+            if isinstance(future, Exception):
+                results.append(KeyResult(button, None, future, 0.0))
+                continue
+
+            response, error = None, None
+            try:
+                response = await future
+            except RequestTimeoutError as e:
+                error = StumpException(str(e))
+            if json_model.is_error(response):
+                response, error = None, StumpException(response.error)
+            latency = received.get(index, loop.time()) - sent_at
+            results.append(KeyResult(button, response, error, latency))
+        return results
+
+    async def send_stump_digits(
+        self,
+        number: str,
+        device_id: str = None,
+        enter: bool = False,
+        gap: float = KEY_GAP
+    ) -> List[KeyResult]:
+        """
+        Enter a channel number as sequence of digit buttons.
+
+        Args:
+            number: Digits to send, e.g. `'1234'`
+            device_id: Device ID of device to control.
+            enter: Send `btn.ch_enter` after the digits
+            gap: Seconds between two keys
+
+        Raises:
+            StumpException: If `number` contains anything but digits
+
+        Returns: Result of every sent key, in order
+        """
+        number = str(number)
+        if not number.isdigit():
+            raise StumpException('Invalid channel number: {}'.format(number))
+
+        keys = ['btn.digit_{}'.format(digit) for digit in number]
+        if enter:
+            keys.append('btn.ch_enter')
+        return await self.send_stump_key_sequence(keys, device_id, gap)
+
     async def request_ensure_stump_streaming_started(self, source: Source) -> dict:
         """
         Ensure that streaming started on desired tuner type
@@ -418,19 +756,19 @@ class StumpManager(Manager):
     @property
     def headend_locale(self):
         if self._stump_headend_info:
-            return self._stump_headend_info.headendLocale
+            return self._stump_headend_info.params.headendLocale
 
     @property
     def streaming_port(self):
         if self._stump_livetv_info:
-            return self._stump_livetv_info.streamingPort
+            return self._stump_livetv_info.params.streamingPort
 
     @property
     def is_hdmi_mode(self):
         if self._stump_livetv_info:
-            return self._stump_livetv_info.inHdmiMode
+            return self._stump_livetv_info.params.inHdmiMode
 
     @property
     def current_tunerchannel_type(self):
         if self._stump_livetv_info:
-            return self._stump_livetv_info.tunerChannelType
+            return self._stump_livetv_info.params.tunerChannelType